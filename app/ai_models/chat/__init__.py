@@ -1,21 +1,158 @@
-from typing import Any
+import os
+import hashlib
+from collections import OrderedDict
+from typing import Any, TypedDict
+import httpx
 from langchain.chat_models import BaseChatModel, init_chat_model
 from dotenv import load_dotenv
 
+# 池化的模型客户端数量上限（按 provider/base_url/api_key/model 区分）
+CHAT_MODEL_POOL_SIZE = int(os.getenv("CHAT_MODEL_POOL_SIZE", 64))
+
+PoolKey = tuple[str, str, str, str]
+
+
+class ChatModelPoolStats(TypedDict):
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    evictions: int
+    requests: int
+    connections: int
+    tls_handshakes: int
+    reused: int
+
+
+class ChatModelPool:
+    """
+    模型客户端池：同一 provider、base_url、api_key（哈希）与模型共用一个客户端，LRU 淘汰；
+    所有客户端共用一个 httpx.AsyncClient（连接池），请求间复用到模型服务的 TLS 连接；
+    temperature、max_tokens 等每次请求的参数通过浅拷贝绑定，不重建客户端
+    """
+
+    def __init__(self, max_size: int = 64):
+        self.max_size = max(1, max_size)
+        self.models: OrderedDict[PoolKey, BaseChatModel] = OrderedDict()
+        self._http_client: httpx.AsyncClient | None = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.requests = 0
+        self.connections = 0
+        self.tls_handshakes = 0
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=int(os.getenv("CHAT_HTTP_MAX_CONNECTIONS", 100)),
+                    max_keepalive_connections=int(
+                        os.getenv("CHAT_HTTP_MAX_KEEPALIVE", 20)
+                    ),
+                    keepalive_expiry=float(os.getenv("CHAT_HTTP_KEEPALIVE_EXPIRY", 60)),
+                ),
+                event_hooks={"request": [self._on_request]},
+            )
+        return self._http_client
+
+    async def _on_request(self, request: httpx.Request):
+        self.requests += 1
+        request.extensions["trace"] = self._trace
+
+    async def _trace(self, event_name: str, info: dict[str, Any]):
+        # httpcore 的连接事件：只有新建连接时才会建立 TCP 与 TLS
+        if event_name == "connection.connect_tcp.complete":
+            self.connections += 1
+        elif event_name == "connection.start_tls.complete":
+            self.tls_handshakes += 1
+
+    def get(
+        self, model: str, api_key: str, base_url: str, **kwargs: Any
+    ) -> BaseChatModel:
+        model_provider = "deepseek" if "deepseek" in model else "openai"
+        key: PoolKey = (
+            model_provider,
+            base_url,
+            hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16],
+            model,
+        )
+        base = self.models.get(key)
+        if base is None:
+            self.misses += 1
+            base = init_chat_model(
+                model=model,
+                model_provider=model_provider,
+                base_url=base_url,
+                api_key=api_key,
+                http_async_client=self.http_client,
+            )
+            self.models[key] = base
+            if len(self.models) > self.max_size:
+                self.models.popitem(last=False)
+                self.evictions += 1
+        else:
+            self.hits += 1
+            self.models.move_to_end(key)
+        return self._bind(base, kwargs) if kwargs else base
+
+    @staticmethod
+    def _bind(base: BaseChatModel, settings: dict[str, Any]) -> BaseChatModel:
+        """
+        浅拷贝并替换参数，拷贝与原客户端共用底层连接；
+        先经过模型类的 before 校验器，保持与直接构造一致（如 gpt-5 忽略 temperature）
+        """
+        cls = type(base)
+        values: dict[str, Any] = {"model": getattr(base, "model_name", None)}
+        values.update(settings)
+        for name, decorator in cls.__pydantic_decorators__.model_validators.items():
+            if decorator.info.mode == "before":
+                values = getattr(cls, name)(values)
+        update = {
+            name: values.get(name) for name in settings if name in cls.model_fields
+        }
+        if values.get("model_kwargs"):
+            update["model_kwargs"] = {
+                **getattr(base, "model_kwargs", {}),
+                **values["model_kwargs"],
+            }
+        return base.model_copy(update=update)
+
+    async def close(self):
+        self.models.clear()
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
+    def stats(self) -> ChatModelPoolStats:
+        return {
+            "size": len(self.models),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "requests": self.requests,
+            "connections": self.connections,
+            "tls_handshakes": self.tls_handshakes,
+            "reused": max(0, self.requests - self.connections),
+        }
+
+
+chat_model_pool = ChatModelPool(CHAT_MODEL_POOL_SIZE)
+
 
 def get_chat_model(
     model: str, api_key: str, base_url: str, **kwargs: Any
 ) -> BaseChatModel:
-    model_provider = "deepseek" if "deepseek" in model else "openai"
-
-    chat_model = init_chat_model(
-        model=model,
-        model_provider=model_provider,
-        base_url=base_url,
-        api_key=api_key,
-        **kwargs,
-    )
-    return chat_model
+    return chat_model_pool.get(model, api_key, base_url, **kwargs)
+
+
+async def close_chat_models():
+    """
+    关闭模型客户端池的共享连接，应用关闭时调用
+    """
+    await chat_model_pool.close()
 
 
 if __name__ == "__main__":
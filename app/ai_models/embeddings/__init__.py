@@ -1,32 +1,168 @@
-import os
-import httpx
 import asyncio
+import numpy as np
+from app.utils.metrics import stage
+from .client import (
+    init_embedding_client,
+    get_embedding_client,
+    close_embedding_client,
+)
+from .backends import EmbeddingBackend, create_embedding_backend
+from .codec import Vector
+from .cache import cache_key, get_embedding_cache
+from .coalescer import EmbeddingCoalescer, coalesce_config
 
-bgem3_url = os.getenv("BGE_M3_URL", "http://127.0.0.1:4901/ai-model-service")
+__all__ = [
+    "aembed_documents",
+    "aembed_query",
+    "init_embedding_backend",
+    "get_embedding_backend",
+    "close_embedding_backend",
+    "init_embedding_client",
+    "get_embedding_client",
+    "close_embedding_client",
+    "get_embedding_cache",
+    "get_embedding_coalescer",
+]
 
+backend: EmbeddingBackend | None = None
+coalescer: EmbeddingCoalescer | None = None
 
-async def aembed_documents(texts: list[str]) -> list[list[float]]:
-    async with httpx.AsyncClient(base_url=bgem3_url) as client:
-        response = await client.post(
-            "/models/embedding/bge-m3/documents",
-            json={"texts": texts},
+
+async def init_embedding_backend() -> EmbeddingBackend:
+    """
+    初始化 Embedding 后端（由 EMBEDDING_BACKEND 选择），应用启动时调用一次
+    """
+    global backend
+    if backend is None:
+        backend = create_embedding_backend()
+        await backend.startup()
+    return backend
+
+
+def get_embedding_backend() -> EmbeddingBackend:
+    """
+    获取全局 Embedding 后端实例
+    """
+    if backend is None:
+        raise RuntimeError(
+            "Embedding backend not initialized. Call init_embedding_backend() first."
         )
-        response.raise_for_status()
-        embeddings = response.json()
-        return embeddings
+    return backend
+
+
+async def close_embedding_backend():
+    """
+    关闭 Embedding 后端
+    """
+    global backend, coalescer
+    if backend is not None:
+        await backend.shutdown()
+    backend = None
+    coalescer = None
 
 
-async def aembed_query(query: str) -> list[float]:
-    async with httpx.AsyncClient(base_url=bgem3_url) as client:
-        response = await client.post(
-            "/models/embedding/bge-m3/query",
-            json={"text": query},
+async def _coalesced_documents(texts: list[str]) -> Vector:
+    """
+    合并器的批量请求函数，结果同时写入缓存
+    """
+    model = get_embedding_backend()
+    with stage("embedding", "coalesced"):
+        embeddings = await model.embed_documents(texts)
+    cache = get_embedding_cache()
+    if cache is not None:
+        await cache.put_many(
+            [
+                (cache_key(model.model_name, text), embed)
+                for text, embed in zip(texts, embeddings)
+            ]
         )
-        response.raise_for_status()
-        embed = response.json()
-        return embed
+    return embeddings
+
+
+def get_embedding_coalescer() -> EmbeddingCoalescer | None:
+    """
+    获取全局请求合并器，EMBEDDING_COALESCE_WINDOW_MS=0 时返回 None
+    """
+    global coalescer
+    if coalescer is None:
+        window, max_batch = coalesce_config()
+        if window <= 0:
+            return None
+        coalescer = EmbeddingCoalescer(_coalesced_documents, window, max_batch)
+    return coalescer
+
+
+async def aembed_documents(texts: list[str], timeout: float | None = None) -> Vector:
+    """
+    批量文本向量化，返回 (n, d) float32 数组，timeout 为单次调用超时（秒），
+    不传则使用客户端默认值。
+    命中缓存的文本不再请求服务，只对未命中的文本发起一次批量请求
+    """
+    if not texts:
+        return np.empty((0, 0), dtype=np.float32)
+
+    model = get_embedding_backend()
+    cache = get_embedding_cache()
+    if cache is None:
+        with stage("embedding", "documents"):
+            return await model.embed_documents(texts, timeout)
+
+    keys = [cache_key(model.model_name, text) for text in texts]
+    cached: dict[str, Vector] = {}
+    missing: dict[str, int] = {}
+    for i, key in enumerate(keys):
+        if key in cached or key in missing:
+            continue
+        vector = await cache.get(key)
+        if vector is not None:
+            cached[key] = vector
+        else:
+            missing[key] = i
+
+    if missing:
+        with stage("embedding", "documents"):
+            embeddings = await model.embed_documents(
+                [texts[i] for i in missing.values()], timeout
+            )
+        await cache.put_many(list(zip(missing.keys(), embeddings)))
+        cached.update(zip(missing.keys(), embeddings))
+
+    return np.stack([cached[key] for key in keys])
+
+
+async def aembed_query(query: str, timeout: float | None = None) -> Vector:
+    """
+    查询文本向量化，返回 (d,) float32 数组，timeout 为单次调用超时（秒），
+    不传则使用客户端默认值。
+    未命中缓存时，启用合并器则与其他并发请求合并为一次批量请求
+    """
+    model = get_embedding_backend()
+    key = cache_key(model.model_name, query)
+    cache = get_embedding_cache()
+    if cache is not None:
+        vector = await cache.get(key)
+        if vector is not None:
+            return vector
+
+    merger = get_embedding_coalescer()
+    if merger is not None:
+        return await asyncio.wait_for(merger.embed(key, query), timeout)
+
+    with stage("embedding", "query"):
+        embed = await model.embed_query(query, timeout)
+    if cache is not None:
+        await cache.put(key, embed)
+    return embed
+
+
+async def _main():
+    await init_embedding_backend()
+    try:
+        res = await aembed_documents(["Hello, world!"])
+        print(res)
+    finally:
+        await close_embedding_backend()
 
 
 if __name__ == "__main__":
-    res = asyncio.run(aembed_documents(["Hello, world!"]))
-    print(res)
+    asyncio.run(_main())
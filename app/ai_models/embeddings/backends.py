@@ -0,0 +1,252 @@
+"""
+Embedding 后端
+http：请求外部 BGE-M3 服务（默认）；local：进程内加载 sentence-transformers 模型
+"""
+
+import os
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+import httpx
+from .codec import (
+    Vector,
+    VECTOR_MEDIA_TYPE,
+    VECTOR_SHAPE_HEADER,
+    as_vectors,
+    decode_base64,
+    decode_raw,
+    decode_shape,
+)
+from .client import (
+    EMBEDDING_MODEL,
+    init_embedding_client,
+    get_embedding_client,
+    close_embedding_client,
+)
+
+
+class EmbeddingBackend(ABC):
+    """
+    Embedding 后端接口，model_name 用于区分缓存键；
+    embed_documents 返回 (n, d) float32 数组，embed_query 返回 (d,) float32 数组
+    """
+
+    model_name: str = EMBEDDING_MODEL
+
+    async def startup(self):
+        """
+        应用启动时调用，用于建立连接、加载模型与预热
+        """
+
+    async def shutdown(self):
+        """
+        应用关闭时调用，释放资源
+        """
+
+    @abstractmethod
+    async def embed_documents(
+        self, texts: list[str], timeout: float | None = None
+    ) -> Vector: ...
+
+    @abstractmethod
+    async def embed_query(self, text: str, timeout: float | None = None) -> Vector: ...
+
+
+class HttpEmbeddingBackend(EmbeddingBackend):
+    """
+    通过共享的 httpx 连接池请求外部 Embedding 服务。
+    binary=True 时通过 Accept 头协商二进制 float32 响应，服务不支持时按 JSON 解析
+    """
+
+    def __init__(self, binary: bool = True):
+        self.binary = binary
+        self.headers = (
+            {"Accept": f"{VECTOR_MEDIA_TYPE}, application/json;q=0.9"} if binary else {}
+        )
+
+    @staticmethod
+    def _decode(response: httpx.Response) -> Vector:
+        content_type = response.headers.get("content-type", "")
+        if content_type.startswith(VECTOR_MEDIA_TYPE):
+            return decode_raw(
+                response.content,
+                decode_shape(response.headers[VECTOR_SHAPE_HEADER]),
+            )
+        data = response.json()
+        if isinstance(data, dict) and "data" in data and "shape" in data:
+            return decode_base64(data)  # pyright: ignore[reportArgumentType]
+        return as_vectors(data)
+
+    async def startup(self):
+        await init_embedding_client()
+
+    async def shutdown(self):
+        await close_embedding_client()
+
+    async def embed_documents(
+        self, texts: list[str], timeout: float | None = None
+    ) -> Vector:
+        client = get_embedding_client()
+        response = await client.post(
+            f"/models/embedding/{EMBEDDING_MODEL}/documents",
+            json={"texts": texts},
+            headers=self.headers,
+            timeout=timeout if timeout is not None else client.timeout,
+        )
+        response.raise_for_status()
+        return self._decode(response).reshape(len(texts), -1)
+
+    async def embed_query(self, text: str, timeout: float | None = None) -> Vector:
+        client = get_embedding_client()
+        response = await client.post(
+            f"/models/embedding/{EMBEDDING_MODEL}/query",
+            json={"text": text},
+            headers=self.headers,
+            timeout=timeout if timeout is not None else client.timeout,
+        )
+        response.raise_for_status()
+        return self._decode(response).reshape(-1)
+
+
+class LocalEmbeddingBackend(EmbeddingBackend):
+    """
+    进程内 CPU 推理后端，模型推理在独立线程中执行，不阻塞事件循环。
+    动态批处理：推理进行期间到达的请求会在下一次推理时合并为一批。
+    accel 可选：none / int8（torch 动态量化）/ onnx / onnx-int8
+    """
+
+    def __init__(
+        self,
+        model_name: str = "BAAI/bge-m3",
+        device: str = "cpu",
+        accel: str = "none",
+        max_batch: int = 32,
+    ):
+        self.model_name = model_name
+        self.device = device
+        self.accel = accel
+        self.max_batch = max(1, max_batch)
+        self.model: Any = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="embedding"
+        )
+        self._queue: asyncio.Queue[tuple[list[str], asyncio.Future[Any]]] | None = None
+        self._worker: asyncio.Task[None] | None = None
+
+    def _load_model(self) -> Any:
+        from sentence_transformers import SentenceTransformer
+
+        if self.accel == "onnx":
+            return SentenceTransformer(
+                self.model_name, device=self.device, backend="onnx"
+            )
+        if self.accel == "onnx-int8":
+            return SentenceTransformer(
+                self.model_name,
+                device=self.device,
+                backend="onnx",
+                model_kwargs={
+                    "file_name": os.getenv(
+                        "EMBEDDING_ONNX_FILE", "onnx/model_qint8_avx512_vnni.onnx"
+                    )
+                },
+            )
+
+        model = SentenceTransformer(self.model_name, device=self.device)
+        if self.accel == "int8":
+            import torch
+
+            model = torch.quantization.quantize_dynamic(
+                model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+        return model
+
+    def _encode(self, texts: list[str]) -> Vector:
+        embeddings = self.model.encode(
+            texts,
+            batch_size=self.max_batch,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+        )
+        return as_vectors(embeddings)
+
+    async def startup(self):
+        loop = asyncio.get_running_loop()
+        self.model = await loop.run_in_executor(self._executor, self._load_model)
+        # 预热，避免首个请求承担初始化开销
+        await loop.run_in_executor(self._executor, self._encode, ["warm up"])
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._batch_loop())
+        print(f"local embedding model {self.model_name} loaded ({self.accel})")
+
+    async def shutdown(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _batch_loop(self):
+        assert self._queue is not None
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await self._queue.get()]
+            size = len(items[0][0])
+            # 取出已到达的请求，直到达到批大小
+            while size < self.max_batch and not self._queue.empty():
+                item = self._queue.get_nowait()
+                items.append(item)
+                size += len(item[0])
+
+            texts = [text for item_texts, _ in items for text in item_texts]
+            try:
+                embeddings = await loop.run_in_executor(
+                    self._executor, self._encode, texts
+                )
+                start = 0
+                for item_texts, future in items:
+                    if not future.done():
+                        future.set_result(embeddings[start : start + len(item_texts)])
+                    start += len(item_texts)
+            except Exception as e:
+                logging.exception(e)
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+
+    async def embed_documents(
+        self, texts: list[str], timeout: float | None = None
+    ) -> Vector:
+        if self._queue is None:
+            raise RuntimeError("Local embedding backend not started.")
+        future: asyncio.Future[Any] = asyncio.get_running_loop().create_future()
+        await self._queue.put((texts, future))
+        return await asyncio.wait_for(future, timeout)
+
+    async def embed_query(self, text: str, timeout: float | None = None) -> Vector:
+        return (await self.embed_documents([text], timeout))[0]
+
+
+def create_embedding_backend() -> EmbeddingBackend:
+    """
+    根据 EMBEDDING_BACKEND 环境变量创建后端：http（默认）/ local
+    """
+    backend = os.getenv("EMBEDDING_BACKEND", "http").lower()
+    if backend == "local":
+        return LocalEmbeddingBackend(
+            model_name=os.getenv("EMBEDDING_LOCAL_MODEL", "BAAI/bge-m3"),
+            device=os.getenv("EMBEDDING_LOCAL_DEVICE", "cpu"),
+            accel=os.getenv("EMBEDDING_LOCAL_ACCEL", "none").lower(),
+            max_batch=int(os.getenv("EMBEDDING_LOCAL_MAX_BATCH", 32)),
+        )
+    if backend != "http":
+        raise ValueError(f"unknown EMBEDDING_BACKEND: {backend}")
+    return HttpEmbeddingBackend(
+        binary=os.getenv("EMBEDDING_BINARY_TRANSPORT", "true").lower()
+        in ("1", "true", "yes")
+    )
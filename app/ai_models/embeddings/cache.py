@@ -0,0 +1,240 @@
+"""
+Embedding 向量缓存
+以 模型名 + 规范化文本哈希 为键，
+内存 LRU 层 + 可选的磁盘持久层（memmap float32 + 索引文件）
+"""
+
+import os
+import asyncio
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import TypedDict
+import numpy as np
+from .codec import Vector
+
+
+class EmbeddingCacheStats(TypedDict):
+    hits: int
+    misses: int
+    evictions: int
+    memory_hits: int
+    disk_hits: int
+    memory_size: int
+    memory_max_size: int
+    disk_size: int
+
+
+def normalize_text(text: str) -> str:
+    """
+    文本规范化：NFC 统一编码形式，去除首尾空白并合并连续空白
+    """
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def cache_key(model: str, text: str) -> str:
+    """
+    缓存键：模型名 + 规范化文本的 sha256
+    """
+    digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+    return f"{model}:{digest}"
+
+
+def _freeze(vector: Vector) -> Vector:
+    """
+    入缓存前的规范化：批量结果的行视图会持有整批内存，复制为独立数组；
+    缓存中的数组被多个调用方共享，禁止原地修改
+    """
+    if vector.base is not None:
+        vector = vector.copy()
+    vector.flags.writeable = False
+    return vector
+
+
+class DiskVectorStore:
+    """
+    磁盘层：vectors.f32 为按行追加的 float32 矩阵，index.tsv 记录 键 -> 行号，
+    读取时使用 np.memmap 映射，进程重启后可继续使用
+    """
+
+    def __init__(self, path: str, dim: int, max_rows: int = 0):
+        self.path = path
+        self.dim = dim
+        self.max_rows = max_rows
+        self.vectors_path = os.path.join(path, "vectors.f32")
+        self.index_path = os.path.join(path, "index.tsv")
+        self.index: dict[str, int] = {}
+        self._mmap: np.memmap | None = None
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        """
+        读取索引，丢弃超出向量文件长度的行（上次写入中断时可能出现）
+        """
+        rows = 0
+        if os.path.exists(self.vectors_path):
+            rows = os.path.getsize(self.vectors_path) // (self.dim * 4)
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, encoding="utf-8") as f:
+            for line in f:
+                key, _, row = line.rstrip("\n").partition("\t")
+                if row.isdigit() and int(row) < rows:
+                    self.index[key] = int(row)
+
+    def _vectors(self) -> np.memmap | None:
+        rows = len(self.index)
+        if rows == 0:
+            return None
+        if self._mmap is None or self._mmap.shape[0] < rows:
+            self._mmap = np.memmap(
+                self.vectors_path, dtype="<f4", mode="r", shape=(rows, self.dim)
+            )
+        return self._mmap
+
+    def get(self, key: str) -> Vector | None:
+        # put 会追加行并替换 memmap，索引与映射都在锁内读取
+        with self._lock:
+            row = self.index.get(key)
+            if row is None:
+                return None
+            vectors = self._vectors()
+            if vectors is None:
+                return None
+            return np.array(vectors[row], dtype=np.float32)
+
+    def put(self, key: str, vector: Vector):
+        self.put_many([(key, vector)])
+
+    def put_many(self, items: list[tuple[str, Vector]]):
+        """
+        批量追加，每个文件只打开并写入一次
+        """
+        with self._lock:
+            rows: dict[str, int] = {}
+            chunks: list[bytes] = []
+            for key, vector in items:
+                if key in self.index or key in rows or vector.shape != (self.dim,):
+                    continue
+                if self.max_rows and len(self.index) + len(rows) >= self.max_rows:
+                    break
+                rows[key] = len(self.index) + len(rows)
+                chunks.append(vector.astype("<f4", copy=False).tobytes())
+            if not rows:
+                return
+            with open(self.vectors_path, "ab") as f:
+                f.write(b"".join(chunks))
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write("".join(f"{key}\t{row}\n" for key, row in rows.items()))
+            self.index.update(rows)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+
+class EmbeddingCache:
+    """
+    Embedding 缓存，内存层为有界 LRU，磁盘层可选；磁盘命中会回填内存层
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10000,
+        disk_path: str | None = None,
+        dim: int = 1024,
+        disk_max_rows: int = 0,
+    ):
+        self.max_size = max_size
+        self.memory: OrderedDict[str, Vector] = OrderedDict()
+        self.disk: DiskVectorStore | None = None
+        if disk_path:
+            try:
+                self.disk = DiskVectorStore(disk_path, dim, disk_max_rows)
+            except Exception as e:
+                logging.exception(e)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+
+    async def get(self, key: str) -> Vector | None:
+        vector = self.memory.get(key)
+        if vector is not None:
+            self.memory.move_to_end(key)
+            self.hits += 1
+            self.memory_hits += 1
+            return vector
+        if self.disk is not None:
+            vector = await asyncio.to_thread(self.disk.get, key)
+            if vector is not None:
+                vector = _freeze(vector)
+                self._put_memory(key, vector)
+                self.hits += 1
+                self.disk_hits += 1
+                return vector
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, vector: Vector):
+        await self.put_many([(key, vector)])
+
+    async def put_many(self, items: list[tuple[str, Vector]]):
+        """
+        写入内存层后在线程中追加磁盘层，文件写入不阻塞事件循环
+        """
+        items = [(key, _freeze(vector)) for key, vector in items]
+        for key, vector in items:
+            self._put_memory(key, vector)
+        if self.disk is not None:
+            try:
+                await asyncio.to_thread(self.disk.put_many, items)
+            except Exception as e:
+                logging.exception(e)
+
+    def _put_memory(self, key: str, vector: Vector):
+        if self.max_size <= 0:
+            return
+        self.memory[key] = vector
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_size:
+            self.memory.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> EmbeddingCacheStats:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "memory_size": len(self.memory),
+            "memory_max_size": self.max_size,
+            "disk_size": len(self.disk) if self.disk is not None else 0,
+        }
+
+
+embedding_cache: EmbeddingCache | None = None
+
+
+def get_embedding_cache() -> EmbeddingCache | None:
+    """
+    获取全局 Embedding 缓存，EMBEDDING_CACHE_SIZE=0 且未配置磁盘目录时不启用
+    """
+    global embedding_cache
+    if embedding_cache is None:
+        max_size = int(os.getenv("EMBEDDING_CACHE_SIZE", 10000))
+        disk_path = os.getenv("EMBEDDING_CACHE_DIR") or None
+        if max_size <= 0 and not disk_path:
+            return None
+        embedding_cache = EmbeddingCache(
+            max_size=max_size,
+            disk_path=disk_path,
+            dim=int(os.getenv("EMBEDDING_DIM", 1024)),
+            disk_max_rows=int(os.getenv("EMBEDDING_CACHE_DISK_MAX_ROWS", 0)),
+        )
+    return embedding_cache
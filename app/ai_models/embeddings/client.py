@@ -0,0 +1,89 @@
+"""
+Embedding 服务 HTTP 客户端
+提供长连接复用的 httpx.AsyncClient 的初始化、获取和关闭功能
+"""
+
+import os
+import logging
+import importlib.util
+import httpx
+
+bgem3_url = os.getenv("BGE_M3_URL", "http://127.0.0.1:4901/ai-model-service")
+# 模型名，同时作为服务路径与缓存键的一部分
+EMBEDDING_MODEL = "bge-m3"
+
+client: httpx.AsyncClient | None = None
+
+
+def _build_limits() -> httpx.Limits:
+    """
+    连接池配置，均可通过环境变量调整
+    """
+    return httpx.Limits(
+        max_connections=int(os.getenv("EMBEDDING_MAX_CONNECTIONS", 100)),
+        max_keepalive_connections=int(os.getenv("EMBEDDING_MAX_KEEPALIVE", 20)),
+        keepalive_expiry=float(os.getenv("EMBEDDING_KEEPALIVE_EXPIRY", 30)),
+    )
+
+
+def _build_timeout() -> httpx.Timeout:
+    """
+    默认超时配置，单次调用可通过 timeout 参数覆盖
+    """
+    return httpx.Timeout(
+        float(os.getenv("EMBEDDING_TIMEOUT", 30)),
+        connect=float(os.getenv("EMBEDDING_CONNECT_TIMEOUT", 5)),
+    )
+
+
+def _http2_enabled() -> bool:
+    """
+    是否启用 HTTP/2，需要安装 h2 依赖（httpx[http2]），缺失时降级为 HTTP/1.1
+    """
+    if os.getenv("EMBEDDING_HTTP2", "false").lower() not in ("1", "true", "yes"):
+        return False
+    if importlib.util.find_spec("h2") is None:
+        logging.warning("EMBEDDING_HTTP2 已启用，但未安装 h2，降级为 HTTP/1.1")
+        return False
+    return True
+
+
+async def init_embedding_client() -> httpx.AsyncClient:
+    """
+    初始化 Embedding HTTP 客户端，应用启动时调用一次
+    """
+    global client
+    if client is None:
+        client = httpx.AsyncClient(
+            base_url=bgem3_url,
+            limits=_build_limits(),
+            timeout=_build_timeout(),
+            http2=_http2_enabled(),
+        )
+    return client
+
+
+def get_embedding_client() -> httpx.AsyncClient:
+    """
+    获取全局 Embedding HTTP 客户端实例
+    """
+    if client is None:
+        raise RuntimeError(
+            "Embedding client not initialized. Call init_embedding_client() first."
+        )
+    return client
+
+
+async def close_embedding_client():
+    """
+    关闭 Embedding HTTP 客户端，释放连接池
+    """
+    global client
+    try:
+        if client is not None:
+            await client.aclose()
+    except Exception as e:
+        logging.exception(e)
+        raise e
+    finally:
+        client = None
@@ -0,0 +1,115 @@
+"""
+Embedding 请求合并器
+在很短的时间窗口内收集并发的单条文本请求，合并为一次批量请求后再分发结果；
+同一文本的并发请求共享同一个 in-flight future
+"""
+
+import os
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+BatchEmbedFn = Callable[[list[str]], Awaitable[Any]]
+
+
+class EmbeddingCoalescer:
+    """
+    请求合并器，window 为等待窗口（秒），max_batch 为单批最大文本数，达到即立刻发送
+    """
+
+    def __init__(
+        self,
+        embed_batch: BatchEmbedFn,
+        window: float = 0.002,
+        max_batch: int = 64,
+    ):
+        self.embed_batch = embed_batch
+        self.window = window
+        self.max_batch = max(1, max_batch)
+        # 等待发送的请求：key -> (text, future)
+        self._pending: dict[str, tuple[str, asyncio.Future[Any]]] = {}
+        # 已发送、尚未返回的请求，用于同一文本的去重
+        self._inflight: dict[str, asyncio.Future[Any]] = {}
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task[None]] = set()
+        self.batches = 0
+        self.requests = 0
+        self.shared = 0
+
+    async def embed(self, key: str, text: str) -> Any:
+        """
+        提交单条文本，返回其向量；key 相同的并发请求只会发送一次
+        """
+        self.requests += 1
+        future = self._inflight.get(key)
+        if future is None and key in self._pending:
+            future = self._pending[key][1]
+        if future is not None:
+            self.shared += 1
+        else:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending[key] = (text, future)
+            if len(self._pending) >= self.max_batch:
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.window, self._flush)
+        # shield：单个调用方取消不影响共享同一 future 的其他调用方
+        return await asyncio.shield(future)
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch = self._pending
+        self._pending = {}
+        for key, (_, future) in batch.items():
+            self._inflight[key] = future
+        self.batches += 1
+        task = asyncio.ensure_future(self._run_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: dict[str, tuple[str, asyncio.Future[Any]]]):
+        try:
+            vectors = await self.embed_batch([text for text, _ in batch.values()])
+            if len(vectors) != len(batch):
+                raise ValueError(
+                    f"embedding count mismatch: {len(vectors)} != {len(batch)}"
+                )
+            for (_, future), vector in zip(batch.values(), vectors):
+                if not future.done():
+                    future.set_result(vector)
+        except BaseException as e:
+            if not isinstance(e, asyncio.CancelledError):
+                logging.exception(e)
+            for _, future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+                    # 避免无人等待时出现 "exception was never retrieved"
+                    future.exception()
+        finally:
+            for key in batch:
+                self._inflight.pop(key, None)
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "shared": self.shared,
+            "avg_batch_size": (
+                (self.requests - self.shared) / self.batches if self.batches else 0
+            ),
+        }
+
+
+def coalesce_config() -> tuple[float, int]:
+    """
+    合并器配置：EMBEDDING_COALESCE_WINDOW_MS=0 时不启用合并
+    """
+    window_ms = float(os.getenv("EMBEDDING_COALESCE_WINDOW_MS", 2))
+    max_batch = int(os.getenv("EMBEDDING_COALESCE_MAX_BATCH", 64))
+    return window_ms / 1000, max_batch
@@ -0,0 +1,64 @@
+"""
+向量二进制编码
+raw：小端 float32 原始字节，形状通过响应头 X-Vector-Shape 传递；
+base64：JSON 包装的 base64 float32，{"dtype": "<f4", "shape": [n, d], "data": "..."}
+解码时使用 np.frombuffer，不逐个解析浮点数
+"""
+
+import base64
+from typing import Any, TypedDict
+import numpy as np
+import numpy.typing as npt
+
+Vector = npt.NDArray[np.float32]
+
+VECTOR_MEDIA_TYPE = "application/x-float32-vectors"
+VECTOR_SHAPE_HEADER = "X-Vector-Shape"
+VECTOR_DTYPE = "<f4"
+
+
+class Base64Vectors(TypedDict):
+    dtype: str
+    shape: list[int]
+    data: str
+
+
+def as_vectors(data: Any) -> Vector:
+    """
+    转为 float32 数组，已是小端 float32 时不复制
+    """
+    return np.asarray(data, dtype=VECTOR_DTYPE)
+
+
+def encode_shape(shape: tuple[int, ...]) -> str:
+    return ",".join(str(x) for x in shape)
+
+
+def decode_shape(value: str) -> tuple[int, ...]:
+    return tuple(int(x) for x in value.split(",") if x)
+
+
+def encode_raw(vectors: Vector) -> bytes:
+    return as_vectors(vectors).tobytes()
+
+
+def decode_raw(data: bytes, shape: tuple[int, ...]) -> Vector:
+    """
+    零拷贝解码，返回的数组只读，与 data 共享内存
+    """
+    return np.frombuffer(data, dtype=VECTOR_DTYPE).reshape(shape)
+
+
+def encode_base64(vectors: Vector) -> Base64Vectors:
+    vectors = as_vectors(vectors)
+    return {
+        "dtype": VECTOR_DTYPE,
+        "shape": list(vectors.shape),
+        "data": base64.b64encode(vectors.tobytes()).decode("ascii"),
+    }
+
+
+def decode_base64(payload: Base64Vectors) -> Vector:
+    if payload["dtype"] != VECTOR_DTYPE:
+        raise ValueError(f"unsupported vector dtype: {payload['dtype']}")
+    return decode_raw(base64.b64decode(payload["data"]), tuple(payload["shape"]))
@@ -0,0 +1,79 @@
+import asyncio
+import logging
+from langchain_core.prompts import ChatPromptTemplate
+from app.schema.chat import ChatParamsRollup, ChatParamsSummary, RcBaseMessage, RoleEnum
+from app.schema.summary import MergedSummary
+from app.modules.vector_db.rollup import RollupResult, rollup_tenant
+from .common import chat_base
+from .merge import to_jsonl, merge_coordinator
+
+# 各租户最近一次自动触发归并时的章节序号
+_triggered: dict[str, int] = {}
+_tasks: set[asyncio.Task] = set()
+
+
+async def chat_rollup(params: ChatParamsRollup) -> RollupResult:
+    """
+    章节归并：使用 llm 把早期的细粒度摘要按轮次归并为章节摘要，
+    与该租户的摘要合并互斥执行（两者都会删除摘要）
+    """
+
+    async def chapter_fn(summaries: list[MergedSummary]) -> str:
+        msg = ChatPromptTemplate.from_template(params.rollup_prompt).invoke(
+            {"summaries": to_jsonl(summaries)}
+        )
+        chat_params = params.model_copy()
+        chat_params.messages = [
+            RcBaseMessage(role=RoleEnum.user, content=msg.to_string(), turn=None)
+        ]
+        content = await chat_base(chat_params, "rollup")
+        if not isinstance(content, str):
+            raise TypeError("chapter content is not a string")
+        return content
+
+    async with merge_coordinator.lock(params.tenant_name):
+        return await rollup_tenant(
+            params.tenant_name,
+            chapter_fn,
+            chapter_turns=params.chapter_turns,
+            keep_turns=params.keep_turns,
+            min_items=params.min_items,
+            archive=params.archive,
+        )
+
+
+def maybe_rollup(params: ChatParamsSummary):
+    """
+    摘要完成后调用：当前轮次使新的章节完整结束时，在后台触发一次归并
+    """
+    if not params.rollup_chapter_turns or params.turn is None:
+        return
+    index = (params.turn - params.rollup_keep_turns) // params.rollup_chapter_turns
+    if index < 1 or _triggered.get(params.tenant_name, 0) >= index:
+        return
+    _triggered[params.tenant_name] = index
+
+    rollup_params = ChatParamsRollup(
+        model=params.model,
+        api_key=params.api_key,
+        base_url=params.base_url,
+        temperature=params.temperature,
+        max_tokens=params.max_tokens,
+        streaming=False,
+        tenant_name=params.tenant_name,
+        rollup_prompt=params.rollup_prompt,
+        chapter_turns=params.rollup_chapter_turns,
+        keep_turns=params.rollup_keep_turns,
+    )
+
+    async def run():
+        try:
+            await chat_rollup(rollup_params)
+        except Exception as e:
+            logging.exception(e)
+            # 失败后允许下一次摘要重新触发
+            _triggered.pop(params.tenant_name, None)
+
+    task = asyncio.create_task(run())
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
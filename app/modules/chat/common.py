@@ -1,8 +1,20 @@
-import json
 import logging
+from collections.abc import Mapping
+from typing import Any
 from langchain.messages import HumanMessage, SystemMessage, AIMessage
 from app.schema.chat import ChatParamsCommon, RcBaseMessage, RoleEnum
 from app.ai_models.chat import get_chat_model
+from app.utils.metrics import GenerationTimer
+from app.utils.tokens import estimate_tokens
+
+
+def output_tokens(usage_metadata: Mapping[str, Any] | None, texts: list[str]) -> int:
+    """
+    输出 token 数：优先使用模型返回的 usage，没有时按生成的文本估算
+    """
+    if usage_metadata and usage_metadata.get("output_tokens"):
+        return usage_metadata["output_tokens"]
+    return estimate_tokens("".join(texts))
 
 
 async def chat(params: ChatParamsCommon):
@@ -36,25 +48,33 @@ async def chat(params: ChatParamsCommon):
         for message in messages
     ]
 
+    timer = GenerationTimer("common")
+    texts: list[str] = []
+    usage_metadata = None
     try:
         if params.streaming:
             aiter = model.astream(input_data)
             async for item in aiter:
-                yield json.dumps({"content": item.content}, ensure_ascii=False)
+                if item.content:
+                    timer.token()
+                    texts.append(str(item.content))
+                usage_metadata = item.usage_metadata or usage_metadata
+                yield {"content": item.content}
         else:
             content = await model.ainvoke(input_data)
-            yield json.dumps({"content": content.content}, ensure_ascii=False)
+            texts.append(str(content.content))
+            usage_metadata = content.usage_metadata
+            yield {"content": content.content}
+        timer.finish(output_tokens(usage_metadata, texts))
     except Exception as e:
         logging.exception(e)
         msg = repr(e)
-        yield json.dumps(
-            {"content": f"网络错误，请稍后重试。error: {msg}"}, ensure_ascii=False
-        )
+        yield {"content": f"网络错误，请稍后重试。error: {msg}"}
 
 
-async def chat_base(params: ChatParamsCommon):
+async def chat_base(params: ChatParamsCommon, endpoint: str = "base"):
     """
-    基础的聊天接口，用于调用LLM，不支持流式处理
+    基础的聊天接口，用于调用LLM，不支持流式处理；endpoint 为指标中区分调用方的标签
     """
     model = get_chat_model(
         model=params.model,
@@ -82,7 +102,9 @@ async def chat_base(params: ChatParamsCommon):
         for message in messages
     ]
 
+    timer = GenerationTimer(endpoint)
     content = await model.ainvoke(input_data)
+    timer.finish(output_tokens(content.usage_metadata, [str(content.content)]))
 
     print("summary", content)
 
@@ -0,0 +1,138 @@
+"""
+上下文裁剪
+按 token 预算打包对话消息：最近 keep_recent_turns 轮始终保留，没有轮次的消息（设定等）始终保留，
+其余旧消息按轮次从新到旧放入剩余预算（尚未被摘要覆盖的轮次因此优先），
+某一轮放不下后更早的轮次都被省略，并在保留的消息前插入一条省略说明（计入预算）
+"""
+
+from typing import TypedDict
+from app.schema.chat import ChatParamsCommon, RcBaseMessage, RoleEnum
+from app.utils.tokens import MESSAGE_OVERHEAD, count_tokens
+
+
+class ContextPackReport(TypedDict):
+    budget: int
+    input_tokens: int
+    packed_tokens: int
+    reserved_tokens: int
+    dropped_messages: int
+    dropped_tokens: int
+    dropped_turns: list[int]
+    covered_dropped: int
+    over_budget: bool
+
+
+def message_tokens(message: RcBaseMessage) -> int:
+    return count_tokens(message.content) + MESSAGE_OVERHEAD
+
+
+def _omission_note(messages: list[RcBaseMessage], dropped: list[int]) -> RcBaseMessage:
+    turns = [turn for i in dropped if (turn := messages[i].turn) is not None]
+    span = f"第 {min(turns)}-{max(turns)} 轮中的 " if turns else ""
+    return RcBaseMessage(
+        role=RoleEnum.user,
+        content=f"[已省略{span}{len(dropped)} 条较早消息，相关内容可参考记忆摘要]",
+        turn=None,
+    )
+
+
+def pack_messages(
+    messages: list[RcBaseMessage],
+    budget: int,
+    reserved_tokens: int = 0,
+    keep_recent_turns: int = 4,
+    covered_turn: int | None = None,
+) -> tuple[list[RcBaseMessage], ContextPackReport]:
+    """
+    budget 为消息可用的总 token 数，reserved_tokens 为预留给系统提示词、指令与检索记忆的部分，
+    covered_turn 为已被摘要覆盖的最大轮次（摘要水位线）；返回保留的消息（保持原顺序）与裁剪报告
+    """
+    tokens = [message_tokens(message) for message in messages]
+    input_tokens = sum(tokens)
+    turns = sorted({m.turn for m in messages if m.turn is not None}, reverse=True)
+    recent = set(turns[:keep_recent_turns])
+
+    keep = [m.turn is None or m.turn in recent for m in messages]
+    used = sum(t for t, k in zip(tokens, keep) if k)
+    available = budget - reserved_tokens
+
+    # 旧消息按轮次从新到旧依次放入，同一轮的消息一起取舍；未被摘要覆盖的轮次都比水位线新，
+    # 因此先于已覆盖的轮次放入。某一轮放不下后不再放入更早的轮次，保留的对话始终连续
+    older: dict[int, list[int]] = {}
+    for i, m in enumerate(messages):
+        if not keep[i] and m.turn is not None:
+            older.setdefault(m.turn, []).append(i)
+    added: list[int] = []
+    for turn in sorted(older, reverse=True):
+        cost = sum(tokens[i] for i in older[turn])
+        if used + cost > available:
+            break
+        used += cost
+        added.append(turn)
+        for i in older[turn]:
+            keep[i] = True
+
+    # 省略说明同样计入预算，放不下时依次退回最早放入的旧轮次
+    note: RcBaseMessage | None = None
+    while True:
+        dropped = [i for i, k in enumerate(keep) if not k]
+        if not dropped:
+            break
+        note = _omission_note(messages, dropped)
+        if used + message_tokens(note) <= available or not added:
+            break
+        turn = added.pop()
+        for i in older[turn]:
+            keep[i] = False
+            used -= tokens[i]
+
+    dropped_turns = sorted(
+        {turn for i in dropped if (turn := messages[i].turn) is not None}
+    )
+    packed = [m for m, k in zip(messages, keep) if k]
+    if dropped and note is not None:
+        packed = [note] + packed
+        used += message_tokens(note)
+
+    report: ContextPackReport = {
+        "budget": budget,
+        "input_tokens": input_tokens,
+        "packed_tokens": used,
+        "reserved_tokens": reserved_tokens,
+        "dropped_messages": len(dropped),
+        "dropped_tokens": sum(tokens[i] for i in dropped),
+        "dropped_turns": dropped_turns,
+        "covered_dropped": sum(
+            1
+            for i in dropped
+            if covered_turn is not None and (messages[i].turn or 0) <= covered_turn
+        ),
+        "over_budget": used > available,
+    }
+    return packed, report
+
+
+def pack_params(
+    params: ChatParamsCommon,
+    prompts: list[str] | None = None,
+    reserved_tokens: int = 0,
+    covered_turn: int | None = None,
+) -> ContextPackReport | None:
+    """
+    按 params.context_budget 裁剪 params.messages（原地替换），未设置预算时不处理；
+    prompts 为随消息一起发送的提示词（指令、摘要提示词等），与系统提示词一起计入预留
+    """
+    if params.context_budget is None:
+        return None
+    fixed = [params.sys_prompt] + [p for p in prompts or [] if p]
+    messages = [m for m in params.messages if m.role != RoleEnum.system]
+    params.messages, report = pack_messages(
+        messages,
+        params.context_budget,
+        reserved_tokens + sum(count_tokens(p) + MESSAGE_OVERHEAD for p in fixed),
+        params.keep_recent_turns,
+        covered_turn,
+    )
+    if report["dropped_messages"]:
+        print(f"context packed: {report}")
+    return report
@@ -0,0 +1,276 @@
+"""
+摘要任务队列
+提交摘要任务后立即返回任务 id，由固定数量的 worker 并发执行 chat_summarize；
+模型服务的临时错误（连接失败、超时、限流、5xx）按指数退避重试，
+开始写入（saving）之后的失败不重试：写入不是幂等的，重试会再次调用模型并写入重复的摘要；
+任务状态与结果可查询，进度事件可通过 SSE 订阅
+"""
+
+import os
+import time
+import uuid
+import random
+import asyncio
+import logging
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import Any
+import httpx
+import openai
+from app.schema.chat import ChatParamsSummary
+from app.schema.job import JobEvent, JobInfo, JobStatusEnum
+from .summary import ProgressFn, chat_summarize
+
+RunFn = Callable[[ChatParamsSummary, ProgressFn], Awaitable[Any]]
+
+# 可重试的临时错误
+TRANSIENT_ERRORS: tuple[type[BaseException], ...] = (
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+    httpx.TransportError,
+    TimeoutError,
+)
+# 进入这些阶段后已经开始写入摘要库，失败时不再重试
+WRITE_STAGES = ("saving",)
+
+FINISHED = (JobStatusEnum.succeeded, JobStatusEnum.failed)
+
+
+class SummaryJob:
+    def __init__(self, params: ChatParamsSummary):
+        self.job_id = uuid.uuid4().hex
+        self.params = params
+        self.status = JobStatusEnum.queued
+        self.stage = "queued"
+        self.attempts = 0
+        self.created_at = time.time()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self.result: Any | None = None
+        self.error: str | None = None
+        self.events: list[JobEvent] = []
+        self._changed = asyncio.Event()
+        self.emit(JobStatusEnum.queued, "queued")
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    def emit(self, status: JobStatusEnum, stage: str, error: str | None = None):
+        self.status = status
+        self.stage = stage
+        self.events.append(
+            {
+                "status": status,
+                "stage": stage,
+                "attempt": self.attempts,
+                "time": time.time(),
+                "error": error,
+            }
+        )
+        # 唤醒等待中的订阅方，并为下一次变更换新的事件
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def progress(self, stage: str):
+        self.emit(JobStatusEnum.running, stage)
+
+    async def wait_changed(self):
+        await self._changed.wait()
+
+    def info(self) -> JobInfo:
+        return {
+            "job_id": self.job_id,
+            "tenant_name": self.params.tenant_name,
+            "status": self.status,
+            "stage": self.stage,
+            "attempts": self.attempts,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class SummaryJobQueue:
+    """
+    concurrency 为同时执行的任务数，max_queued 为排队上限（超出时提交失败），
+    max_retries 为临时错误的最大重试次数，重试间隔 backoff * 2^(n-1)（上限 backoff_max，
+    带随机抖动）；已结束的任务保留 ttl 秒，最多保留 max_jobs 个
+    """
+
+    def __init__(
+        self,
+        run_fn: RunFn = chat_summarize,
+        concurrency: int = 4,
+        max_queued: int = 100,
+        max_retries: int = 3,
+        backoff: float = 1.0,
+        backoff_max: float = 30.0,
+        ttl: float = 3600,
+        max_jobs: int = 1000,
+    ):
+        self.run_fn = run_fn
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.ttl = ttl
+        self.max_jobs = max_jobs
+        self.jobs: OrderedDict[str, SummaryJob] = OrderedDict()
+        self.queue: asyncio.Queue[SummaryJob] = asyncio.Queue(max_queued)
+        self.closed = False
+        self._workers = [
+            asyncio.create_task(self._worker()) for _ in range(max(1, concurrency))
+        ]
+        self.retries = 0
+
+    def submit(self, params: ChatParamsSummary) -> SummaryJob:
+        """
+        提交任务，队列已满时抛出 asyncio.QueueFull
+        """
+        if self.closed:
+            raise RuntimeError("summary job queue is closed")
+        self._prune()
+        job = SummaryJob(params)
+        self.queue.put_nowait(job)
+        self.jobs[job.job_id] = job
+        return job
+
+    def get(self, job_id: str) -> SummaryJob | None:
+        return self.jobs.get(job_id)
+
+    async def events(self, job_id: str) -> AsyncIterator[JobEvent]:
+        """
+        先输出已有的事件，再持续输出新事件，任务结束后结束
+        """
+        job = self.jobs[job_id]
+        index = 0
+        while True:
+            while index < len(job.events):
+                yield job.events[index]
+                index += 1
+            if job.finished:
+                return
+            await job.wait_changed()
+
+    def _prune(self):
+        deadline = time.time() - self.ttl
+        for job_id, job in list(self.jobs.items()):
+            expired = job.finished_at is not None and job.finished_at < deadline
+            if expired or (len(self.jobs) >= self.max_jobs and job.finished):
+                del self.jobs[job_id]
+
+    async def _worker(self):
+        while True:
+            job = await self.queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self.queue.task_done()
+
+    def _delay(self, attempt: int) -> float:
+        delay = min(self.backoff_max, self.backoff * 2 ** (attempt - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _run(self, job: SummaryJob):
+        job.started_at = time.time()
+        while True:
+            job.attempts += 1
+            job.emit(JobStatusEnum.running, "started")
+            try:
+                # chat_summarize 会修改参数，每次尝试使用副本
+                params = job.params.model_copy(deep=True)
+                job.result = await self.run_fn(params, job.progress)
+                job.finished_at = time.time()
+                job.emit(JobStatusEnum.succeeded, "done")
+                return
+            except asyncio.CancelledError:
+                job.error = "cancelled"
+                job.finished_at = time.time()
+                job.emit(JobStatusEnum.failed, job.stage, job.error)
+                raise
+            except Exception as e:
+                if (
+                    job.attempts <= self.max_retries
+                    and isinstance(e, TRANSIENT_ERRORS)
+                    and job.stage not in WRITE_STAGES
+                ):
+                    self.retries += 1
+                    job.emit(JobStatusEnum.retrying, job.stage, repr(e))
+                    await asyncio.sleep(self._delay(job.attempts))
+                    continue
+                logging.exception(e)
+                job.error = str(e)
+                job.finished_at = time.time()
+                job.emit(JobStatusEnum.failed, job.stage, job.error)
+                return
+
+    async def close(self, timeout: float = 30):
+        """
+        停止接收任务，等待已提交的任务最多 timeout 秒，未完成的任务取消并标记为失败
+        """
+        self.closed = True
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except TimeoutError:
+            pass
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        for job in self.jobs.values():
+            if not job.finished:
+                job.error = "service shutdown"
+                job.finished_at = time.time()
+                job.emit(JobStatusEnum.failed, job.stage, job.error)
+
+    def stats(self):
+        counts = {status.value: 0 for status in JobStatusEnum}
+        for job in self.jobs.values():
+            counts[job.status.value] += 1
+        return {
+            "jobs": counts,
+            "queue_size": self.queue.qsize(),
+            "max_queued": self.queue.maxsize,
+            "workers": len(self._workers),
+            "retries": self.retries,
+        }
+
+
+summary_jobs: SummaryJobQueue | None = None
+
+
+def init_summary_jobs() -> SummaryJobQueue:
+    """
+    初始化摘要任务队列，应用启动时调用一次
+    """
+    global summary_jobs
+    if summary_jobs is None:
+        summary_jobs = SummaryJobQueue(
+            concurrency=int(os.getenv("SUMMARY_JOB_CONCURRENCY", 4)),
+            max_queued=int(os.getenv("SUMMARY_JOB_QUEUE_SIZE", 100)),
+            max_retries=int(os.getenv("SUMMARY_JOB_MAX_RETRIES", 3)),
+            backoff=float(os.getenv("SUMMARY_JOB_BACKOFF", 1.0)),
+            backoff_max=float(os.getenv("SUMMARY_JOB_BACKOFF_MAX", 30)),
+            ttl=float(os.getenv("SUMMARY_JOB_TTL", 3600)),
+        )
+    return summary_jobs
+
+
+def get_summary_jobs() -> SummaryJobQueue:
+    if summary_jobs is None:
+        raise RuntimeError(
+            "Summary job queue not initialized. Call init_summary_jobs() first."
+        )
+    return summary_jobs
+
+
+async def close_summary_jobs():
+    """
+    关闭摘要任务队列，等待进行中的任务完成（最多 SUMMARY_JOB_SHUTDOWN_TIMEOUT 秒）
+    """
+    global summary_jobs
+    if summary_jobs is not None:
+        await summary_jobs.close(float(os.getenv("SUMMARY_JOB_SHUTDOWN_TIMEOUT", 30)))
+        summary_jobs = None
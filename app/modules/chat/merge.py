@@ -0,0 +1,247 @@
+"""
+摘要合并协调器
+同一租户的合并按批串行执行（后一批在前一批写入与删除完成后才搜索相似摘要），
+不同租户并行；同一租户排队中的多条新摘要合并为一批：
+相似摘要有交集的新摘要只调用一次 llm 合并，历史摘要也只删除一次
+"""
+
+import os
+import json
+import asyncio
+import logging
+from collections.abc import Callable
+from typing import Any
+from uuid import UUID
+from langchain_core.prompts import ChatPromptTemplate
+from app.schema.chat import ChatParamsSummary, RcBaseMessage, RoleEnum
+from app.schema.summary import MergedSummary, SummaryTypeEnum
+from app.modules.vector_db.summary_repo import get_summary_repo
+from app.modules.vector_db.ingest import get_ingest_queue
+from app.utils.metrics import stage
+from .common import chat_base
+
+ProgressFn = Callable[[str], None]
+
+
+class _MergeItem:
+    def __init__(
+        self, params: ChatParamsSummary, new_summary: str, progress: ProgressFn
+    ):
+        self.params = params
+        self.new_summary = new_summary
+        self.progress = progress
+        self.future: asyncio.Future[dict[str, Any]] = (
+            asyncio.get_running_loop().create_future()
+        )
+
+    def key(self):
+        # 只有模型配置与合并提示词一致的摘要才能放进同一次 llm 调用
+        p = self.params
+        return (
+            p.model,
+            p.base_url,
+            p.api_key,
+            p.summary_merge_prompt,
+            p.summary_merge_system_prompt,
+        )
+
+
+def to_jsonl(items: list[MergedSummary]) -> str:
+    return "\n".join(json.dumps(x, ensure_ascii=False) for x in items)
+
+
+class MergeCoordinator:
+    """
+    max_batch 为同一租户单批合并的最大新摘要数
+    """
+
+    def __init__(self, max_batch: int = 16):
+        self.max_batch = max(1, max_batch)
+        self.pending: dict[str, list[_MergeItem]] = {}
+        self.tasks: dict[str, asyncio.Task] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self.submitted = 0
+        self.batches = 0
+        self.llm_calls = 0
+        self.coalesced = 0
+
+    async def submit(
+        self, params: ChatParamsSummary, new_summary: str, progress: ProgressFn
+    ) -> dict[str, Any]:
+        """
+        提交一条新摘要，等待其所在批次合并写入完成，返回 {"id", "content", "coalesced"}
+        """
+        item = _MergeItem(params, new_summary, progress)
+        tenant_name = params.tenant_name
+        self.pending.setdefault(tenant_name, []).append(item)
+        self.submitted += 1
+        if tenant_name not in self.tasks:
+            self.tasks[tenant_name] = asyncio.create_task(self._drain(tenant_name))
+        return await item.future
+
+    def lock(self, tenant_name: str) -> asyncio.Lock:
+        """
+        租户的合并锁，其他会删除该租户摘要的操作（如章节归并）也需持有
+        """
+        lock = self._locks.get(tenant_name)
+        if lock is None:
+            lock = self._locks[tenant_name] = asyncio.Lock()
+        return lock
+
+    async def _drain(self, tenant_name: str):
+        try:
+            while self.pending.get(tenant_name):
+                pending = self.pending[tenant_name]
+                key = pending[0].key()
+                batch = [item for item in pending if item.key() == key]
+                batch = batch[: self.max_batch]
+                self.pending[tenant_name] = [x for x in pending if x not in batch]
+                try:
+                    async with self.lock(tenant_name):
+                        await self._process(tenant_name, batch)
+                except Exception as e:
+                    logging.exception(e)
+                    for item in batch:
+                        self._resolve(item, e)
+        finally:
+            self.pending.pop(tenant_name, None)
+            self.tasks.pop(tenant_name, None)
+
+    async def _process(self, tenant_name: str, batch: list[_MergeItem]):
+        self.batches += 1
+        repo = get_summary_repo(tenant_name)
+
+        async def search(item: _MergeItem) -> dict[UUID, MergedSummary]:
+            item.progress("searching")
+            res = await repo.similarity_search(
+                item.new_summary,
+                distance=item.params.summary_distance,
+                top_k=item.params.summary_top_k,
+            )
+            return {
+                obj.uuid: {
+                    "summary": obj.properties["summary"],
+                    "turn": obj.properties["turn"],
+                }
+                for obj in res.objects
+                # 章节摘要由归并维护，不参与合并（合并会把它变成普通摘要并删除原章节）
+                if obj.properties.get("type") != SummaryTypeEnum.chapter.value
+            }
+
+        results = await asyncio.gather(*(search(item) for item in batch))
+
+        # 按相似摘要的交集分组：命中同一条历史摘要的新摘要必须一起合并
+        groups: list[tuple[list[_MergeItem], dict[UUID, MergedSummary]]] = []
+        for item, similar in zip(batch, results):
+            items, merged = [item], dict(similar)
+            if similar:
+                for group in [g for g in groups if g[1].keys() & similar.keys()]:
+                    groups.remove(group)
+                    items = group[0] + items
+                    merged = group[1] | merged
+            groups.append((items, merged))
+
+        await asyncio.gather(*(self._merge(tenant_name, *g) for g in groups))
+
+    async def _merge(
+        self,
+        tenant_name: str,
+        items: list[_MergeItem],
+        similar: dict[UUID, MergedSummary],
+    ):
+        try:
+            turns = [item.params.turn for item in items if item.params.turn is not None]
+            turn = max(turns) if turns else None
+            merged_summary: list[MergedSummary] | None = None
+            content = items[0].new_summary
+
+            if similar:
+                new_summaries: list[MergedSummary] = [
+                    {"summary": item.new_summary, "turn": item.params.turn}
+                    for item in items
+                ]
+                params = items[0].params.model_copy()
+                # 获取提示词模板，注入相似摘要列表与新摘要（多条时按 JSONL 拼接）
+                prompt_template = ChatPromptTemplate.from_template(
+                    params.summary_merge_prompt
+                )
+                msg = prompt_template.invoke(
+                    {
+                        "summaries": to_jsonl(list(similar.values())),
+                        "new_summary": content
+                        if len(items) == 1
+                        else to_jsonl(new_summaries),
+                    }
+                )
+                print(msg.to_string())
+                # 合并后的摘要列表，用于持久化保存至当前摘要信息中
+                merged_summary = list(similar.values()) + new_summaries
+                params.messages = [
+                    RcBaseMessage(
+                        role=RoleEnum.user, content=msg.to_string(), turn=turn
+                    ),
+                ]
+                if params.summary_merge_system_prompt:
+                    params.messages = [
+                        RcBaseMessage(
+                            role=RoleEnum.system,
+                            content=params.summary_merge_system_prompt,
+                            turn=None,
+                        ),
+                    ] + params.messages
+                for item in items:
+                    item.progress("merging")
+                self.llm_calls += 1
+                self.coalesced += len(items) - 1
+                with stage("summary_merge", "llm"):
+                    content = await chat_base(params, "summary_merge")
+
+            for item in items:
+                item.progress("saving")
+            handle = await get_ingest_queue().submit(
+                tenant_name,
+                str(content),
+                turn=turn,
+                merged_summary=merged_summary,
+            )
+            id = await handle
+
+            # 删除合并的摘要
+            if similar:
+                await get_summary_repo(tenant_name).delete_summary_by_uuids(
+                    list(similar.keys())
+                )
+
+            for item in items:
+                self._resolve(
+                    item,
+                    {"id": str(id), "content": content, "coalesced": len(items)},
+                )
+        except Exception as e:
+            logging.exception(e)
+            for item in items:
+                self._resolve(item, e)
+
+    def _resolve(self, item: _MergeItem, result):
+        # 提交方被取消时句柄已结束
+        if item.future.done():
+            return
+        if isinstance(result, BaseException):
+            item.future.set_exception(result)
+        else:
+            item.future.set_result(result)
+
+    def stats(self):
+        return {
+            "submitted": self.submitted,
+            "batches": self.batches,
+            "llm_calls": self.llm_calls,
+            "coalesced": self.coalesced,
+            "active_tenants": len(self.tasks),
+            "pending": sum(len(items) for items in self.pending.values()),
+        }
+
+
+merge_coordinator = MergeCoordinator(
+    max_batch=int(os.getenv("SUMMARY_MERGE_MAX_BATCH", 16)),
+)
@@ -1,10 +1,29 @@
+import json
+import asyncio
 import logging
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from sse_starlette import EventSourceResponse
-from app.schema.chat import ChatParamsCommon, ChatParamsWriter, ChatParamsSummary
+from app.schema.chat import (
+    ChatParamsCommon,
+    ChatParamsWriter,
+    ChatParamsSummary,
+    ChatParamsRollup,
+)
 from app.modules.chat.common import chat, chat_base
-from app.modules.chat.writer import WriterAgent
+from app.modules.chat.writer import WriterAgent, writer_agent_cache
 from app.modules.chat.summary import chat_summarize
+from app.modules.chat import jobs
+from app.modules.chat.jobs import get_summary_jobs
+from app.modules.chat.merge import merge_coordinator
+from app.ai_models.chat import chat_model_pool
+from app.modules.chat.chapter import chat_rollup
+from app.modules.chat.watermark import summary_watermarks
+from app.modules.chat.sse import (
+    DEFAULT_FLUSH_POLICY,
+    FLUSH_HEADER,
+    FlushPolicy,
+    sse_frames,
+)
 
 router = APIRouter()
 
@@ -12,9 +31,10 @@ router = APIRouter()
 @router.post(
     "/common", summary="通用的模型对话接口，目前支持 OpenAI 与 DeepSeek 提供的模型"
 )
-async def chat_common_api(data: ChatParamsCommon):
-    aiter = chat(data)
-    return EventSourceResponse(aiter)
+async def chat_common_api(data: ChatParamsCommon, request: Request):
+    policy = FlushPolicy.parse(request.headers.get(FLUSH_HEADER), DEFAULT_FLUSH_POLICY)
+    aiter = sse_frames(chat(data), policy)
+    return EventSourceResponse(aiter, headers={FLUSH_HEADER: policy.header()})
 
 
 @router.post(
@@ -33,10 +53,11 @@ async def chat_base_api(data: ChatParamsCommon):
 
 
 @router.post("/writer-agent", summary="剧情写作接口（使用agent）")
-async def chat_writer_agent_api(data: ChatParamsWriter):
+async def chat_writer_agent_api(data: ChatParamsWriter, request: Request):
+    policy = FlushPolicy.parse(request.headers.get(FLUSH_HEADER), DEFAULT_FLUSH_POLICY)
     agent = WriterAgent(data)
-    aiter = agent.run()
-    return EventSourceResponse(aiter)
+    aiter = sse_frames(agent.run(), policy)
+    return EventSourceResponse(aiter, headers={FLUSH_HEADER: policy.header()})
 
 
 @router.post("/summary", summary="剧情摘要接口")
@@ -47,3 +68,76 @@ async def chat_summary_api(data: ChatParamsSummary):
     except Exception as e:
         logging.exception(e)
         raise HTTPException(status_code=500, detail=f"剧情摘要失败: {str(e)}")
+
+
+@router.post("/summary/jobs", summary="提交异步剧情摘要任务，立即返回任务 id")
+async def chat_summary_job_submit_api(data: ChatParamsSummary):
+    try:
+        job = get_summary_jobs().submit(data)
+        return {"message": "摘要任务已提交", "data": job.info()}
+    except asyncio.QueueFull:
+        raise HTTPException(status_code=503, detail="摘要任务队列已满，请稍后重试")
+    except Exception as e:
+        logging.exception(e)
+        raise HTTPException(status_code=500, detail=f"提交摘要任务失败: {str(e)}")
+
+
+@router.get("/summary/jobs/{job_id}", summary="查询摘要任务的状态与结果")
+async def chat_summary_job_get_api(job_id: str):
+    job = get_summary_jobs().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"摘要任务 {job_id} 不存在")
+    return {"message": "success", "data": job.info()}
+
+
+@router.get("/summary/jobs/{job_id}/events", summary="订阅摘要任务的进度事件（SSE）")
+async def chat_summary_job_events_api(job_id: str):
+    jobs = get_summary_jobs()
+    if jobs.get(job_id) is None:
+        raise HTTPException(status_code=404, detail=f"摘要任务 {job_id} 不存在")
+
+    async def aiter():
+        async for event in jobs.events(job_id):
+            yield json.dumps(event, ensure_ascii=False)
+
+    return EventSourceResponse(aiter())
+
+
+@router.get("/summary/stats", summary="摘要任务队列、合并协调器与模型客户端池统计")
+async def chat_summary_stats_api():
+    return {
+        "message": "success",
+        "jobs": jobs.summary_jobs.stats() if jobs.summary_jobs else None,
+        "merge": merge_coordinator.stats(),
+        "chat_models": chat_model_pool.stats(),
+        "writer_agents": writer_agent_cache.stats(),
+    }
+
+
+@router.get("/summary/watermark/{tenant_name}", summary="查询租户的摘要水位线")
+async def chat_summary_watermark_get_api(tenant_name: str):
+    return {"message": "success", "data": summary_watermarks.get(tenant_name)}
+
+
+@router.delete(
+    "/summary/watermark/{tenant_name}", summary="重置租户的摘要水位线（下次从头摘要）"
+)
+async def chat_summary_watermark_delete_api(tenant_name: str):
+    try:
+        await summary_watermarks.forget(tenant_name)
+        return {"message": f"租户 {tenant_name} 的摘要水位线已重置"}
+    except Exception as e:
+        logging.exception(e)
+        raise HTTPException(status_code=500, detail=f"重置摘要水位线失败: {str(e)}")
+
+
+@router.post("/summary/rollup", summary="章节归并：把早期摘要按轮次归并为章节摘要")
+async def chat_summary_rollup_api(data: ChatParamsRollup):
+    try:
+        res = await chat_rollup(data)
+        return {"message": "章节归并成功", "data": res}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logging.exception(e)
+        raise HTTPException(status_code=500, detail=f"章节归并失败: {str(e)}")
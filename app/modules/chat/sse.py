@@ -0,0 +1,179 @@
+"""
+SSE 帧合并
+对话生成器逐个 token 产出 {"content", "thinking", ...} 帧，逐帧序列化与发送时开销集中在
+json.dumps、SSE 编码与 socket 写入上。合并层按流缓冲 content，
+在间隔（interval_ms）、字节数（max_bytes）到达或遇到其他帧（thinking、usage、docs 等）时一次发出；
+首个内容 token 与推理内容（thinking）不合并，立即发出；
+客户端通过请求头 X-Stream-Flush 协商策略，例如 "interval=50,bytes=1024" 或 "off"
+"""
+
+import os
+import json
+import time
+import asyncio
+from collections import deque
+from collections.abc import AsyncIterator
+from typing import Any
+
+FLUSH_HEADER = "X-Stream-Flush"
+# 可合并的文本字段，其余字段（thinking、usageMetadata、docs、context 等）出现时立即发出
+TEXT_KEYS = ("content",)
+# 待发送的帧达到该数量时上游暂停读取，等待发送方取走（背压）
+MAX_PENDING_FRAMES = 64
+
+
+class FlushPolicy:
+    """
+    interval_ms 为首个缓冲 token 到发出的最长等待时间，max_bytes 为缓冲的最大字节数；
+    interval_ms 为 0 时不合并（逐帧发出）
+    """
+
+    def __init__(self, interval_ms: int = 0, max_bytes: int = 1024):
+        self.interval_ms = min(max(interval_ms, 0), 1000)
+        self.max_bytes = min(max(max_bytes, 1), 65536)
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval_ms > 0
+
+    @classmethod
+    def parse(cls, value: str | None, default: "FlushPolicy") -> "FlushPolicy":
+        """
+        解析 "interval=50,bytes=1024"；"off" 表示不合并，无法解析的部分使用默认值
+        """
+        if not value:
+            return default
+        value = value.strip().lower()
+        if value in ("off", "none", "0"):
+            return cls(0, default.max_bytes)
+        interval_ms, max_bytes = default.interval_ms, default.max_bytes
+        for part in value.split(","):
+            name, _, raw = part.partition("=")
+            try:
+                if name.strip() == "interval":
+                    interval_ms = int(raw)
+                elif name.strip() == "bytes":
+                    max_bytes = int(raw)
+            except ValueError:
+                continue
+        return cls(interval_ms, max_bytes)
+
+    def header(self) -> str:
+        if not self.enabled:
+            return "off"
+        return f"interval={self.interval_ms},bytes={self.max_bytes}"
+
+
+DEFAULT_FLUSH_POLICY = FlushPolicy.parse(
+    os.getenv("SSE_FLUSH_POLICY"), FlushPolicy(0, 1024)
+)
+
+
+def _dumps(frame: dict[str, Any]) -> str:
+    return json.dumps(frame, ensure_ascii=False)
+
+
+def _is_text(frame: dict[str, Any]) -> bool:
+    """
+    只含可合并文本的帧；其他字段为空（None 或空字符串，如没有推理内容时的 thinking）时忽略
+    """
+    for key, value in frame.items():
+        if key in TEXT_KEYS:
+            if not isinstance(value, str):
+                return False
+        elif value is not None and value != "":
+            return False
+    return True
+
+
+async def sse_frames(
+    frames: AsyncIterator[dict[str, Any]], policy: FlushPolicy = DEFAULT_FLUSH_POLICY
+) -> AsyncIterator[str]:
+    """
+    把帧序列化为 SSE data（JSON 字符串），按 policy 合并相邻的文本帧
+    """
+    if not policy.enabled:
+        async for frame in frames:
+            yield _dumps(frame)
+        return
+
+    # 上游由单独的任务读取并写入缓冲，每个 token 只做一次追加；
+    # 发送方只在缓冲开始、需要立即发出或上游结束时被唤醒，按间隔计时发出。
+    # 待发送的帧超过 MAX_PENDING_FRAMES 时上游等待，慢客户端不会让缓冲无限增长
+    buffers: dict[str, list[str]] = {key: [] for key in TEXT_KEYS}
+    ready: deque[str] = deque()
+    wake = asyncio.Event()
+    drained = asyncio.Event()
+    state: dict[str, Any] = {"size": 0, "deadline": 0.0, "done": False, "first": True}
+
+    def take() -> str:
+        frame = {key: "".join(parts) for key, parts in buffers.items() if parts}
+        for parts in buffers.values():
+            parts.clear()
+        state["size"] = 0
+        return _dumps(frame)
+
+    async def push(data: str):
+        while len(ready) >= MAX_PENDING_FRAMES:
+            drained.clear()
+            await drained.wait()
+        ready.append(data)
+        wake.set()
+
+    async def produce():
+        # 上游的异常留在任务中，由发送方在发出剩余内容后 await 任务抛出
+        try:
+            async for frame in frames:
+                if not _is_text(frame):
+                    if state["size"]:
+                        await push(take())
+                    await push(_dumps(frame))
+                    continue
+                for key in TEXT_KEYS:
+                    text = frame.get(key)
+                    if text:
+                        if state["size"] == 0:
+                            state["deadline"] = (
+                                time.monotonic() + policy.interval_ms / 1000
+                            )
+                            wake.set()
+                        buffers[key].append(text)
+                        state["size"] += len(text.encode("utf-8"))
+                # 首个内容 token 立即发出，不增加首字延迟
+                if state["size"] >= policy.max_bytes or (
+                    state["first"] and state["size"]
+                ):
+                    state["first"] = False
+                    await push(take())
+        finally:
+            state["done"] = True
+            wake.set()
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            while ready:
+                yield ready.popleft()
+                drained.set()
+            if state["done"]:
+                if state["size"]:
+                    ready.append(take())
+                    continue
+                await producer
+                break
+            wake.clear()
+            remaining = state["deadline"] - time.monotonic()
+            if state["size"] and remaining <= 0:
+                ready.append(take())
+                continue
+            try:
+                async with asyncio.timeout(remaining if state["size"] else None):
+                    await wake.wait()
+            except TimeoutError:
+                pass
+    finally:
+        producer.cancel()
+        await asyncio.wait({producer})
+        if not producer.cancelled():
+            # 提前结束（客户端断开）时读取上游异常，避免未读取异常的告警
+            producer.exception()
@@ -1,117 +1,137 @@
-import json
-from uuid import UUID
-from langchain_core.prompts import ChatPromptTemplate
+from typing import Any
 from app.schema.chat import ChatParamsSummary, RcBaseMessage, RoleEnum
-from app.modules.vector_db.summary_repo import SummaryTenantRepo
+from app.modules.vector_db.ingest import get_ingest_queue
 from .common import chat_base
-from app.schema.summary import MergedSummary
+from app.utils.tokens import count_message_tokens
+from app.utils.metrics import stage
+from .merge import ProgressFn, merge_coordinator
+from .chapter import maybe_rollup
+from .watermark import summary_watermarks
+from .context import pack_params
 
 
-async def chat_summarize(params: ChatParamsSummary):
+def _no_progress(stage_name: str):
+    pass
+
+
+async def chat_summarize(
+    params: ChatParamsSummary, progress: ProgressFn = _no_progress
+):
     """
-    摘要函数，用于总结对话内容，并向量化到向量库中
+    摘要函数，用于总结对话内容，并向量化到向量库中；
+    progress 在进入各阶段时被调用（summarizing/searching/merging/saving）
     """
-    messages = params.messages + [
-        RcBaseMessage(
-            role=RoleEnum.user, content=params.summary_prompt, turn=params.turn
-        ),
-    ]
+    if params.incremental:
+        # 同一租户的增量摘要串行执行，避免并发请求读到同一条水位线
+        async with summary_watermarks.lock(params.tenant_name):
+            return await _summarize(params, progress)
+    return await _summarize(params, progress)
+
+
+def _count_tokens(params: ChatParamsSummary, messages: list[RcBaseMessage]) -> int:
+    # 与 chat_base 实际发送的内容一致：系统提示词 + 非 system 消息
+    return count_message_tokens(
+        [params.sys_prompt]
+        + [msg.content for msg in messages if msg.role != RoleEnum.system]
+    )
+
 
-    params.messages = messages
+async def _summarize(params: ChatParamsSummary, progress: ProgressFn):
+    prompt = RcBaseMessage(
+        role=RoleEnum.user, content=params.summary_prompt, turn=params.turn
+    )
+    original_messages = params.messages
+
+    watermark = summary_watermarks.get(params.tenant_name)
+    new_turn: int | None = None
+    if params.incremental:
+        last_turn = watermark["turn"] if watermark else None
+        # 没有轮次的消息（如设定类内容）无法判断是否已摘要，始终保留
+        new_messages = [
+            msg
+            for msg in params.messages
+            if msg.turn is None or last_turn is None or msg.turn > last_turn
+        ]
+        turns = [msg.turn for msg in new_messages if msg.turn is not None]
+        if not turns:
+            full_tokens = _count_tokens(params, original_messages + [prompt])
+            return {
+                "id": None,
+                "content": None,
+                "skipped": True,
+                "watermark": last_turn,
+                "tokens": {"full": full_tokens, "sent": 0, "saved": full_tokens},
+            }
+        new_turn = max(turns)
+        if watermark and params.rolling_context and watermark["context"]:
+            new_messages = [
+                RcBaseMessage(
+                    role=RoleEnum.user,
+                    content=f"此前的剧情摘要：\n{watermark['context']}",
+                    turn=None,
+                )
+            ] + new_messages
+        params.messages = new_messages
+
+    # 按 token 预算裁剪，已被摘要覆盖的旧轮次优先省略
+    report = pack_params(
+        params, [params.summary_prompt], 0, watermark["turn"] if watermark else None
+    )
 
-    content = await chat_base(params)
+    trimmed = params.incremental or bool(report and report["dropped_messages"])
+    params.messages = params.messages + [prompt]
+    sent_tokens = _count_tokens(params, params.messages)
+    # 没有被增量过滤或预算裁剪时，完整上下文就是发送的内容，不再重复计数
+    full_tokens = (
+        _count_tokens(params, original_messages + [prompt]) if trimmed else sent_tokens
+    )
 
-    if isinstance(content, str):
-        return await _update_summary(params, content)
-    else:
-        raise ValueError("summary content is not a string")
+    progress("summarizing")
+    content = await chat_base(params, "summary")
+
+    if not isinstance(content, str):
+        raise TypeError("summary content is not a string")
+
+    result = await _update_summary(params, content, progress)
+    maybe_rollup(params)
+    if new_turn is not None:
+        await summary_watermarks.advance(params.tenant_name, new_turn, content)
+        result["watermark"] = new_turn
+    result["tokens"] = {
+        "full": full_tokens,
+        "sent": sent_tokens,
+        "saved": full_tokens - sent_tokens,
+    }
+    if report:
+        result["context"] = report
+    return result
 
 
-async def _update_summary(params: ChatParamsSummary, new_summary: str):
+async def _update_summary(
+    params: ChatParamsSummary, new_summary: str, progress: ProgressFn = _no_progress
+) -> dict[str, Any]:
     # 更新摘要
     # 使用content做相似性搜索
     # 如果搜索出摘要，使用llm合并content与历史摘要
     # 如果搜索不出摘要，直接添加到摘要库中
-    repo = SummaryTenantRepo(params.tenant_name)
-
-    cur_summary = new_summary
-    merged_uuids: list[UUID] = []
-    merged_summary: list[MergedSummary] | None = None
-
     if params.update_summary:
         print("搜索相似摘要====================", params.summary_distance)
-        # 搜索相似摘要
-        res = await repo.similarity_search(
-            cur_summary,
-            distance=params.summary_distance,
-            top_k=params.summary_top_k,
-        )
-
-        # 存在相似摘要，则使用llm合并新摘要与历史摘要
-        if res.objects:
-            # 相似摘要列表
-            similarity_summaries: list[MergedSummary] = []
-
-            for item in res.objects:
-                merged_uuids.append(item.uuid)
-                similarity_summaries.append(
-                    {
-                        "summary": item.properties["summary"],
-                        "turn": item.properties["turn"],
-                    }
-                )
-
-            summaries_jsonl = _to_jsonl(similarity_summaries)
-            # 获取提示词模板
-            prompt_template = ChatPromptTemplate.from_template(
-                params.summary_merge_prompt
-            )
-            # 生成提示词，注入相似摘要列表与新摘要
-            msg = prompt_template.invoke(
-                {"summaries": summaries_jsonl, "new_summary": cur_summary}
-            )
-            print(msg.to_string())
-            # 合并后的摘要列表，用于持久化保存至当前摘要信息中
-            merged_summary = similarity_summaries + [
-                {
-                    "summary": cur_summary,
-                    "turn": params.turn,
-                }
-            ]
-            params.messages = [
-                RcBaseMessage(
-                    role=RoleEnum.user,
-                    content=msg.to_string(),
-                    turn=params.turn,
-                ),
-            ]
-            if params.summary_merge_system_prompt:
-                params.messages = [
-                    RcBaseMessage(
-                        role=RoleEnum.system,
-                        content=params.summary_merge_system_prompt,
-                        turn=None,
-                    ),
-                ] + params.messages
-            cur_summary = await chat_base(params)
-
-    id = await repo.add_summary(
-        str(cur_summary), turn=params.turn, merged_summary=merged_summary
+        # 同一租户的合并串行执行，排队中的新摘要合并为一次 llm 调用
+        with stage("summary_merge", "total"):
+            return await merge_coordinator.submit(params, new_summary, progress)
+
+    # 经写入队列与并发的摘要请求合并向量化与写入
+    progress("saving")
+    handle = await get_ingest_queue().submit(
+        params.tenant_name, new_summary, turn=params.turn
     )
-
-    # 删除合并的摘要
-    if merged_uuids:
-        await repo.delete_summary_by_uuids(merged_uuids)
+    id = await handle
 
     return {
         "id": str(id),
-        "content": cur_summary,
+        "content": new_summary,
     }
 
 
-def _to_jsonl(items: list[MergedSummary]) -> str:
-    return "\n".join(json.dumps(x, ensure_ascii=False) for x in items)
-
-
 if __name__ == "__main__":
     pass
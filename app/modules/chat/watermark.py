@@ -0,0 +1,91 @@
+"""
+摘要水位线
+按租户记录已摘要的最大消息轮次与滚动上下文（近期摘要的拼接，只保留末尾），
+增量摘要时只发送轮次大于水位线的消息；
+设置 SUMMARY_WATERMARK_FILE 时持久化为 JSON 文件，否则只保存在内存中
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+from typing import TypedDict
+
+
+class SummaryWatermark(TypedDict):
+    turn: int
+    context: str
+    updated_at: float
+
+
+class SummaryWatermarkStore:
+    """
+    path 为持久化文件路径，context_chars 为滚动上下文保留的最大字符数
+    """
+
+    def __init__(self, path: str | None = None, context_chars: int = 2000):
+        self.path = path
+        self.context_chars = context_chars
+        self.watermarks: dict[str, SummaryWatermark] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._save_lock = asyncio.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self.watermarks = json.load(f)
+            except Exception as e:
+                logging.exception(e)
+
+    def lock(self, tenant_name: str) -> asyncio.Lock:
+        """
+        同一租户的增量摘要需串行执行，否则会读到同一条水位线而重复摘要
+        """
+        lock = self._locks.get(tenant_name)
+        if lock is None:
+            lock = self._locks[tenant_name] = asyncio.Lock()
+        return lock
+
+    def get(self, tenant_name: str) -> SummaryWatermark | None:
+        return self.watermarks.get(tenant_name)
+
+    async def advance(self, tenant_name: str, turn: int, summary: str):
+        """
+        水位线只前进；新摘要追加到滚动上下文末尾
+        """
+        current = self.watermarks.get(tenant_name)
+        if current is not None and turn < current["turn"]:
+            return
+        context = f"{current['context']}\n{summary}" if current else summary
+        self.watermarks[tenant_name] = {
+            "turn": turn,
+            "context": context[-self.context_chars :] if self.context_chars else "",
+            "updated_at": time.time(),
+        }
+        await self.save()
+
+    async def forget(self, tenant_name: str):
+        self._locks.pop(tenant_name, None)
+        if self.watermarks.pop(tenant_name, None) is not None:
+            await self.save()
+
+    async def save(self):
+        if not self.path:
+            return
+        async with self._save_lock:
+            data = json.dumps(self.watermarks, ensure_ascii=False)
+            await asyncio.to_thread(self._write, self.path, data)
+
+    @staticmethod
+    def _write(path: str, data: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+
+summary_watermarks = SummaryWatermarkStore(
+    path=os.getenv("SUMMARY_WATERMARK_FILE") or None,
+    context_chars=int(os.getenv("SUMMARY_ROLLING_CONTEXT_CHARS", 2000)),
+)
@@ -1,47 +1,236 @@
+import os
 import json
+import time
+import hashlib
 import logging
-from typing import cast
-from langchain.messages import AIMessageChunk
-from langchain.tools import tool
+from collections import OrderedDict
+from typing import Any, TypedDict, cast
+from langchain.messages import AIMessageChunk, ToolMessage
+from langchain.tools import tool, ToolRuntime
 from langchain.agents import create_agent
 from app.schema.chat import ChatParamsWriter, RcBaseMessage, RoleEnum
-from app.schema.summary import SummaryMemory
+from app.schema.summary import (
+    SummaryMemory,
+    SummaryQueryResult,
+    SummarySearchModeEnum,
+)
 from app.ai_models.chat import get_chat_model
-from app.modules.vector_db.summary_repo import SummaryTenantRepo
+from app.modules.vector_db.summary_repo import get_summary_repo
+from app.utils.metrics import TOOL_CALLS, GenerationTimer, stage
+from app.utils.tokens import estimate_tokens
 from .tools import deep_think
+from .context import ContextPackReport, pack_params
+from .watermark import summary_watermarks
+
+
+class WriterContext(TypedDict):
+    """
+    每次请求的运行时上下文，经 context 传给已编译的 agent，由工具通过 ToolRuntime 读取
+    """
+
+    tenant_name: str
+    retriever_mode: SummarySearchModeEnum
+    distance: float
+    top_k: int
+    # 检索到的摘要，用于流式返回
+    docs: list[SummaryQueryResult]
+
+
+def _query_memory_tool(desc: str | None):
+    # 额外的工具描述，提供则使用
+    @tool(parse_docstring=True, description=desc)
+    async def query_memory(querys: list[str], runtime: ToolRuntime[WriterContext]):
+        """
+        查询历史记忆，使用相似性搜索检索与用户对话相关的记忆（历史摘要）。
+
+        Args:
+            querys: 查询内容，用于检索与用户对话相关的记忆（历史摘要），可以传入多个查询内容。
+
+        Returns:
+            list[str]: 查询到的记忆（历史摘要）JSON字符串格式, summary为摘要内容， turn=n表示第n轮记忆。
+        """
+        print(f"查询记忆: {querys}")
+        context = runtime.context
+        try:
+            repo = get_summary_repo(context["tenant_name"])
+            # 所有查询一次批量向量化、并发检索，按 RRF 融合排序并按 uuid 去重
+            with stage("query_memory", context["retriever_mode"].value):
+                res = await repo.multi_search(
+                    querys,
+                    mode=context["retriever_mode"],
+                    distance=context["distance"],
+                    top_k=context["top_k"],
+                )
+
+            # 保存检索到的摘要，用于流式返回
+            context["docs"].extend(res["per_query"])
+
+            # 取出摘要数据
+            res_summaries: list[SummaryMemory] = [
+                {
+                    "summary": summary["summary"],
+                    "turn": summary["turn"],
+                }
+                for summary in res["data"]
+            ]
+
+            # 去重：只保留summary和turn都相同的唯一项
+            unique = {}
+            for s in res_summaries:
+                key = (s["summary"], s["turn"])
+                if key not in unique:
+                    unique[key] = s
+            res_summaries = list(unique.values())
+
+            print(f"查询到的记忆: {[s['turn'] for s in res_summaries]}")
+
+            return json.dumps(res_summaries, ensure_ascii=False)
+        except Exception as e:
+            logging.exception(e)
+            return "检索出错！"
+
+    return query_memory
+
+
+def _count_tool_calls(messages: list[Any]):
+    for message in messages:
+        if isinstance(message, ToolMessage):
+            TOOL_CALLS.inc("writer", message.name or "unknown")
+
+
+def _hash(value: str) -> str:
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()[:16]
+
+
+AgentKey = tuple[str, str, str, float, int, str, bool, bool, str | None]
+
+
+class WriterAgentCache:
+    """
+    已编译的 agent 图缓存，按结构配置（模型与参数、系统提示词、启用的工具、检索工具描述）区分，
+    LRU 淘汰；每次请求的租户、检索参数与检索结果经运行时上下文传入，不进入缓存键
+    """
+
+    def __init__(self, max_size: int = 32):
+        self.max_size = max(1, max_size)
+        self.agents: OrderedDict[AgentKey, Any] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.build_seconds = 0.0
+
+    @staticmethod
+    def key(params: ChatParamsWriter) -> AgentKey:
+        return (
+            params.model,
+            params.base_url,
+            _hash(params.api_key),
+            params.temperature,
+            params.max_tokens,
+            _hash(params.sys_prompt),
+            params.enable_deep_think_tool,
+            params.enable_retriever,
+            _hash(params.query_tool_prompt) if params.query_tool_prompt else None,
+        )
+
+    def get(self, params: ChatParamsWriter):
+        key = self.key(params)
+        agent = self.agents.get(key)
+        if agent is not None:
+            self.hits += 1
+            self.agents.move_to_end(key)
+            return agent
+        self.misses += 1
+        start = time.perf_counter()
+        agent = build_writer_agent(params)
+        self.build_seconds += time.perf_counter() - start
+        self.agents[key] = agent
+        if len(self.agents) > self.max_size:
+            self.agents.popitem(last=False)
+            self.evictions += 1
+        return agent
+
+    def clear(self):
+        self.agents.clear()
+
+    def stats(self):
+        return {
+            "size": len(self.agents),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "avg_build_ms": self.build_seconds / self.misses * 1000
+            if self.misses
+            else 0.0,
+        }
+
+
+def build_writer_agent(params: ChatParamsWriter):
+    """
+    编译 agent 图（不读取请求的运行时参数）
+    """
+    model = get_chat_model(
+        model=params.model,
+        api_key=params.api_key,
+        base_url=params.base_url,
+        temperature=params.temperature,
+        max_tokens=params.max_tokens,
+        # extra_body={
+        #     "thinking": {
+        #         "type": "enabled",
+        #     },
+        # },
+    )
+    # 如果启用记忆检索，则添加记忆检索工具
+    # Build tool list based on request flags.
+    tools = []
+    if params.enable_deep_think_tool:
+        tools.append(deep_think)
+    if params.enable_retriever:
+        tools.append(_query_memory_tool(params.query_tool_prompt or None))
+    return create_agent(
+        model=model,
+        tools=tools,
+        system_prompt=params.sys_prompt,
+        context_schema=WriterContext,
+        debug=False,
+    )
+
+
+writer_agent_cache = WriterAgentCache(int(os.getenv("WRITER_AGENT_CACHE_SIZE", 32)))
 
 
 class WriterAgent:
     def __init__(self, params: ChatParamsWriter):
-        self.docs = []
         self.params = params
-        self.model = get_chat_model(
-            model=params.model,
-            api_key=params.api_key,
-            base_url=params.base_url,
-            temperature=params.temperature,
-            max_tokens=params.max_tokens,
-            # extra_body={
-            #     "thinking": {
-            #         "type": "enabled",
-            #     },
-            # },
-        )
-        # 如果启用记忆检索，则添加记忆检索工具
-        # Build tool list based on request flags.
-        tools = []
-        if self.params.enable_deep_think_tool:
-            tools.append(deep_think)
-        if self.params.enable_retriever:
-            tools.append(self.query_memory_wrap())
-        self.agent = create_agent(
-            model=self.model,
-            tools=tools,
-            system_prompt=self.params.sys_prompt,
-            debug=False,
+        self.context: WriterContext = {
+            "tenant_name": params.tenant_name,
+            "retriever_mode": params.retriever_mode,
+            "distance": params.distance,
+            "top_k": params.top_k,
+            "docs": [],
+        }
+        self.docs = self.context["docs"]
+        self.agent = writer_agent_cache.get(params)
+
+    def pack_context(self) -> ContextPackReport | None:
+        """
+        按 token 预算裁剪历史消息，已被摘要覆盖的旧轮次优先省略，并为检索到的记忆预留空间
+        """
+        watermark = summary_watermarks.get(self.params.tenant_name)
+        return pack_params(
+            self.params,
+            [self.params.instruction_prompt],
+            self.params.memory_reserve_tokens if self.params.enable_retriever else 0,
+            watermark["turn"] if watermark else None,
         )
 
     async def run_v1(self):
+        report = self.pack_context()
+        if report:
+            yield {"context": report}
+
         # 过滤掉消息列表内的system角色（防止通过messages参数篡改system）
         messages = [msg for msg in self.params.messages if msg.role != RoleEnum.system]
 
@@ -80,60 +269,72 @@ class WriterAgent:
             for message in messages
         ]
 
+        timer = GenerationTimer("writer")
+        texts: list[str] = []
+        generated = 0
         try:
             if self.params.streaming:
                 aiter = self.agent.astream(
                     {"messages": [*input_data]},
+                    context=self.context,
                     stream_mode="messages",
                 )
                 async for item, metadata in aiter:
                     if isinstance(item, AIMessageChunk):
                         # print(item)
+                        if item.content:
+                            timer.token()
+                            texts.append(str(item.content))
 
                         usage_metadata = item.usage_metadata
 
                         if usage_metadata:
+                            generated += usage_metadata["output_tokens"]
                             usage_metadata = {
                                 "inputTokens": usage_metadata["input_tokens"],
                                 "outputTokens": usage_metadata["output_tokens"],
                                 "totalTokens": usage_metadata["total_tokens"],
                             }
 
-                        yield json.dumps(
-                            {
-                                "content": item.content,
-                                "usageMetadata": usage_metadata,
-                            },
-                            ensure_ascii=False,
-                        )
+                        yield {
+                            "content": item.content,
+                            "usageMetadata": usage_metadata,
+                        }
                     else:
                         # yield item
                         print("function_call================================")
                         print(item)
+                        _count_tool_calls([item])
+                timer.finish(generated or estimate_tokens("".join(texts)))
                 # 流式返回检索到的摘要
-                yield json.dumps({"docs": self.docs}, ensure_ascii=False)
-                self.docs = []
+                yield {"docs": list(self.docs)}
+                self.docs.clear()
             else:
                 content = await self.agent.ainvoke(
                     {"messages": [*input_data]},
+                    context=self.context,
                     stream_mode="messages",
                 )
                 # print(content)
                 content = cast(list[AIMessageChunk], content)
+                _count_tool_calls(content)
                 ai_text = "".join(
                     str(item.content)
                     for item in content
                     if isinstance(item, AIMessageChunk)
                 )
-                yield json.dumps({"content": ai_text}, ensure_ascii=False)
+                timer.finish(estimate_tokens(ai_text))
+                yield {"content": ai_text}
         except Exception as e:
             logging.exception(e)
             msg = repr(e)
-            yield json.dumps(
-                {"content": f"网络错误，请稍后重试。error: {msg}"}, ensure_ascii=False
-            )
+            yield {"content": f"网络错误，请稍后重试。error: {msg}"}
 
     async def run(self):
+        report = self.pack_context()
+        if report:
+            yield {"context": report}
+
         # 过滤掉 system（防止被篡改）
         messages = [msg for msg in self.params.messages if msg.role != RoleEnum.system]
 
@@ -166,10 +367,14 @@ class WriterAgent:
             for message in messages
         ]
 
+        timer = GenerationTimer("writer")
+        texts: list[str] = []
+        generated = 0
         try:
             if self.params.streaming:
                 aiter = self.agent.astream(
                     {"messages": [*input_data]},
+                    context=self.context,
                     stream_mode=["messages", "updates"],  # 同时拿token + agent进度
                     version="v2",
                 )
@@ -179,7 +384,7 @@ class WriterAgent:
                     # print("chunk_type", chunk_type)
 
                     if chunk_type == "messages":
-                        token, metadata = chunk["data"]
+                        token, _metadata = chunk["data"]
 
                         if isinstance(token, AIMessageChunk):
                             text = token.text or token.content or ""
@@ -188,24 +393,25 @@ class WriterAgent:
                             )
                             if reasoning:
                                 print(reasoning, end="")
+                            if text or reasoning:
+                                timer.token()
+                                texts.append(text + reasoning)
 
                             # usage 处理
                             usage_metadata = token.usage_metadata
                             if usage_metadata:
+                                generated += usage_metadata.get("output_tokens") or 0
                                 usage_metadata = {
                                     "inputTokens": usage_metadata.get("input_tokens"),
                                     "outputTokens": usage_metadata.get("output_tokens"),
                                     "totalTokens": usage_metadata.get("total_tokens"),
                                 }
 
-                            yield json.dumps(
-                                {
-                                    "content": text,
-                                    "thinking": reasoning,
-                                    "usageMetadata": usage_metadata,
-                                },
-                                ensure_ascii=False,
-                            )
+                            yield {
+                                "content": text,
+                                "thinking": reasoning,
+                                "usageMetadata": usage_metadata,
+                            }
                         else:
                             print("not AIMessageChunk", end="：")
                             print("token type", type(token))
@@ -219,103 +425,34 @@ class WriterAgent:
                             for step_name, update in dx.items():
                                 # 这里只做调试输出（避免污染前端流）
                                 print("\n[Agent Step]", step_name, update)
+                                if isinstance(update, dict):
+                                    _count_tool_calls(update.get("messages") or [])
                         else:
                             print("not dict", type(dx))
 
                     elif chunk_type == "custom":
                         print("[Custom Stream]", chunk["data"])
 
+                timer.finish(generated or estimate_tokens("".join(texts)))
                 if self.docs:
-                    yield json.dumps({"docs": self.docs}, ensure_ascii=False)
-                    self.docs = []
+                    yield {"docs": list(self.docs)}
+                    self.docs.clear()
             else:
                 result = await self.agent.ainvoke(
                     {"messages": [*input_data]},
+                    context=self.context,
                     version="v2",
                 )
 
-                ai_text = result.value.get("messages", [])[-1].content
+                messages = result.value.get("messages", [])
+                _count_tool_calls(messages)
+                ai_text = messages[-1].content
+                timer.finish(estimate_tokens(str(ai_text)))
 
-                yield json.dumps(
-                    {"content": ai_text},
-                    ensure_ascii=False,
-                )
+                yield {"content": ai_text}
 
         except Exception as e:
             logging.exception(e)
             msg = repr(e)
 
-            yield json.dumps(
-                {"content": f"网络错误，请稍后重试。error: {msg}"},
-                ensure_ascii=False,
-            )
-
-    def query_memory_wrap(self):
-        # 额外的工具描述，提供则使用
-        desc = self.params.query_tool_prompt or None
-
-        @tool(parse_docstring=True, description=desc)
-        async def query_memory(querys: list[str]):
-            """
-            查询历史记忆，使用相似性搜索检索与用户对话相关的记忆（历史摘要）。
-
-            Args:
-                querys: 查询内容，用于检索与用户对话相关的记忆（历史摘要），可以传入多个查询内容。
-
-            Returns:
-                list[str]: 查询到的记忆（历史摘要）JSON字符串格式, summary为摘要内容， turn=n表示第n轮记忆。
-            """
-            print(f"查询记忆: {querys}")
-            try:
-                repo = SummaryTenantRepo(self.params.tenant_name)
-                res_summaries: list[SummaryMemory] = []
-
-                for query in querys:
-                    res = await repo.summary_search(
-                        query=query,
-                        mode=self.params.retriever_mode,
-                        distance=self.params.distance,
-                        top_k=self.params.top_k,
-                    )
-
-                    docs = res["data"]
-
-                    # 保存检索到的摘要，用于流式返回
-                    self.docs.append(
-                        {
-                            "query": query,
-                            "summaries": docs,
-                        }
-                    )
-
-                    # 取出摘要数据
-                    summaries: list[SummaryMemory] = [
-                        {
-                            "summary": summary["summary"],
-                            "turn": summary["turn"],
-                        }
-                        for summary in docs
-                    ]
-
-                    res_summaries.extend(summaries)
-
-                # 去重：只保留summary和turn都相同的唯一项
-                unique = {}
-                for s in res_summaries:
-                    key = (s["summary"], s["turn"])
-                    if key not in unique:
-                        unique[key] = s
-                res_summaries = list(unique.values())
-
-                print(f"查询到的记忆: {[s['turn'] for s in res_summaries]}")
-
-                return json.dumps(res_summaries, ensure_ascii=False)
-            except Exception as e:
-                logging.exception(e)
-                return "检索出错！"
-
-        return query_memory
-
-
-if __name__ == "__main__":
-    pass
+            yield {"content": f"网络错误，请稍后重试。error: {msg}"}
@@ -1,3 +1,19 @@
 from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.utils.metrics import metrics
 
 router = APIRouter()
+
+# 挂载在应用根路径（/metrics），供 Prometheus 抓取
+router_metrics = APIRouter()
+
+
+@router_metrics.get(
+    "/metrics",
+    summary="Prometheus 指标：各阶段耗时、首 token 耗时、生成速率与工具调用次数",
+    response_class=PlainTextResponse,
+)
+async def metrics_api():
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
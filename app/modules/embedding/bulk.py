@@ -0,0 +1,74 @@
+import os
+import json
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+from typing import Any
+from app.ai_models.embeddings import aembed_documents
+from app.ai_models.embeddings.codec import Vector, encode_base64
+from app.schema.embedding import VectorFormatEnum
+
+# 单个请求可指定的上限，避免一次请求占满嵌入服务
+MAX_CHUNK_SIZE = int(os.getenv("EMBEDDING_STREAM_MAX_CHUNK_SIZE", 512))
+MAX_CONCURRENCY = int(os.getenv("EMBEDDING_STREAM_MAX_CONCURRENCY", 16))
+
+
+async def embed_documents_stream(
+    texts: list[str],
+    chunk_size: int = 64,
+    concurrency: int = 4,
+    format: VectorFormatEnum = VectorFormatEnum.json,
+) -> AsyncIterator[str]:
+    """
+    分块批量向量化，最多 concurrency 个块同时请求，每个块完成即输出一行 NDJSON，
+    同一时刻只持有进行中的块的结果，内存占用与输入规模无关。
+    块按完成顺序输出，使用 start 字段定位其在输入中的位置
+    """
+    chunk_size = min(max(1, chunk_size), MAX_CHUNK_SIZE)
+    concurrency = min(max(1, concurrency), MAX_CONCURRENCY)
+    total = (len(texts) + chunk_size - 1) // chunk_size
+    chunks = iter(range(total))
+    pending: dict[asyncio.Task[Vector], int] = {}
+    done_count = 0
+
+    def schedule() -> bool:
+        index = next(chunks, None)
+        if index is None:
+            return False
+        start = index * chunk_size
+        task = asyncio.create_task(aembed_documents(texts[start : start + chunk_size]))
+        pending[task] = index
+        return True
+
+    try:
+        while len(pending) < concurrency and schedule():
+            pass
+
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index = pending.pop(task)
+                done_count += 1
+                line: dict[str, Any] = {
+                    "chunk": index,
+                    "start": index * chunk_size,
+                    "done": done_count,
+                    "total": total,
+                }
+                try:
+                    vectors = task.result()
+                    line["count"] = len(vectors)
+                    line["embeddings"] = (
+                        encode_base64(vectors)
+                        if format != VectorFormatEnum.json
+                        else vectors.tolist()
+                    )
+                except Exception as e:
+                    logging.exception(e)
+                    line["error"] = str(e)
+                yield json.dumps(line, ensure_ascii=False) + "\n"
+                schedule()
+    finally:
+        # 客户端断开时取消尚未完成的块
+        for task in pending:
+            task.cancel()
@@ -1,29 +1,102 @@
 import logging
-from fastapi import APIRouter, Body, HTTPException
-from app.ai_models.embeddings import aembed_documents, aembed_query
+import os
+from fastapi import APIRouter, Body, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from app.ai_models.embeddings import (
+    aembed_documents,
+    aembed_query,
+    get_embedding_cache,
+)
+from app.ai_models.embeddings.codec import (
+    Vector,
+    VECTOR_MEDIA_TYPE,
+    VECTOR_SHAPE_HEADER,
+    encode_base64,
+    encode_raw,
+    encode_shape,
+)
+from app.schema.embedding import VectorFormatEnum
+from .bulk import MAX_CHUNK_SIZE, MAX_CONCURRENCY, embed_documents_stream
 
 router = APIRouter()
 
 
+def _vector_response(vectors: Vector, format: VectorFormatEnum):
+    """
+    按请求的格式返回向量，binary 时形状通过 X-Vector-Shape 响应头返回
+    """
+    if format == VectorFormatEnum.binary:
+        return Response(
+            content=encode_raw(vectors),
+            media_type=VECTOR_MEDIA_TYPE,
+            headers={VECTOR_SHAPE_HEADER: encode_shape(vectors.shape)},
+        )
+    if format == VectorFormatEnum.base64:
+        return encode_base64(vectors)
+    return vectors.tolist()
+
+
 @router.post("/embed/documents", summary="批量文本转向量")
 async def embed_documents(
     texts: list[str] = Body(..., examples=[["你好", "世界"]], embed=True),
+    format: VectorFormatEnum = Query(
+        VectorFormatEnum.json, description="响应格式 json/base64/binary"
+    ),
 ):
     """
-    批量将文本转为向量
+    批量将文本转为向量，format 为 binary/base64 时返回 float32 编码，减少序列化开销
     """
     if not texts or not isinstance(texts, list):
         raise HTTPException(status_code=400, detail="参数 texts 必须为字符串列表")
     try:
         embeddings = await aembed_documents(texts)
-        return embeddings
+        return _vector_response(embeddings, format)
     except Exception as e:
         logging.exception(e)
         raise HTTPException(status_code=500, detail=f"向量化失败: {str(e)}")
 
 
+@router.post("/embed/documents/stream", summary="分块流式批量文本转向量（NDJSON）")
+async def embed_documents_stream_api(
+    texts: list[str] = Body(..., examples=[["你好", "世界"]], embed=True),
+    chunk_size: int = Body(
+        int(os.getenv("EMBEDDING_STREAM_CHUNK_SIZE", 64)),
+        embed=True,
+        ge=1,
+        le=MAX_CHUNK_SIZE,
+        description="每块文本数",
+    ),
+    concurrency: int = Body(
+        int(os.getenv("EMBEDDING_STREAM_CONCURRENCY", 4)),
+        embed=True,
+        ge=1,
+        le=MAX_CONCURRENCY,
+        description="同时请求的块数",
+    ),
+    format: VectorFormatEnum = Query(
+        VectorFormatEnum.json,
+        description="向量格式 json/base64（binary 按 base64 输出）",
+    ),
+):
+    """
+    大批量文本向量化，按块并发处理并以 NDJSON 流式返回，每行包含
+    chunk/start/count/done/total 与 embeddings（失败时为 error）
+    """
+    if not texts or not isinstance(texts, list):
+        raise HTTPException(status_code=400, detail="参数 texts 必须为字符串列表")
+    return StreamingResponse(
+        embed_documents_stream(texts, chunk_size, concurrency, format),
+        media_type="application/x-ndjson",
+    )
+
+
 @router.post("/embed/query", summary="查询文本转向量")
-async def embed_query(text: str = Body(..., examples=["你好世界"], embed=True)):
+async def embed_query(
+    text: str = Body(..., examples=["你好世界"], embed=True),
+    format: VectorFormatEnum = Query(
+        VectorFormatEnum.json, description="响应格式 json/base64/binary"
+    ),
+):
     """
     将查询文本转为向量
     """
@@ -31,7 +104,16 @@ async def embed_query(text: str = Body(..., examples=["你好世界"], embed=Tru
         raise HTTPException(status_code=400, detail="参数 text 必须为字符串")
     try:
         embedding = await aembed_query(text)
-        return embedding
+        return _vector_response(embedding, format)
     except Exception as e:
         logging.exception(e)
         raise HTTPException(status_code=500, detail=f"向量化失败: {str(e)}")
+
+
+@router.get("/cache/stats", summary="Embedding 缓存统计")
+async def embedding_cache_stats():
+    """
+    返回 Embedding 缓存的命中、未命中、淘汰次数及容量，用于评估缓存大小
+    """
+    cache = get_embedding_cache()
+    return {"enabled": cache is not None, "data": cache.stats() if cache else None}
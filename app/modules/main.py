@@ -4,7 +4,14 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.modules.static_service import run as run_static_service
 from app.utils.logger import LoggerConfig
 from app.vector_db import weaviate_client
+from app.ai_models.embeddings import init_embedding_backend, close_embedding_backend
 from app.modules.vector_db.collection_service import create_collections
+from app.modules.vector_db.summary_repo import STORE_BACKEND, tenant_lifecycle
+from app.modules.vector_db.numpy_store import init_numpy_store, close_numpy_store
+from app.modules.vector_db.ingest import init_ingest_queue, close_ingest_queue
+from app.modules.chat.jobs import init_summary_jobs, close_summary_jobs
+from app.utils.tokens import init_token_encoding
+from app.ai_models.chat import close_chat_models
 from app.modules.common import router as router_common
 from app.modules.chat import router as router_chat
 from app.modules.vector_db import router as router_vector_db, router_summary
@@ -16,13 +23,31 @@ from app.modules.embedding import router as router_embedding
 async def lifespan(app: FastAPI):
     LoggerConfig()
     # 这里初始化数据库
-    await weaviate_client.init_weaviate_client()
-    await create_collections()
+    if STORE_BACKEND == "numpy":
+        init_numpy_store()
+    else:
+        await weaviate_client.init_weaviate_client()
+    await init_embedding_backend()
+    await init_token_encoding()
+    if STORE_BACKEND != "numpy":
+        await create_collections()
+        await tenant_lifecycle.startup()
+    init_ingest_queue()
+    init_summary_jobs()
     # await SummaryCollection().add_new_property()
     print("app init")
     yield
     # 这可以做清理工作
-    await weaviate_client.close_weaviate_client()
+    # 先结束摘要任务、写入队列中的摘要，再关闭依赖的服务
+    await close_summary_jobs()
+    await close_ingest_queue()
+    await close_chat_models()
+    await tenant_lifecycle.shutdown()
+    await close_embedding_backend()
+    if STORE_BACKEND == "numpy":
+        await close_numpy_store()
+    else:
+        await weaviate_client.close_weaviate_client()
     print("app clean")
 
 
@@ -58,6 +83,7 @@ root_router.include_router(
 
 # 挂载根路由器到主应用
 app.include_router(root_router)
+app.include_router(router_common.router_metrics, tags=["Metrics"])
 
 # 挂载静态文件
 run_static_service(app)
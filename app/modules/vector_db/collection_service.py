@@ -1,4 +1,5 @@
 from weaviate.classes.config import Property, DataType, Configure, Tokenization
+from weaviate.collections.classes.config import _InvertedIndexConfigCreate
 from weaviate.collections.classes.config_vectors import _VectorConfigCreate
 from app.vector_db.weaviate_client import get_weaviate_client
 from .summary_repo import COLLECTION_NAME
@@ -17,6 +18,7 @@ class CollectionService:
             Configure.Vectors.self_provided(name="vector"),
         ],
         multi_tenancy: bool = False,
+        inverted_index_config: _InvertedIndexConfigCreate | None = None,
     ):
         if not await self.client.collections.exists(name):
             await self.client.collections.create(
@@ -25,6 +27,7 @@ class CollectionService:
                 properties=properties,
                 multi_tenancy_config=Configure.multi_tenancy(enabled=multi_tenancy),
                 vector_config=vector_config,
+                inverted_index_config=inverted_index_config,
             )
             print(f"Collection {name} created")
         else:
@@ -81,4 +84,6 @@ async def create_collections():
             Configure.Vectors.self_provided(name="vector"),
         ],
         multi_tenancy=True,
+        # keyset 分页需要按更新时间过滤（创建后不可修改，已有集合需重建后生效）
+        inverted_index_config=Configure.inverted_index(index_timestamps=True),
     )
@@ -0,0 +1,35 @@
+import json
+import logging
+from collections.abc import AsyncIterator
+from datetime import datetime
+from typing import Any
+from .summary_repo import SUMMARY_PROPERTIES, get_summary_repo
+
+
+def _format_time(value: datetime | None) -> str | None:
+    return value.astimezone().strftime("%Y-%m-%d %H:%M:%S") if value else None
+
+
+async def dump_tenant_stream(
+    tenant_name: str,
+    properties: list[str] | None = None,
+    batch_size: int | None = None,
+) -> AsyncIterator[str]:
+    """
+    游标遍历租户，每个对象输出一行 NDJSON（uuid + 投影的属性 + 时间），
+    对象到达即输出，不统计总数，也不在内存中累积结果。
+    中途失败时输出一行 {"error": ...} 后结束
+    """
+    repo = get_summary_repo(tenant_name)
+    names = properties or SUMMARY_PROPERTIES
+    try:
+        async for obj in repo.iterate(properties=names, cache_size=batch_size):
+            line: dict[str, Any] = {"uuid": str(obj.uuid)}
+            for name in names:
+                line[name] = obj.properties.get(name)
+            line["created_at"] = _format_time(obj.metadata.creation_time)
+            line["updated_at"] = _format_time(obj.metadata.last_update_time)
+            yield json.dumps(line, ensure_ascii=False) + "\n"
+    except Exception as e:
+        logging.exception(e)
+        yield json.dumps({"error": str(e)}, ensure_ascii=False) + "\n"
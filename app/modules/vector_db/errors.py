@@ -0,0 +1,8 @@
+class DuplicateObjectError(ValueError):
+    """
+    写入时指定的 uuid 已存在（两种存储后端一致），继承 ValueError，路由中按 400 处理
+    """
+
+    def __init__(self, uuid: str):
+        super().__init__(f"object {uuid} already exists")
+        self.uuid = uuid
@@ -0,0 +1,210 @@
+"""
+摘要写入队列（write-behind）
+有界队列收集各租户待写入的摘要，后台 worker 按批取出：整批一次向量化，
+再按租户分组批量写入（insert_many）。提交时返回完成句柄，可等待结果（id 或异常），
+也可不等待；队列满时提交方等待（背压），超时抛出 TimeoutError
+"""
+
+import os
+import time
+import asyncio
+import logging
+from typing import Any, TypedDict
+from uuid import UUID
+from app.ai_models.embeddings import aembed_documents
+from app.schema.summary import MergedSummary, SummaryDataModel, SummaryTypeEnum
+from .summary_repo import get_summary_repo
+
+IngestItem = tuple[str, SummaryDataModel, "asyncio.Future[UUID]"]
+
+
+class IngestQueueStats(TypedDict):
+    submitted: int
+    completed: int
+    failed: int
+    batches: int
+    avg_batch: float
+    queue_size: int
+    max_size: int
+
+
+class IngestQueue:
+    """
+    max_size 为队列容量，max_batch 为单批最大条数，
+    window 为首条到达后等待凑批的时间（秒），workers 为并发写入的批数
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1000,
+        max_batch: int = 64,
+        window: float = 0.02,
+        workers: int = 2,
+        put_timeout: float | None = 30,
+    ):
+        self.queue: asyncio.Queue[IngestItem] = asyncio.Queue(max_size)
+        self.max_batch = max(1, max_batch)
+        self.window = window
+        self.put_timeout = put_timeout
+        self.closed = False
+        self._workers = [
+            asyncio.create_task(self._worker()) for _ in range(max(1, workers))
+        ]
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.batches = 0
+        self.batched_items = 0
+
+    async def submit(
+        self,
+        tenant_name: str,
+        summary: str,
+        turn: int | None = None,
+        summary_type: SummaryTypeEnum | None = SummaryTypeEnum.summary,
+        merged_summary: list[MergedSummary] | None = None,
+    ) -> "asyncio.Future[UUID]":
+        """
+        提交一条摘要，返回完成句柄；await 句柄得到插入的 id，失败时抛出对应异常
+        """
+        if self.closed:
+            raise RuntimeError("ingest queue is closed")
+        future: asyncio.Future[UUID] = asyncio.get_running_loop().create_future()
+        item: IngestItem = (
+            tenant_name,
+            {
+                "summary": summary,
+                "turn": turn,
+                "type": summary_type,
+                "merged_summary": merged_summary,
+            },
+            future,
+        )
+        if self.put_timeout is None:
+            await self.queue.put(item)
+        else:
+            await asyncio.wait_for(self.queue.put(item), self.put_timeout)
+        self.submitted += 1
+        return future
+
+    async def _worker(self):
+        while True:
+            batch = [await self.queue.get()]
+            try:
+                # 首条到达后等待一个窗口期，让并发提交的摘要进入同一批
+                if self.window > 0 and self.queue.qsize() < self.max_batch - 1:
+                    await asyncio.sleep(self.window)
+                while len(batch) < self.max_batch and not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                await self._process(batch)
+            except Exception as e:
+                logging.exception(e)
+                for _, _, future in batch:
+                    self._resolve(future, e)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def _process(self, batch: list[IngestItem]):
+        self.batches += 1
+        self.batched_items += len(batch)
+        vectors = await aembed_documents([item["summary"] for _, item, _ in batch])
+
+        groups: dict[str, list[int]] = {}
+        for i, (tenant_name, _, _) in enumerate(batch):
+            groups.setdefault(tenant_name, []).append(i)
+
+        async def insert(tenant_name: str, indexes: list[int]):
+            try:
+                repo = get_summary_repo(tenant_name)
+                results = await repo.add_summaries(
+                    [batch[i][1] for i in indexes], vectors[indexes]
+                )
+            except Exception as e:
+                logging.exception(e)
+                results = [e] * len(indexes)
+            for i, result in zip(indexes, results):
+                self._resolve(batch[i][2], result)
+
+        await asyncio.gather(
+            *(insert(tenant_name, indexes) for tenant_name, indexes in groups.items())
+        )
+
+    def _resolve(self, future: "asyncio.Future[UUID]", result: Any):
+        if future.done():
+            return
+        if isinstance(result, BaseException):
+            self.failed += 1
+            future.set_exception(result)
+            # 不等待句柄的提交方不会读取异常，避免未读取异常的告警（等待方仍会收到）
+            future.exception()
+        else:
+            self.completed += 1
+            future.set_result(result)
+
+    async def flush(self):
+        """
+        等待已提交的摘要全部写入
+        """
+        await self.queue.join()
+
+    async def close(self):
+        self.closed = True
+        await self.flush()
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+
+    def stats(self) -> IngestQueueStats:
+        return {
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "batches": self.batches,
+            "avg_batch": self.batched_items / self.batches if self.batches else 0.0,
+            "queue_size": self.queue.qsize(),
+            "max_size": self.queue.maxsize,
+        }
+
+
+ingest_queue: IngestQueue | None = None
+
+
+def init_ingest_queue() -> IngestQueue:
+    """
+    初始化写入队列，应用启动时调用一次
+    """
+    global ingest_queue
+    if ingest_queue is None:
+        put_timeout = float(os.getenv("SUMMARY_INGEST_PUT_TIMEOUT", 30))
+        ingest_queue = IngestQueue(
+            max_size=int(os.getenv("SUMMARY_INGEST_QUEUE_SIZE", 1000)),
+            max_batch=int(os.getenv("SUMMARY_INGEST_MAX_BATCH", 64)),
+            window=float(os.getenv("SUMMARY_INGEST_WINDOW_MS", 20)) / 1000,
+            workers=int(os.getenv("SUMMARY_INGEST_WORKERS", 2)),
+            put_timeout=put_timeout if put_timeout > 0 else None,
+        )
+    return ingest_queue
+
+
+def get_ingest_queue() -> IngestQueue:
+    if ingest_queue is None:
+        raise RuntimeError(
+            "Ingest queue not initialized. Call init_ingest_queue() first."
+        )
+    return ingest_queue
+
+
+async def close_ingest_queue():
+    """
+    关闭写入队列，等待队列中的摘要全部写入
+    """
+    global ingest_queue
+    if ingest_queue is not None:
+        start = time.perf_counter()
+        await ingest_queue.close()
+        print(
+            f"ingest queue flushed in {time.perf_counter() - start:.2f}s",
+            ingest_queue.stats(),
+        )
+        ingest_queue = None
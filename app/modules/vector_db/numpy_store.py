@@ -0,0 +1,676 @@
+"""
+进程内摘要存储（NumPy）
+每个租户一个连续的 float32 矩阵（行已归一化），余弦距离 = 1 - 点积，暴力 top-k；
+关键字检索为 summary 上的 BM25（k1=1.2, b=0.75），中文按相邻两字切分；
+混合检索按 relativeScoreFusion 融合向量与 BM25 分数。
+返回结果使用 weaviate 的 Object/QueryReturn 结构，与 Weaviate 后端一致。
+可选持久化：租户目录下 vectors.f32（memmap 读写）+ objects.json
+"""
+
+import os
+import re
+import json
+import math
+import time
+import shutil
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any, TypedDict
+from uuid import UUID, uuid4
+import numpy as np
+from weaviate.collections.classes.batch import DeleteManyReturn
+from weaviate.collections.classes.internal import MetadataReturn, Object, QueryReturn
+from app.ai_models.embeddings.codec import Vector, as_vectors
+from .errors import DuplicateObjectError
+
+COLLECTION_NAME = "Summary"
+
+_CJK = "\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+_CJK_CHAR = re.compile(rf"[{_CJK}]")
+_TOKEN_RE = re.compile(rf"[{_CJK}]+|[^\W{_CJK}]+")
+_TENANT_NAME_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+HYBRID_ALPHA = 0.7
+# 租户行数达到该值时，相似度计算放到线程中执行
+SEARCH_THREAD_MIN_ROWS = int(os.getenv("NUMPY_SEARCH_THREAD_MIN_ROWS", 20000))
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    英文/数字按单词切分并转小写，连续中文按相邻两字切分（单字保留）
+    """
+    tokens: list[str] = []
+    for match in _TOKEN_RE.finditer(text.lower()):
+        word = match.group()
+        if _CJK_CHAR.match(word):
+            if len(word) == 1:
+                tokens.append(word)
+            else:
+                tokens.extend(word[i : i + 2] for i in range(len(word) - 1))
+        else:
+            tokens.append(word)
+    return tokens
+
+
+def _plain(properties: dict[str, Any]) -> dict[str, Any]:
+    """
+    枚举转为值，与 weaviate 返回的属性一致，并可直接序列化为 JSON
+    """
+    return {k: v.value if isinstance(v, Enum) else v for k, v in properties.items()}
+
+
+def _to_datetime(ms: int) -> datetime:
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc)
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def _normalize(vector: Vector) -> Vector:
+    vector = as_vectors(vector).reshape(-1)
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm > 0 else vector
+
+
+class TenantSnapshot(TypedDict):
+    generation: int
+    vectors: Vector
+    objects: dict[str, Any]
+
+
+def _min_max(scores: Vector) -> Vector:
+    low, high = float(scores.min()), float(scores.max())
+    if high - low <= 0:
+        return np.ones_like(scores)
+    return (scores - low) / (high - low)
+
+
+class TenantIndex:
+    """
+    单个租户的数据：vectors 前 len(ids) 行有效，容量不足时按倍数扩容；
+    删除时用最后一行填补空位，矩阵始终连续。
+    BM25 倒排表 postings 为 词 -> {行号: 词频}
+    """
+
+    def __init__(self, dim: int | None = None):
+        self.dim = dim
+        self.vectors: Vector = np.zeros((0, dim or 0), dtype=np.float32)
+        self.ids: list[str] = []
+        self.rows: dict[str, int] = {}
+        self.properties: list[dict[str, Any]] = []
+        self.created_ms: list[int] = []
+        self.updated_ms: list[int] = []
+        self.terms: list[Counter[str]] = []
+        self.doc_len: list[int] = []
+        self.postings: dict[str, dict[int, int]] = {}
+        self.dirty = False
+        # 每次写入加一，落盘后只有期间没有新的写入才清除 dirty
+        self.generation = 0
+
+    def touch(self):
+        self.dirty = True
+        self.generation += 1
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _reserve(self, rows: int):
+        if self.vectors.shape[0] >= rows:
+            return
+        capacity = max(rows, self.vectors.shape[0] * 2, 64)
+        vectors = np.zeros((capacity, self.dim or 0), dtype=np.float32)
+        vectors[: len(self)] = self.vectors[: len(self)]
+        self.vectors = vectors
+
+    def _index_terms(self, row: int, text: str):
+        terms = Counter(tokenize(text))
+        self.terms[row] = terms
+        self.doc_len[row] = sum(terms.values())
+        for term, tf in terms.items():
+            self.postings.setdefault(term, {})[row] = tf
+
+    def _unindex_terms(self, row: int):
+        for term in self.terms[row]:
+            posting = self.postings[term]
+            posting.pop(row, None)
+            if not posting:
+                del self.postings[term]
+
+    def insert(
+        self,
+        properties: dict[str, Any],
+        vector: Vector,
+        uuid: str | None = None,
+        created_ms: int | None = None,
+        updated_ms: int | None = None,
+    ) -> UUID:
+        vector = _normalize(vector)
+        if self.dim is None:
+            self.dim = vector.shape[0]
+            self.vectors = np.zeros((0, self.dim), dtype=np.float32)
+        if vector.shape[0] != self.dim:
+            raise ValueError(f"vector dim {vector.shape[0]} != {self.dim}")
+        uuid = uuid or str(uuid4())
+        if uuid in self.rows:
+            raise DuplicateObjectError(uuid)
+
+        row = len(self)
+        self._reserve(row + 1)
+        self.vectors[row] = vector
+        self.ids.append(uuid)
+        self.rows[uuid] = row
+        self.properties.append(_plain(properties))
+        now = _now_ms()
+        self.created_ms.append(created_ms or now)
+        self.updated_ms.append(updated_ms or now)
+        self.terms.append(Counter())
+        self.doc_len.append(0)
+        self._index_terms(row, str(properties.get("summary") or ""))
+        self.touch()
+        return UUID(uuid)
+
+    def update(self, uuid: str, properties: dict[str, Any], vector: Vector | None):
+        """
+        与 weaviate update 一致：合并属性，未传入的属性保持不变
+        """
+        row = self.rows.get(str(uuid))
+        if row is None:
+            raise ValueError(f"object {uuid} not found")
+        self.properties[row].update(_plain(properties))
+        if vector is not None:
+            self.vectors[row] = _normalize(vector)
+        if "summary" in properties:
+            self._unindex_terms(row)
+            self._index_terms(row, str(properties["summary"] or ""))
+        self.updated_ms[row] = _now_ms()
+        self.touch()
+
+    def _columns(self) -> list[list[Any]]:
+        """
+        按行存储的各列，删除时需要同步移动
+        """
+        return [
+            self.ids,
+            self.properties,
+            self.created_ms,
+            self.updated_ms,
+            self.terms,
+            self.doc_len,
+        ]
+
+    def delete(self, uuids: list[str]) -> int:
+        deleted = 0
+        for uuid in uuids:
+            row = self.rows.pop(str(uuid), None)
+            if row is None:
+                continue
+            self._unindex_terms(row)
+            last = len(self) - 1
+            if row != last:
+                # 最后一行移动到被删除的位置
+                moved = self.ids[last]
+                self.vectors[row] = self.vectors[last]
+                for column in self._columns():
+                    column[row] = column[last]
+                self.rows[moved] = row
+                for term, tf in self.terms[row].items():
+                    posting = self.postings[term]
+                    posting.pop(last)
+                    posting[row] = tf
+            for column in self._columns():
+                column.pop()
+            deleted += 1
+        if deleted:
+            self.touch()
+        return deleted
+
+    def _object(
+        self,
+        row: int,
+        distance: float | None = None,
+        score: float | None = None,
+        include_vector: bool = False,
+        properties: list[str] | None = None,
+    ) -> Object[Any, Any]:
+        values = self.properties[row]
+        return Object(
+            uuid=UUID(self.ids[row]),
+            metadata=MetadataReturn(
+                creation_time=_to_datetime(self.created_ms[row]),
+                last_update_time=_to_datetime(self.updated_ms[row]),
+                distance=distance,
+                certainty=None if distance is None else 1 - distance / 2,
+                score=score,
+            ),
+            properties=(
+                dict(values)
+                if properties is None
+                else {k: values.get(k) for k in properties}
+            ),
+            references=None,
+            vector={"vector": self.vectors[row].tolist()} if include_vector else {},
+            collection=COLLECTION_NAME,
+        )
+
+    def get(
+        self,
+        uuid: str,
+        include_vector: bool = False,
+        properties: list[str] | None = None,
+    ) -> Object[Any, Any] | None:
+        row = self.rows.get(str(uuid))
+        if row is None:
+            return None
+        return self._object(row, include_vector=include_vector, properties=properties)
+
+    def _similarities(self, vector: Vector) -> Vector:
+        return self.vectors[: len(self)] @ _normalize(vector)
+
+    def _top(self, scores: Vector, rows: Any, limit: int) -> Any:
+        """
+        在候选行 rows 中取分数最高的 limit 行，先 argpartition 再排序
+        """
+        if len(rows) > limit:
+            part = np.argpartition(-scores[rows], limit - 1)[:limit]
+            rows = rows[part]
+        return rows[np.argsort(-scores[rows], kind="stable")]
+
+    async def asimilarities(self, vector: Vector) -> Vector:
+        """
+        数据量较大时在线程中计算相似度，不阻塞事件循环；
+        期间有写入（行可能被移动）时结果作废，在事件循环中重新计算
+        """
+        rows = len(self)
+        if rows < SEARCH_THREAD_MIN_ROWS:
+            return self._similarities(vector)
+        generation = self.generation
+        scores = await asyncio.to_thread(
+            np.matmul, self.vectors[:rows], _normalize(vector)
+        )
+        if self.generation != generation:
+            return self._similarities(vector)
+        return scores
+
+    async def anear_vector(
+        self, vector: Vector, distance: float | None, limit: int
+    ) -> QueryReturn[Any, Any]:
+        if not len(self) or limit <= 0:
+            return QueryReturn(objects=[])
+        return self.near_vector(
+            vector, distance, limit, await self.asimilarities(vector)
+        )
+
+    async def ahybrid(
+        self,
+        query: str,
+        vector: Vector,
+        max_vector_distance: float | None,
+        limit: int,
+    ) -> QueryReturn[Any, Any]:
+        if not len(self) or limit <= 0:
+            return QueryReturn(objects=[])
+        similarities = await self.asimilarities(vector)
+        return self.hybrid(
+            query, vector, max_vector_distance, limit, similarities=similarities
+        )
+
+    def near_vector(
+        self,
+        vector: Vector,
+        distance: float | None,
+        limit: int,
+        similarities: Vector | None = None,
+    ) -> QueryReturn[Any, Any]:
+        if not len(self) or limit <= 0:
+            return QueryReturn(objects=[])
+        if similarities is None:
+            similarities = self._similarities(vector)
+        distances = 1 - similarities
+        rows = (
+            np.flatnonzero(distances <= distance)
+            if distance is not None
+            else np.arange(len(self))
+        )
+        rows = self._top(-distances, rows, limit)
+        return QueryReturn(
+            objects=[self._object(int(r), distance=float(distances[r])) for r in rows]
+        )
+
+    def _bm25_scores(self, query: str) -> Vector:
+        n = len(self)
+        scores = np.zeros(n, dtype=np.float32)
+        if not n:
+            return scores
+        doc_len = np.asarray(self.doc_len, dtype=np.float32)
+        avg_len = max(float(doc_len.mean()), 1.0)
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            rows = np.fromiter(posting.keys(), dtype=np.int64, count=len(posting))
+            tf = np.fromiter(posting.values(), dtype=np.float32, count=len(posting))
+            idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_len[rows] / avg_len)
+            scores[rows] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return scores
+
+    def bm25(self, query: str, limit: int) -> QueryReturn[Any, Any]:
+        if not len(self) or limit <= 0:
+            return QueryReturn(objects=[])
+        scores = self._bm25_scores(query)
+        rows = self._top(scores, np.flatnonzero(scores > 0), limit)
+        return QueryReturn(
+            objects=[self._object(int(r), score=float(scores[r])) for r in rows]
+        )
+
+    def hybrid(
+        self,
+        query: str,
+        vector: Vector,
+        max_vector_distance: float | None,
+        limit: int,
+        alpha: float = HYBRID_ALPHA,
+        similarities: Vector | None = None,
+    ) -> QueryReturn[Any, Any]:
+        """
+        向量结果（距离不超过 max_vector_distance）与 BM25 结果分别归一化到 [0, 1]，
+        按 alpha * 向量 + (1 - alpha) * 关键字 融合
+        """
+        if not len(self) or limit <= 0:
+            return QueryReturn(objects=[])
+        if similarities is None:
+            similarities = self._similarities(vector)
+        keyword = self._bm25_scores(query)
+        fused = np.zeros(len(self), dtype=np.float32)
+
+        vector_rows = (
+            np.flatnonzero(1 - similarities <= max_vector_distance)
+            if max_vector_distance is not None
+            else np.arange(len(self))
+        )
+        if len(vector_rows):
+            fused[vector_rows] += alpha * _min_max(similarities[vector_rows])
+        keyword_rows = np.flatnonzero(keyword > 0)
+        if len(keyword_rows):
+            fused[keyword_rows] += (1 - alpha) * _min_max(keyword[keyword_rows])
+
+        rows = self._top(fused, np.union1d(vector_rows, keyword_rows), limit)
+        return QueryReturn(
+            objects=[self._object(int(r), score=float(fused[r])) for r in rows]
+        )
+
+    def _ordered_rows(self, ascending: bool) -> list[int]:
+        rows = sorted(range(len(self)), key=lambda r: (self.updated_ms[r], self.ids[r]))
+        return rows if ascending else rows[::-1]
+
+    def fetch_recent(
+        self, limit: int, offset: int = 0, include_vector: bool = False
+    ) -> QueryReturn[Any, Any]:
+        """
+        按更新时间倒序
+        """
+        rows = self._ordered_rows(ascending=False)[offset : offset + limit]
+        return QueryReturn(
+            objects=[self._object(r, include_vector=include_vector) for r in rows]
+        )
+
+    def fetch_after(
+        self, cursor: str | None, limit: int, include_vector: bool = False
+    ) -> QueryReturn[Any, Any]:
+        """
+        按 uuid 顺序的游标分页，与 weaviate 的 after 参数一致
+        """
+        ids = sorted(self.ids)
+        start = 0
+        if cursor:
+            start = next(
+                (i for i, uuid in enumerate(ids) if uuid > str(cursor)), len(ids)
+            )
+        return QueryReturn(
+            objects=[
+                self._object(self.rows[uuid], include_vector=include_vector)
+                for uuid in ids[start : start + limit]
+            ]
+        )
+
+    def fetch_keyset(
+        self, after: tuple[int, str] | None, ascending: bool, limit: int
+    ) -> QueryReturn[Any, Any]:
+        """
+        按 (更新时间, uuid) 排序，取位于 after 之后（不含）的 limit 条
+        """
+        objects: list[Object[Any, Any]] = []
+        for row in self._ordered_rows(ascending):
+            if len(objects) >= limit:
+                break
+            key = (self.updated_ms[row], self.ids[row])
+            if after is not None and (key <= after if ascending else key >= after):
+                continue
+            objects.append(self._object(row))
+        return QueryReturn(objects=objects)
+
+    def snapshot(self) -> TenantSnapshot:
+        """
+        在事件循环中复制当前数据（向量只复制有效行），之后的写入不影响快照
+        """
+        rows = len(self)
+        return {
+            "generation": self.generation,
+            "vectors": self.vectors[:rows].copy(),
+            "objects": {
+                "dim": self.dim,
+                "ids": list(self.ids),
+                "properties": [dict(p) for p in self.properties],
+                "created_ms": list(self.created_ms),
+                "updated_ms": list(self.updated_ms),
+            },
+        }
+
+    @staticmethod
+    def write_snapshot(path: str, snapshot: TenantSnapshot):
+        """
+        只做文件读写，可在线程中执行；写入临时文件后替换，中途失败不会破坏已有数据
+        """
+        os.makedirs(path, exist_ok=True)
+        vectors = snapshot["vectors"]
+        vectors_path = os.path.join(path, "vectors.f32")
+        objects_path = os.path.join(path, "objects.json")
+        with open(vectors_path + ".tmp", "wb") as f:
+            f.write(vectors.astype("<f4", copy=False).tobytes())
+        with open(objects_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(snapshot["objects"], f, ensure_ascii=False)
+        os.replace(vectors_path + ".tmp", vectors_path)
+        os.replace(objects_path + ".tmp", objects_path)
+
+    def mark_saved(self, generation: int):
+        if self.generation == generation:
+            self.dirty = False
+
+    def save(self, path: str):
+        snapshot = self.snapshot()
+        self.write_snapshot(path, snapshot)
+        self.mark_saved(snapshot["generation"])
+
+    @classmethod
+    def load(cls, path: str) -> "TenantIndex":
+        with open(os.path.join(path, "objects.json"), encoding="utf-8") as f:
+            data = json.load(f)
+        index = cls(data["dim"])
+        rows = len(data["ids"])
+        if not rows or not index.dim:
+            return index
+        vectors_path = os.path.join(path, "vectors.f32")
+        expected = rows * index.dim * 4
+        if os.path.getsize(vectors_path) != expected:
+            raise ValueError(
+                f"{vectors_path}: size {os.path.getsize(vectors_path)} != "
+                f"{rows} rows x {index.dim} dim"
+            )
+        vectors = np.memmap(
+            vectors_path,
+            dtype="<f4",
+            mode="r",
+            shape=(rows, index.dim),
+        )
+        index._reserve(rows)
+        index.vectors[:rows] = vectors
+        del vectors
+        index.ids = list(data["ids"])
+        index.rows = {uuid: row for row, uuid in enumerate(index.ids)}
+        index.properties = data["properties"]
+        index.created_ms = data["created_ms"]
+        index.updated_ms = data["updated_ms"]
+        index.terms = [Counter() for _ in range(rows)]
+        index.doc_len = [0] * rows
+        for row, properties in enumerate(index.properties):
+            index._index_terms(row, str(properties.get("summary") or ""))
+        return index
+
+
+class NumpySummaryStore:
+    """
+    所有租户的进程内存储，path 为空时仅保存在内存中；
+    否则启动时加载 path 下的租户目录，写入后标记为 dirty，由 flush 批量落盘
+    """
+
+    def __init__(self, path: str | None = None, flush_interval: float = 10):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.tenants: dict[str, TenantIndex] = {}
+        self._task: asyncio.Task[None] | None = None
+        self._stopping = asyncio.Event()
+
+    def _tenant_path(self, tenant_name: str) -> str:
+        assert self.path
+        return os.path.join(self.path, tenant_name)
+
+    def load(self):
+        if not self.path or not os.path.isdir(self.path):
+            return
+        for name in sorted(os.listdir(self.path)):
+            tenant_path = self._tenant_path(name)
+            if not os.path.exists(os.path.join(tenant_path, "objects.json")):
+                continue
+            try:
+                self.tenants[name] = TenantIndex.load(tenant_path)
+            except (OSError, ValueError, KeyError) as e:
+                # 不跳过损坏的租户：继续运行会在下次落盘时覆盖磁盘上仅存的数据
+                raise RuntimeError(
+                    f"failed to load numpy store tenant {name!r} from {tenant_path}"
+                ) from e
+        print(f"numpy store loaded {len(self.tenants)} tenants")
+
+    def flush(self):
+        """
+        同步落盘，用于关闭时（事件循环中不再有写入）
+        """
+        if not self.path:
+            return
+        for name, index in list(self.tenants.items()):
+            if index.dirty:
+                index.save(self._tenant_path(name))
+
+    async def aflush(self):
+        """
+        在事件循环中取快照，文件写入放到线程中执行，期间的写入留待下次落盘
+        """
+        if not self.path:
+            return
+        for name, index in list(self.tenants.items()):
+            if not index.dirty:
+                continue
+            snapshot = index.snapshot()
+            path = self._tenant_path(name)
+            await asyncio.to_thread(TenantIndex.write_snapshot, path, snapshot)
+            if self.tenants.get(name) is not index:
+                # 写入期间租户被删除，清理刚写入的目录
+                await asyncio.to_thread(shutil.rmtree, path, True)
+                continue
+            index.mark_saved(snapshot["generation"])
+
+    async def _flush_loop(self):
+        # 不取消正在进行的落盘（线程中的写入无法中断），停止时等待本轮结束并再落盘一次
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.flush_interval)
+            except TimeoutError:
+                pass
+            try:
+                await self.aflush()
+            except OSError as e:
+                logging.exception(e)
+
+    def start(self):
+        self.load()
+        if self.path and self.flush_interval > 0:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._stopping.set()
+            await self._task
+            self._task = None
+        self.flush()
+
+    def create_tenant(self, tenant_name: str):
+        if not _TENANT_NAME_RE.match(tenant_name):
+            raise ValueError(f"invalid tenant name: {tenant_name}")
+        if tenant_name not in self.tenants:
+            self.tenants[tenant_name] = TenantIndex()
+            self.tenants[tenant_name].touch()
+
+    def remove_tenant(self, tenant_name: str):
+        self.tenants.pop(tenant_name, None)
+        if self.path and os.path.isdir(self._tenant_path(tenant_name)):
+            shutil.rmtree(self._tenant_path(tenant_name))
+
+    def tenant(self, tenant_name: str) -> TenantIndex:
+        index = self.tenants.get(tenant_name)
+        if index is None:
+            raise ValueError(f"tenant {tenant_name} not found")
+        return index
+
+
+def delete_many_return(deleted: int) -> DeleteManyReturn[None]:
+    return DeleteManyReturn(failed=0, matches=deleted, objects=None, successful=deleted)
+
+
+store: NumpySummaryStore | None = None
+
+
+def init_numpy_store() -> NumpySummaryStore:
+    """
+    初始化进程内存储，应用启动时调用一次
+    """
+    global store
+    if store is None:
+        store = NumpySummaryStore(
+            path=os.getenv("NUMPY_STORE_DIR") or None,
+            flush_interval=float(os.getenv("NUMPY_STORE_FLUSH_INTERVAL", 10)),
+        )
+        store.start()
+    return store
+
+
+def get_numpy_store() -> NumpySummaryStore:
+    if store is None:
+        raise RuntimeError(
+            "Numpy store not initialized. Call init_numpy_store() first."
+        )
+    return store
+
+
+async def close_numpy_store():
+    """
+    关闭进程内存储，写入未落盘的数据
+    """
+    global store
+    if store is not None:
+        await store.stop()
+        store = None
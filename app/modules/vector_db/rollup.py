@@ -0,0 +1,250 @@
+"""
+摘要分层归并（章节）
+按轮次把连续的细粒度摘要归并为章节摘要（type=chapter，merged_summary 为各条原摘要），
+被归并的原摘要连同向量移入归档租户（<租户名>-archive），热租户只保留章节与近期摘要；
+搜索时先在热租户中检索章节，再到归档租户中按章节的轮次范围下钻。
+章节使用由租户与章节序号确定的 uuid，已被章节收录的原摘要不会再次归并，
+中途失败后重新执行只会补完未完成的步骤
+"""
+
+from collections.abc import Awaitable, Callable
+from typing import Any, TypedDict
+from uuid import NAMESPACE_URL, UUID, uuid5
+from app.ai_models.embeddings import aembed_documents, aembed_query
+from app.ai_models.embeddings.codec import as_vectors
+from app.schema.summary import (
+    MergedSummary,
+    SummaryDataModel,
+    SummarySearchModeEnum,
+    SummarySearchResult,
+    SummaryTypeEnum,
+)
+from .errors import DuplicateObjectError
+from .summary_repo import (
+    archive_tenant_name,
+    get_summary_repo,
+    get_summary_tenant_mgt,
+)
+
+# 章节摘要生成函数：输入按轮次排序的原摘要（已有章节时首条为旧章节摘要），返回章节摘要
+ChapterFn = Callable[[list[MergedSummary]], Awaitable[str]]
+
+
+class RollupResult(TypedDict):
+    tenant: str
+    chapters: int
+    archived: int
+    remaining: int
+
+
+class HierarchicalSearchResult(SummarySearchResult):
+    children: list[SummarySearchResult]
+
+
+def _chapter_uuid(tenant_name: str, chapter_turns: int, index: int) -> str:
+    return str(
+        uuid5(NAMESPACE_URL, f"rpg-mt/{tenant_name}/chapter/{chapter_turns}/{index}")
+    )
+
+
+def _merged_key(item: dict[str, Any]) -> tuple[Any, Any]:
+    return item.get("turn"), item.get("summary")
+
+
+def _turn_range(chapter: dict[str, Any]) -> tuple[int, int] | None:
+    turns = [
+        item["turn"]
+        for item in chapter.get("merged_summary") or []
+        if item.get("turn") is not None
+    ]
+    return (min(turns), max(turns)) if turns else None
+
+
+async def rollup_tenant(
+    tenant_name: str,
+    chapter_fn: ChapterFn,
+    chapter_turns: int = 50,
+    keep_turns: int = 20,
+    min_items: int = 3,
+    archive: bool = True,
+) -> RollupResult:
+    """
+    把轮次早于（最新轮次 - keep_turns）的摘要按 chapter_turns 轮一组归并为章节；
+    不足 min_items 条的组暂不归并；同一范围已有章节时，与未收录的新摘要一起重新生成，
+    已被章节收录的摘要不再归并；archive 为 false 时原摘要保留在热租户中
+    """
+    if chapter_turns < 1:
+        raise ValueError("chapter_turns must be >= 1")
+    repo = get_summary_repo(tenant_name)
+
+    fine: list[tuple[Any, Any]] = []
+    chapters: dict[int, list[Any]] = {}
+    max_turn: int | None = None
+    async for obj in repo.iterate(include_vector=archive):
+        turn = obj.properties.get("turn")
+        if turn is None:
+            continue
+        if obj.properties.get("type") == SummaryTypeEnum.chapter.value:
+            # 章节的 turn 为其轮次范围的起点
+            chapters.setdefault(turn // chapter_turns, []).append(obj)
+            continue
+        max_turn = turn if max_turn is None else max(max_turn, turn)
+        fine.append((obj, obj.vector.get("vector") if archive else None))
+
+    result: RollupResult = {
+        "tenant": tenant_name,
+        "chapters": 0,
+        "archived": 0,
+        "remaining": len(fine),
+    }
+    if max_turn is None:
+        return result
+
+    # 只归并已经完整结束的章节
+    cutoff = max_turn - keep_turns
+    groups: dict[int, list[tuple[Any, Any]]] = {}
+    for obj, vector in fine:
+        index = obj.properties["turn"] // chapter_turns
+        if (index + 1) * chapter_turns - 1 <= cutoff:
+            groups.setdefault(index, []).append((obj, vector))
+
+    archive_repo = None
+    if archive and groups:
+        archive_name = archive_tenant_name(tenant_name)
+        mgt = get_summary_tenant_mgt()
+        if not await mgt.has_tenant(archive_name):
+            await mgt.create_tenant(archive_name, archive=True)
+        archive_repo = get_summary_repo(archive_name)
+
+    for index in sorted(groups):
+        items = sorted(groups[index], key=lambda x: x[0].properties["turn"])
+        existing = chapters.get(index, [])
+        chapter_uuid = _chapter_uuid(tenant_name, chapter_turns, index)
+        old = next(
+            (c for c in existing if str(c.uuid) == chapter_uuid),
+            existing[0] if existing else None,
+        )
+        merged: list[MergedSummary] = []
+        covered: set[tuple[Any, Any]] = set()
+        for chapter in existing:
+            for item in chapter.properties.get("merged_summary") or []:
+                if _merged_key(item) not in covered:
+                    covered.add(_merged_key(item))
+                    merged.append(item)
+        new_items = [
+            (obj, vector)
+            for obj, vector in items
+            if _merged_key(obj.properties) not in covered
+        ]
+        if len(new_items) < min_items and not existing:
+            continue
+
+        if new_items:
+            children: list[MergedSummary] = [
+                {"summary": obj.properties["summary"], "turn": obj.properties["turn"]}
+                for obj, _ in new_items
+            ]
+            inputs: list[MergedSummary] = children
+            if old is not None:
+                previous: MergedSummary = {
+                    "summary": old.properties["summary"],
+                    "turn": None,
+                }
+                inputs = [previous] + children
+            content = await chapter_fn(inputs)
+            chapter_data: SummaryDataModel = {
+                "summary": content,
+                "turn": index * chapter_turns,
+                "type": SummaryTypeEnum.chapter,
+                "merged_summary": merged + children,
+            }
+            ids = await repo.add_summaries([chapter_data], uuids=[chapter_uuid])
+            if isinstance(ids[0], DuplicateObjectError):
+                await repo.replace_summary(chapter_uuid, chapter_data)
+            elif isinstance(ids[0], Exception):
+                raise ids[0]
+            result["chapters"] += 1
+
+        # 章节写入后再移走原摘要（含上次已收录、但未完成归档的）
+        uuids: list[UUID] = [obj.uuid for obj, _ in items]
+        if archive_repo is not None:
+            summaries: list[SummaryDataModel] = [
+                {
+                    "summary": obj.properties["summary"],
+                    "turn": obj.properties["turn"],
+                    "type": obj.properties.get("type"),
+                    "merged_summary": obj.properties.get("merged_summary"),
+                }
+                for obj, _ in items
+            ]
+            vectors = (
+                as_vectors([vector for _, vector in items])
+                if all(vector is not None for _, vector in items)
+                else await aembed_documents([item["summary"] for item in summaries])
+            )
+            res = await archive_repo.add_summaries(
+                summaries, vectors, [str(uuid) for uuid in uuids]
+            )
+            # 归档失败的摘要保留在热租户中；已在归档中（上次归档后删除失败）的照常删除
+            uuids = [
+                uuid
+                for uuid, r in zip(uuids, res)
+                if not isinstance(r, Exception) or isinstance(r, DuplicateObjectError)
+            ]
+            await repo.delete_summary_by_uuids(uuids)
+            result["archived"] += len(uuids)
+            result["remaining"] -= len(uuids)
+        # 旧的（随机 uuid 的）章节已合并到确定 uuid 的章节中
+        if new_items or old is not None and str(old.uuid) == chapter_uuid:
+            stale = [c.uuid for c in existing if str(c.uuid) != chapter_uuid]
+            if stale:
+                await repo.delete_summary_by_uuids(stale)
+
+    print(f"summary rollup: {result}")
+    return result
+
+
+async def hierarchical_search(
+    tenant_name: str,
+    query: str,
+    mode: SummarySearchModeEnum = SummarySearchModeEnum.similarity,
+    distance: float = 0.5,
+    top_k: int = 10,
+    drill_chapters: int = 3,
+    children_k: int = 5,
+) -> list[HierarchicalSearchResult]:
+    """
+    先在热租户中检索（章节与近期摘要），再对排名前 drill_chapters 的章节
+    到归档租户中检索，按章节的轮次范围筛选，每个章节附带最多 children_k 条原摘要
+    """
+    vector = (
+        await aembed_query(query) if mode != SummarySearchModeEnum.keyword else None
+    )
+    repo = get_summary_repo(tenant_name)
+    res = await repo.summary_search(query, mode, distance, top_k, vector)
+    data: list[HierarchicalSearchResult] = [
+        {**item, "children": []} for item in res["data"]
+    ]
+
+    drill = [
+        (item, turn_range)
+        for item in data
+        if item["type"] == SummaryTypeEnum.chapter.value
+        and (turn_range := _turn_range(dict(item)))
+    ][:drill_chapters]
+    archive_name = archive_tenant_name(tenant_name)
+    if not drill or not await get_summary_tenant_mgt().has_tenant(archive_name):
+        return data
+
+    archive_repo = get_summary_repo(archive_name)
+    # 各章节的下钻共用一次检索，候选数按章节数放大
+    archived = await archive_repo.summary_search(
+        query, mode, distance, children_k * len(drill) * 2, vector
+    )
+    for item, (start, end) in drill:
+        item["children"] = [
+            child
+            for child in archived["data"]
+            if child["turn"] is not None and start <= child["turn"] <= end
+        ][:children_k]
+    return data
@@ -1,20 +1,50 @@
+import os
+import asyncio
 import logging
-from fastapi import APIRouter, Body, Query, HTTPException
-from .summary_repo import SummaryTenantRepo, SummaryTenantMgt
-from app.schema.summary import SummarySearchModeEnum, SummaryTypeEnum
+import tempfile
+from uuid import UUID
+from fastapi import APIRouter, Body, File, Query, HTTPException, UploadFile
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from .summary_repo import (
+    get_summary_tenant_mgt,
+    get_summary_repo,
+    summary_repo_registry,
+    tenant_stats,
+    search_cache,
+    tenant_lifecycle,
+    SUMMARY_PROPERTIES,
+)
+from . import ingest
+from .snapshot import export_tenant, import_tenant
+from .dump import dump_tenant_stream
+from .rollup import hierarchical_search
+from app.schema.summary import SummaryCreate, SummarySearchModeEnum, SummaryTypeEnum
+from app.schema.base import SortOrderEnum
+from app.modules.chat.watermark import summary_watermarks
 
 router = APIRouter()
 
 
-@router.get("/summary/tenants", summary="获取所有租户")
-async def get_all_tenants():
+@router.get("/summary/tenants", summary="分页获取租户，支持按名称与状态过滤")
+async def get_all_tenants(
+    page: int = Query(1, ge=1, description="页码"),
+    size: int = Query(20, ge=1, le=500, description="每页数量"),
+    keyword: str | None = Query(None, description="租户名称包含的关键字"),
+    status: str | None = Query(None, description="活动状态，如 ACTIVE/INACTIVE"),
+):
     """
-    获取所有租户
+    分页获取租户，仅统计当前页租户的数据量。
+    响应为 {"total": 符合条件的租户数, "data": {租户名: 租户信息}}；
+    注意：此前不分页、一次返回全部租户（只有 data），现在默认只返回第一页的 20 个，
+    需要全部租户时按 total 翻页（size 最大 500）
     """
     try:
-        repo = SummaryTenantMgt()
-        tenants = await repo.get_tenants()
-        return {"data": tenants}
+        repo = get_summary_tenant_mgt()
+        res = await repo.get_tenants(
+            page=page, size=size, keyword=keyword, status=status
+        )
+        return res
     except Exception as e:
         logging.exception(e)
         raise HTTPException(status_code=500, detail=f"获取租户失败: {str(e)}")
@@ -28,9 +58,11 @@ async def create_tenant(
     新增租户
     """
     try:
-        repo = SummaryTenantMgt()
+        repo = get_summary_tenant_mgt()
         await repo.create_tenant(tenant_name)
         return {"message": f"租户 {tenant_name} 创建成功"}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logging.exception(e)
         raise HTTPException(status_code=500, detail=f"创建租户失败: {str(e)}")
@@ -42,14 +74,95 @@ async def delete_tenant(tenant_name: str):
     删除租户
     """
     try:
-        repo = SummaryTenantMgt()
+        repo = get_summary_tenant_mgt()
         await repo.remove_tenant(tenant_name)
+        # 同名租户重建后应从头摘要
+        await summary_watermarks.forget(tenant_name)
         return {"message": f"租户 {tenant_name} 删除成功"}
     except Exception as e:
         logging.exception(e)
         raise HTTPException(status_code=500, detail=f"删除租户失败: {str(e)}")
 
 
+@router.get("/summary/repos/stats", summary="租户仓库注册表与各类缓存统计")
+async def get_repo_registry_stats():
+    """
+    返回租户仓库注册表的容量、命中、未命中与淘汰次数，
+    以及租户数据量缓存、搜索结果缓存的命中情况、各冷热状态的租户数量
+    """
+    return {
+        "data": summary_repo_registry.stats(),
+        "tenant_counts": tenant_stats.stats(),
+        "search_cache": search_cache.stats(),
+        "tenant_lifecycle": tenant_lifecycle.stats(),
+        "ingest": ingest.ingest_queue.stats() if ingest.ingest_queue else None,
+    }
+
+
+@router.get("/summary/{tenant_name}/dump", summary="流式导出租户全部摘要（NDJSON）")
+async def dump_summaries(
+    tenant_name: str,
+    properties: str | None = Query(
+        None, description="返回的属性，逗号分隔，如 summary,turn；默认全部"
+    ),
+    batch_size: int | None = Query(
+        None, ge=1, le=10000, description="游标每批拉取的数量"
+    ),
+):
+    """
+    游标遍历租户，每个对象一行 NDJSON，内存占用与租户大小无关
+    """
+    names = None
+    if properties:
+        names = [name.strip() for name in properties.split(",") if name.strip()]
+        unknown = [name for name in names if name not in SUMMARY_PROPERTIES]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"未知属性: {unknown}")
+    return StreamingResponse(
+        dump_tenant_stream(tenant_name, names, batch_size),
+        media_type="application/x-ndjson",
+    )
+
+
+@router.get("/summary/{tenant_name}/export", summary="导出租户快照（含向量）")
+async def export_snapshot(tenant_name: str):
+    """
+    导出租户快照 zip：manifest.json + summaries.jsonl + vectors.f32
+    """
+    fd, path = tempfile.mkstemp(suffix=".snapshot.zip")
+    os.close(fd)
+    try:
+        await export_tenant(tenant_name, path)
+    except Exception as e:
+        os.unlink(path)
+        logging.exception(e)
+        raise HTTPException(status_code=500, detail=f"导出快照失败: {str(e)}")
+    return FileResponse(
+        path,
+        media_type="application/zip",
+        filename=f"{tenant_name}.snapshot.zip",
+        background=BackgroundTask(os.unlink, path),
+    )
+
+
+@router.post("/summary/{tenant_name}/import", summary="从快照导入租户摘要")
+async def import_snapshot(
+    tenant_name: str,
+    file: UploadFile = File(..., description="导出的快照文件"),
+    keep_ids: bool = Query(True, description="是否保留原 uuid"),
+):
+    """
+    使用快照中保存的向量批量写入，不需要重新向量化；租户不存在时自动创建
+    """
+    try:
+        return await import_tenant(file.file, tenant_name, keep_ids=keep_ids)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logging.exception(e)
+        raise HTTPException(status_code=500, detail=f"导入快照失败: {str(e)}")
+
+
 @router.post("/summary/{tenant_name}", summary="新增摘要")
 async def add_summary(
     tenant_name: str,
@@ -63,7 +176,7 @@ async def add_summary(
     新增摘要
     """
     try:
-        repo = SummaryTenantRepo(tenant_name)
+        repo = get_summary_repo(tenant_name)
         result = await repo.add_summary(summary, turn=turn, summary_type=summary_type)
         return {"message": "摘要添加成功", "id": result}
     except Exception as e:
@@ -71,6 +184,58 @@ async def add_summary(
         raise HTTPException(status_code=500, detail=f"新增摘要失败: {str(e)}")
 
 
+@router.post("/summary/{tenant_name}/bulk", summary="批量新增摘要（写入队列）")
+async def add_summaries(
+    tenant_name: str,
+    summaries: list[SummaryCreate] = Body(..., description="摘要列表"),
+    wait: bool = Body(True, description="是否等待写入完成并返回每条的结果"),
+):
+    """
+    批量新增摘要，经写入队列合并向量化与批量写入；
+    wait 为 false 时入队后立即返回。队列已满且等待超时时停止提交：
+    一条都未提交返回 503，否则返回已提交的前 accepted 条（它们会被写入），
+    其余 rejected 条未提交，可稍后重新提交
+    """
+    handles: list[asyncio.Future[UUID]] = []
+    rejected_reason = ""
+    try:
+        queue = ingest.get_ingest_queue()
+        for item in summaries:
+            handles.append(
+                await queue.submit(
+                    tenant_name, item.summary, turn=item.turn, summary_type=item.type
+                )
+            )
+    except TimeoutError:
+        if not handles:
+            raise HTTPException(status_code=503, detail="写入队列已满，请稍后重试")
+        rejected_reason = "写入队列已满，未提交"
+    except Exception as e:
+        logging.exception(e)
+        if not handles:
+            raise HTTPException(status_code=500, detail=f"新增摘要失败: {str(e)}")
+        rejected_reason = f"未提交: {str(e)}"
+
+    rejected = len(summaries) - len(handles)
+    message = "摘要已提交" if not rejected else f"仅提交了前 {len(handles)} 条摘要"
+    if not wait:
+        return {"message": message, "accepted": len(handles), "rejected": rejected}
+
+    results = await asyncio.gather(*handles, return_exceptions=True)
+    data = [
+        {"error": str(res)} if isinstance(res, BaseException) else {"id": str(res)}
+        for res in results
+    ]
+    failed = sum(1 for item in data if "error" in item)
+    data.extend({"error": rejected_reason} for _ in range(rejected))
+    return {
+        "message": "摘要添加完成" if not rejected else message,
+        "failed": failed,
+        "rejected": rejected,
+        "data": data,
+    }
+
+
 # 更新摘要
 @router.put("/summary/{tenant_name}/{summary_id}", summary="更新摘要")
 async def update_summary(
@@ -86,7 +251,7 @@ async def update_summary(
     更新摘要
     """
     try:
-        repo = SummaryTenantRepo(tenant_name)
+        repo = get_summary_repo(tenant_name)
         await repo.update_summary(
             summary_id, summary, turn=turn, summary_type=summary_type
         )
@@ -102,7 +267,7 @@ async def delete_summary(tenant_name: str, summary_id: str):
     删除摘要
     """
     try:
-        repo = SummaryTenantRepo(tenant_name)
+        repo = get_summary_repo(tenant_name)
         await repo.delete_summary(summary_id)
         return {"message": f"摘要 {summary_id} 删除成功"}
     except Exception as e:
@@ -122,7 +287,7 @@ async def get_summaries(
     获取摘要
     """
     try:
-        repo = SummaryTenantRepo(tenant_name)
+        repo = get_summary_repo(tenant_name)
         res = await repo.get_summaries(limit=limit)
         return res
     except Exception as e:
@@ -143,7 +308,7 @@ async def get_summaries_offset(
     获取摘要
     """
     try:
-        repo = SummaryTenantRepo(tenant_name)
+        repo = get_summary_repo(tenant_name)
         res = await repo.get_summaries_offset(size=size, page=page)
         return res
     except Exception as e:
@@ -164,7 +329,7 @@ async def get_summaries_by_cursor(
     基于游标的分页查询
     """
     try:
-        repo = SummaryTenantRepo(tenant_name)
+        repo = get_summary_repo(tenant_name)
         res = await repo.get_summaries_by_cursor(cursor=cursor, limit=limit)
         return res
     except Exception as e:
@@ -172,6 +337,34 @@ async def get_summaries_by_cursor(
         raise HTTPException(status_code=500, detail=f"获取摘要失败: {str(e)}")
 
 
+@router.get(
+    "/summary/{tenant_name}/keyset",
+    summary="按更新时间的 keyset 分页，token 为上一页返回的 next_token",
+)
+async def get_summaries_keyset(
+    tenant_name: str,
+    size: int = Query(10, ge=1, description="每页数量"),
+    token: str | None = Query(None, description="上一页返回的 next_token"),
+    order: SortOrderEnum = Query(
+        SortOrderEnum.desc, description="排序方向，仅首页生效，后续页沿用 token"
+    ),
+):
+    """
+    keyset 分页，每页开销不随页码增长
+    """
+    try:
+        repo = get_summary_repo(tenant_name)
+        res = await repo.get_summaries_keyset(
+            size=size, token=token, ascending=order == SortOrderEnum.asc
+        )
+        return res
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logging.exception(e)
+        raise HTTPException(status_code=500, detail=f"获取摘要失败: {str(e)}")
+
+
 @router.post(
     "/summary/{tenant_name}/search",
     summary="摘要搜索，支持关键字搜索、相似性搜索、混合搜索",
@@ -191,7 +384,7 @@ async def summary_search(
     """
     try:
         print(query, mode, distance, top_k)
-        repo = SummaryTenantRepo(tenant_name)
+        repo = get_summary_repo(tenant_name)
         res = await repo.summary_search(
             query=query, mode=mode, distance=distance, top_k=top_k
         )
@@ -199,3 +392,59 @@ async def summary_search(
     except Exception as e:
         logging.exception(e)
         raise HTTPException(status_code=500, detail=f"RAG搜索失败: {str(e)}")
+
+
+@router.post(
+    "/summary/{tenant_name}/search/batch",
+    summary="多查询融合搜索，批量向量化并发检索，RRF 融合并按 uuid 去重",
+)
+async def summary_multi_search(
+    tenant_name: str,
+    querys: list[str] = Body(..., description="查询内容列表"),
+    mode: SummarySearchModeEnum = Body(
+        SummarySearchModeEnum.similarity,
+        description="搜索模式 keyword/similarity/hybrid",
+    ),
+    distance: float = Body(0.5, description="相似度距离"),
+    top_k: int = Body(10, description="每个查询的返回数量"),
+    rrf_k: int = Body(60, description="RRF 平滑常数，越大排名差异的影响越小"),
+    limit: int | None = Body(None, description="融合后的返回数量，默认全部"),
+):
+    """
+    多查询融合搜索
+    """
+    try:
+        repo = get_summary_repo(tenant_name)
+        res = await repo.multi_search(
+            querys, mode=mode, distance=distance, top_k=top_k, rrf_k=rrf_k, limit=limit
+        )
+        return res
+    except Exception as e:
+        logging.exception(e)
+        raise HTTPException(status_code=500, detail=f"RAG搜索失败: {str(e)}")
+
+
+@router.post(
+    "/summary/{tenant_name}/search/hierarchical",
+    summary="分层搜索：先检索章节与近期摘要，再按章节轮次范围下钻归档摘要",
+)
+async def summary_hierarchical_search(
+    tenant_name: str,
+    query: str = Body(..., description="查询内容"),
+    mode: SummarySearchModeEnum = Body(
+        SummarySearchModeEnum.similarity,
+        description="搜索模式 keyword/similarity/hybrid",
+    ),
+    distance: float = Body(0.5, description="相似度距离"),
+    top_k: int = Body(10, description="返回数量"),
+    drill_chapters: int = Body(3, ge=0, description="下钻的章节数"),
+    children_k: int = Body(5, ge=1, description="每个章节附带的原摘要数量"),
+):
+    try:
+        data = await hierarchical_search(
+            tenant_name, query, mode, distance, top_k, drill_chapters, children_k
+        )
+        return {"total": len(data), "data": data}
+    except Exception as e:
+        logging.exception(e)
+        raise HTTPException(status_code=500, detail=f"RAG搜索失败: {str(e)}")
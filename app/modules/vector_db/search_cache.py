@@ -0,0 +1,116 @@
+import time
+from collections import OrderedDict
+from typing import Any, TypedDict
+
+SearchKey = tuple[str, str, str, float | None, int]
+
+
+class SearchCacheStats(TypedDict):
+    hits: int
+    misses: int
+    hit_rate: float
+    evictions: int
+    expired: int
+    stale: int
+    size: int
+    bytes: int
+    max_bytes: int
+
+
+class SearchResultCache:
+    """
+    摘要搜索结果缓存，键为 (tenant, mode, query, distance, top_k)。
+    每个租户维护一个写入版本号，写入/删除时递增，缓存项记录写入时的版本，
+    版本不一致即视为过期，不会返回旧数据；容量按估算字节数限制，LRU 淘汰，并有 TTL
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, ttl: float = 300):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.entries: OrderedDict[SearchKey, tuple[int, float, int, Any]] = (
+            OrderedDict()
+        )
+        self.versions: dict[str, int] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+        self.stale = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 and self.ttl > 0
+
+    def version(self, tenant_name: str) -> int:
+        return self.versions.get(tenant_name, 0)
+
+    def bump(self, tenant_name: str):
+        """
+        租户数据变更，使该租户已缓存的结果全部失效
+        """
+        self.versions[tenant_name] = self.version(tenant_name) + 1
+
+    def contains(self, key: SearchKey) -> bool:
+        """
+        是否存在可用的缓存项，不计入命中统计
+        """
+        entry = self.entries.get(key)
+        return (
+            entry is not None
+            and entry[0] == self.version(key[0])
+            and entry[1] > time.monotonic()
+        )
+
+    def get(self, key: SearchKey) -> Any | None:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        version, expires_at, _, value = entry
+        if version != self.version(key[0]):
+            self.stale += 1
+            self.misses += 1
+            self._remove(key)
+            return None
+        if expires_at <= time.monotonic():
+            self.expired += 1
+            self.misses += 1
+            self._remove(key)
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: SearchKey, version: int, value: Any, size: int):
+        """
+        version 为查询开始时的租户版本，查询期间发生写入时该结果不会被返回
+        """
+        if not self.enabled or size > self.max_bytes:
+            return
+        self._remove(key)
+        self.entries[key] = (version, time.monotonic() + self.ttl, size, value)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            old_key = next(iter(self.entries))
+            self._remove(old_key)
+            self.evictions += 1
+
+    def _remove(self, key: SearchKey):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[2]
+
+    def stats(self) -> SearchCacheStats:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+            "expired": self.expired,
+            "stale": self.stale,
+            "size": len(self.entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+        }
@@ -0,0 +1,269 @@
+"""
+租户快照导出/导入
+快照为 zip 包：
+  manifest.json    格式、版本、租户名、条数、向量维度
+  summaries.jsonl  每行一条摘要（uuid、属性与时间戳），deflate 压缩
+  vectors.f32      与 summaries.jsonl 行序一致的小端 float32 向量矩阵，不压缩
+导出时通过游标逐批读取（含向量），向量先写入临时文件，内存占用与租户大小无关；
+导入时按批读取 JSONL 与对应的向量行，使用保存的向量批量写入，不需要重新向量化；
+压缩与解压在线程中按批进行，不阻塞事件循环。
+导入时恢复创建与更新时间（NumPy 后端；Weaviate 的时间戳由服务端生成，无法恢复）
+"""
+
+import io
+import os
+import sys
+import json
+import shutil
+import asyncio
+import argparse
+import tempfile
+import zipfile
+from datetime import datetime
+from collections.abc import Iterator
+from typing import IO, Any, TypedDict
+from app.ai_models.embeddings.codec import VECTOR_DTYPE, Vector, as_vectors, decode_raw
+from app.schema.summary import SummaryDataModel
+from .summary_repo import (
+    STORE_BACKEND,
+    Timestamps,
+    get_summary_repo,
+    get_summary_tenant_mgt,
+)
+
+SNAPSHOT_FORMAT = "rpg-mt-summary-snapshot"
+SNAPSHOT_VERSION = 1
+# 导出时每批写入的条数
+EXPORT_BATCH_SIZE = 256
+
+
+class SnapshotManifest(TypedDict):
+    format: str
+    version: int
+    tenant: str
+    count: int
+    dim: int | None
+    dtype: str
+
+
+class SnapshotImportResult(TypedDict):
+    tenant: str
+    total: int
+    imported: int
+    failed: int
+    errors: list[str]
+
+
+def _to_ms(value: datetime | None) -> int | None:
+    return int(value.timestamp() * 1000) if value else None
+
+
+def _write_batch(
+    summaries_file: IO[bytes],
+    vectors_file: IO[bytes],
+    lines: list[str],
+    vectors: list[bytes],
+):
+    summaries_file.write("".join(lines).encode("utf-8"))
+    vectors_file.write(b"".join(vectors))
+
+
+def _write_vectors(zf: zipfile.ZipFile, vectors_file: IO[bytes]):
+    vectors_file.seek(0)
+    info = zipfile.ZipInfo("vectors.f32")
+    info.compress_type = zipfile.ZIP_STORED
+    with zf.open(info, "w", force_zip64=True) as f:
+        shutil.copyfileobj(vectors_file, f)
+
+
+def _read_batch(
+    summaries: Iterator[str], vectors_file: IO[bytes], batch_size: int, dim: int
+) -> tuple[list[dict[str, Any]], Vector]:
+    lines: list[dict[str, Any]] = []
+    for raw in summaries:
+        if raw.strip():
+            lines.append(json.loads(raw))
+            if len(lines) >= batch_size:
+                break
+    data = vectors_file.read(len(lines) * dim * 4)
+    return lines, decode_raw(data, (len(lines), dim))
+
+
+async def export_tenant(tenant_name: str, file: str | IO[bytes]) -> SnapshotManifest:
+    """
+    导出租户快照到 file（路径或可写的二进制文件对象）
+    """
+    repo = get_summary_repo(tenant_name)
+    count = 0
+    dim: int | None = None
+    with (
+        zipfile.ZipFile(file, "w", compression=zipfile.ZIP_DEFLATED) as zf,
+        tempfile.TemporaryFile() as vectors_file,
+    ):
+        with zf.open("summaries.jsonl", "w", force_zip64=True) as f:
+            lines: list[str] = []
+            vectors: list[bytes] = []
+            async for obj in repo.iterate(include_vector=True):
+                vector = as_vectors(obj.vector["vector"])
+                if dim is None:
+                    dim = vector.shape[0]
+                elif vector.shape[0] != dim:
+                    raise ValueError(f"object {obj.uuid} vector dim mismatch")
+                vectors.append(vector.tobytes())
+                line = {
+                    "uuid": str(obj.uuid),
+                    "summary": obj.properties.get("summary"),
+                    "turn": obj.properties.get("turn"),
+                    "type": obj.properties.get("type"),
+                    "merged_summary": obj.properties.get("merged_summary"),
+                    "created_ms": _to_ms(obj.metadata.creation_time),
+                    "updated_ms": _to_ms(obj.metadata.last_update_time),
+                }
+                lines.append(json.dumps(line, ensure_ascii=False) + "\n")
+                count += 1
+                if len(lines) >= EXPORT_BATCH_SIZE:
+                    await asyncio.to_thread(
+                        _write_batch, f, vectors_file, lines, vectors
+                    )
+                    lines, vectors = [], []
+            if lines:
+                await asyncio.to_thread(_write_batch, f, vectors_file, lines, vectors)
+
+        await asyncio.to_thread(_write_vectors, zf, vectors_file)
+
+        manifest: SnapshotManifest = {
+            "format": SNAPSHOT_FORMAT,
+            "version": SNAPSHOT_VERSION,
+            "tenant": tenant_name,
+            "count": count,
+            "dim": dim,
+            "dtype": VECTOR_DTYPE,
+        }
+        zf.writestr("manifest.json", json.dumps(manifest, ensure_ascii=False))
+    return manifest
+
+
+def read_manifest(zf: zipfile.ZipFile) -> SnapshotManifest:
+    manifest: SnapshotManifest = json.loads(zf.read("manifest.json"))
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError("not a summary snapshot")
+    if manifest.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"unsupported snapshot version: {manifest.get('version')}")
+    if manifest.get("dtype") != VECTOR_DTYPE:
+        raise ValueError(f"unsupported vector dtype: {manifest.get('dtype')}")
+    return manifest
+
+
+async def import_tenant(
+    file: str | IO[bytes],
+    tenant_name: str | None = None,
+    keep_ids: bool = True,
+    batch_size: int = 256,
+) -> SnapshotImportResult:
+    """
+    从快照导入，tenant_name 为空时导入到快照中的租户（不存在则创建）；
+    keep_ids 为 true 时保留原 uuid，目标租户中已存在的对象不覆盖，计为失败
+    （两种存储后端一致，错误为 DuplicateObjectError）
+    """
+    with await asyncio.to_thread(zipfile.ZipFile, file) as zf:
+        manifest = read_manifest(zf)
+        tenant_name = tenant_name or manifest["tenant"]
+        dim = manifest["dim"] or 0
+
+        mgt = get_summary_tenant_mgt()
+        if not await mgt.has_tenant(tenant_name):
+            await mgt.create_tenant(tenant_name)
+        repo = get_summary_repo(tenant_name)
+
+        result: SnapshotImportResult = {
+            "tenant": tenant_name,
+            "total": manifest["count"],
+            "imported": 0,
+            "failed": 0,
+            "errors": [],
+        }
+
+        async def write(lines: list[dict[str, Any]], vectors: Vector):
+            summaries: list[SummaryDataModel] = [
+                {
+                    "summary": line["summary"],
+                    "turn": line["turn"],
+                    "type": line["type"],
+                    "merged_summary": line["merged_summary"],
+                }
+                for line in lines
+            ]
+            uuids = [line["uuid"] for line in lines] if keep_ids else None
+            timestamps: list[Timestamps] = [
+                (line.get("created_ms"), line.get("updated_ms")) for line in lines
+            ]
+            for res in await repo.add_summaries(summaries, vectors, uuids, timestamps):
+                if isinstance(res, Exception):
+                    result["failed"] += 1
+                    # 只保留前若干条错误信息
+                    if len(result["errors"]) < 20:
+                        result["errors"].append(str(res))
+                else:
+                    result["imported"] += 1
+
+        with (
+            zf.open("summaries.jsonl") as summaries_file,
+            zf.open("vectors.f32") as vectors_file,
+        ):
+            summaries = iter(io.TextIOWrapper(summaries_file, encoding="utf-8"))
+            while True:
+                lines, vectors = await asyncio.to_thread(
+                    _read_batch, summaries, vectors_file, batch_size, dim
+                )
+                if not lines:
+                    break
+                await write(lines, vectors)
+
+    print(f"snapshot imported: {result}")
+    return result
+
+
+async def _main(argv: list[str]):
+    from app.vector_db import weaviate_client
+    from .numpy_store import init_numpy_store, close_numpy_store
+
+    parser = argparse.ArgumentParser(prog="python -m app.modules.vector_db.snapshot")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export_parser = sub.add_parser("export", help="导出租户快照")
+    export_parser.add_argument("tenants", nargs="+", help="租户名")
+    export_parser.add_argument("-o", "--output", default=".", help="输出目录")
+    import_parser = sub.add_parser("import", help="导入租户快照")
+    import_parser.add_argument("files", nargs="+", help="快照文件")
+    import_parser.add_argument("--tenant", help="导入到指定租户（仅单个文件时可用）")
+    import_parser.add_argument(
+        "--new-ids", action="store_true", help="不保留原 uuid，重新生成"
+    )
+    args = parser.parse_args(argv)
+    if args.command == "import" and args.tenant and len(args.files) > 1:
+        parser.error("--tenant can only be used with a single file")
+
+    if STORE_BACKEND == "numpy":
+        init_numpy_store()
+    else:
+        await weaviate_client.init_weaviate_client()
+    try:
+        if args.command == "export":
+            os.makedirs(args.output, exist_ok=True)
+            for tenant_name in args.tenants:
+                path = os.path.join(args.output, f"{tenant_name}.snapshot.zip")
+                manifest = await export_tenant(tenant_name, path)
+                print(f"{tenant_name}: {manifest['count']} objects -> {path}")
+        else:
+            for path in args.files:
+                await import_tenant(path, args.tenant, keep_ids=not args.new_ids)
+    finally:
+        if STORE_BACKEND == "numpy":
+            await close_numpy_store()
+        else:
+            await weaviate_client.close_weaviate_client()
+
+
+if __name__ == "__main__":
+    # python -m app.modules.vector_db.snapshot export <租户...> [-o 目录]
+    # python -m app.modules.vector_db.snapshot import <文件...> [--tenant 租户]
+    asyncio.run(_main(sys.argv[1:]))
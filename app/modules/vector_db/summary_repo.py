@@ -1,8 +1,25 @@
+import os
+import json
+import base64
+import asyncio
+import functools
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Awaitable, Callable
+from datetime import datetime, timezone
+from typing import Any, Concatenate, TypedDict, cast
 from uuid import UUID
 from weaviate.classes.config import DataType, Property
-from weaviate.classes.tenants import Tenant
+from weaviate.classes.tenants import (
+    Tenant,
+    TenantActivityStatus,
+    TenantUpdate,
+    TenantUpdateActivityStatus,
+)
+from weaviate.classes.data import DataObject
 from weaviate.classes.query import MetadataQuery, Sort, Filter, QueryNested
 from weaviate.collections.classes.grpc import PROPERTIES
+from weaviate.collections.classes.internal import Object, QueryReturn
 from app.schema.summary import (
     SummarySearchModeEnum,
     SummarySearchResult,
@@ -10,14 +27,188 @@ from app.schema.summary import (
     SummaryDataModel,
     MergedSummary,
     SummaryDataModelUpdate,
+    SummaryFusedResult,
+    SummaryMultiSearchResult,
 )
 from app.schema.api import ApiResponse
 from app.schema.summary import SummaryTypeEnum
 from app.vector_db.weaviate_client import get_weaviate_client
-from app.ai_models.embeddings import aembed_query
+from app.ai_models.embeddings import aembed_documents, aembed_query
+from app.ai_models.embeddings.codec import Vector
+from app.utils.metrics import timed
+from .errors import DuplicateObjectError
+from .tenant_stats import TenantStatsService
+from .search_cache import SearchKey, SearchResultCache
+from .tenant_lifecycle import TenantLifecycleManager
+from .numpy_store import TenantIndex, delete_many_return, get_numpy_store
 
 COLLECTION_NAME = "Summary"
 
+# 摘要存储后端：weaviate / numpy（进程内，见 numpy_store）
+STORE_BACKEND = os.getenv("SUMMARY_STORE_BACKEND", "weaviate").lower()
+# 摘要集合的全部属性
+SUMMARY_PROPERTIES = ["summary", "type", "turn", "merged_summary"]
+# 游标遍历时每批拉取的对象数
+ITERATOR_CACHE_SIZE = int(os.getenv("SUMMARY_ITERATOR_CACHE_SIZE", 500))
+
+
+def _return_properties(names: list[str]) -> PROPERTIES:
+    """
+    属性名转为查询的 return_properties，嵌套属性需要指定子属性
+    """
+    return [
+        QueryNested(name=name, properties=["summary", "turn"])
+        if name == "merged_summary"
+        else name
+        for name in names
+    ]
+
+
+def _vector(vector: Vector) -> list[float]:
+    """
+    weaviate 运行时直接接受 numpy 数组，这里只为满足其类型声明，不做转换
+    """
+    return cast(list[float], vector)
+
+
+def _to_summary_item(obj: Any) -> dict[str, Any]:
+    """
+    列表查询结果转换为接口返回的摘要数据
+    """
+    return {
+        "uuid": str(obj.uuid),
+        "summary": str(obj.properties["summary"]),
+        "turn": obj.properties.get("turn", None),
+        "type": obj.properties.get("type", None),
+        "merged_summary": obj.properties.get("merged_summary", None),
+        "created_at": (
+            obj.metadata.creation_time.astimezone().strftime("%Y-%m-%d %H:%M:%S")
+            if obj.metadata.creation_time
+            else None
+        ),
+        "updated_at": (
+            obj.metadata.last_update_time.astimezone().strftime("%Y-%m-%d %H:%M:%S")
+            if obj.metadata.last_update_time
+            else None
+        ),
+    }
+
+
+def _to_search_result(obj: Any) -> SummarySearchResult:
+    """
+    搜索结果转换为接口返回的摘要数据
+    """
+    return {
+        "uuid": str(obj.uuid),
+        "summary": obj.properties["summary"],
+        "turn": obj.properties.get("turn", None),
+        "type": obj.properties.get("type", None),
+        "merged_summary": obj.properties.get("merged_summary", None),
+        "created_at": (
+            obj.metadata.creation_time.astimezone().strftime("%Y-%m-%d %H:%M:%S")
+            if obj.metadata.creation_time
+            else None
+        ),
+        "updated_at": (
+            obj.metadata.last_update_time.astimezone().strftime("%Y-%m-%d %H:%M:%S")
+            if obj.metadata.last_update_time
+            else None
+        ),
+        "score": obj.metadata.score,
+        "distance": obj.metadata.distance,
+    }
+
+
+def _search_key(
+    tenant_name: str,
+    mode: SummarySearchModeEnum,
+    query: str,
+    distance: float | None,
+    top_k: int,
+) -> SearchKey:
+    return (tenant_name, mode.value, query, distance, top_k)
+
+
+def _estimate_size(res: QueryReturn[Any, Any]) -> int:
+    """
+    粗略估算搜索结果占用的内存字节数，用于缓存容量控制
+    """
+    return 256 + sum(1024 + 4 * len(str(obj.properties)) for obj in res.objects)
+
+
+def _to_ms(value: datetime | None) -> int:
+    return round(value.timestamp() * 1000) if value else 0
+
+
+# (创建时间, 更新时间) 毫秒，为空时使用写入时间
+Timestamps = tuple[int | None, int | None]
+
+# keyset 分页的位置：(更新时间毫秒, uuid)，uuid 保证同一毫秒内的顺序唯一
+KeysetPosition = tuple[int, str]
+
+
+def _keyset_page(
+    objects: list[Object[Any, Any]],
+    after: KeysetPosition | None,
+    ascending: bool,
+    limit: int,
+    complete: bool,
+) -> list[Object[Any, Any]] | None:
+    """
+    从按更新时间排序的 objects 中取位于 after 之后的 limit 条，按 (更新时间, uuid) 排序；
+    complete 为 false（读取被 limit 截断）时最后一毫秒的对象可能不全，不放入本页，
+    剩余不足 limit 条时返回 None，需要读取更多
+    """
+    keyed = sorted(
+        (
+            ((_to_ms(obj.metadata.last_update_time), str(obj.uuid)), obj)
+            for obj in objects
+        ),
+        key=lambda item: item[0],
+        reverse=not ascending,
+    )
+    if after is not None:
+        keyed = [
+            (key, obj)
+            for key, obj in keyed
+            if (key > after if ascending else key < after)
+        ]
+    if not complete and objects:
+        edge = _to_ms(objects[-1].metadata.last_update_time)
+        keyed = [(key, obj) for key, obj in keyed if key[0] != edge]
+        if len(keyed) < limit:
+            return None
+    return [obj for _, obj in keyed[:limit]]
+
+
+def _encode_keyset_token(position: KeysetPosition, ascending: bool) -> str:
+    payload = json.dumps({"t": position[0], "id": position[1], "asc": ascending})
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def _decode_keyset_token(token: str) -> tuple[KeysetPosition, bool]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+        return (int(payload["t"]), str(payload["id"])), bool(payload["asc"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("invalid keyset token") from e
+
+
+def _ensure_active[**P, R](
+    func: Callable[Concatenate["SummaryTenantRepo", P], Awaitable[R]],
+) -> Callable[Concatenate["SummaryTenantRepo", P], Awaitable[R]]:
+    """
+    访问租户前确保租户处于 HOT 状态（冷租户自动激活）并记录访问时间，调用结束前不会被转冷
+    """
+
+    @functools.wraps(func)
+    async def wrapper(self: "SummaryTenantRepo", *args: P.args, **kwargs: P.kwargs):
+        # 调用期间持有引用，租户不会因 LRU 超限被转冷
+        async with tenant_lifecycle.use(self.tenant_name):
+            return await func(self, *args, **kwargs)
+
+    return wrapper
+
 
 class SummaryCollection:
     def __init__(self):
@@ -47,69 +238,246 @@ class SummaryCollection:
         )
 
 
-class SummaryTenantMgt:
+# 章节归并的归档租户后缀（<租户名>-archive），用户租户不能使用
+ARCHIVE_SUFFIX = "-archive"
+# 租户名长度上限（Weaviate 与 numpy 后端一致），用户租户需为归档后缀留出长度
+TENANT_NAME_MAX_LENGTH = 64
+
+
+def archive_tenant_name(tenant_name: str) -> str:
+    return f"{tenant_name}{ARCHIVE_SUFFIX}"
+
+
+def is_archive_tenant(tenant_name: str) -> bool:
+    return tenant_name.endswith(ARCHIVE_SUFFIX)
+
+
+class SummaryTenantMgt(ABC):
     """
-    租户管理类，用于管理租户的创建、删除、获取等操作
+    租户管理类，用于管理租户的创建、删除、获取等操作；
+    存储后端实现 _create/_remove/_list_tenants
     """
 
-    def __init__(self):
-        self.client = get_weaviate_client()
-        self.collection = self.client.collections.get(COLLECTION_NAME)
+    @abstractmethod
+    async def _create(self, tenant_name: str): ...
+
+    @abstractmethod
+    async def _remove(self, tenant_name: str): ...
 
-    async def create_tenant(self, tenant_name: str):
+    @abstractmethod
+    async def _list_tenants(self) -> dict[str, str]:
         """
-        创建租户
+        返回 租户名 -> 活动状态
         """
-        await self.collection.tenants.create(tenants=[Tenant(name=tenant_name)])
+
+    async def has_tenant(self, tenant_name: str) -> bool:
+        return tenant_name in await self._list_tenants()
+
+    async def create_tenant(self, tenant_name: str, archive: bool = False):
+        """
+        创建租户，archive 为 true 时创建归档租户（后缀保留给归档租户）
+        """
+        if is_archive_tenant(tenant_name) != archive:
+            raise ValueError(
+                f"租户名称 {tenant_name} 不可用，后缀 {ARCHIVE_SUFFIX} 保留给归档租户"
+            )
+        max_length = TENANT_NAME_MAX_LENGTH - (0 if archive else len(ARCHIVE_SUFFIX))
+        if len(tenant_name) > max_length:
+            raise ValueError(f"租户名称 {tenant_name} 过长，最多 {max_length} 个字符")
+        await self._create(tenant_name)
+
+    async def _remove_one(self, tenant_name: str):
+        await self._remove(tenant_name)
+        summary_repo_registry.discard(tenant_name)
+        tenant_lifecycle.forget(tenant_name)
+        tenant_stats.invalidate(tenant_name)
+        search_cache.bump(tenant_name)
 
     async def remove_tenant(self, tenant_name: str):
         """
-        删除租户
+        删除租户，连同其归档租户一起删除（同名租户重建后不会检索到旧数据）
         """
-        await self.collection.tenants.remove(tenant_name)
+        await self._remove_one(tenant_name)
+        archive_name = archive_tenant_name(tenant_name)
+        if await self.has_tenant(archive_name):
+            await self._remove_one(archive_name)
 
-    async def get_tenants(self):
+    async def get_tenants(
+        self,
+        page: int = 1,
+        size: int = 20,
+        keyword: str | None = None,
+        status: str | None = None,
+    ):
         """
-        获取所有租户，并为每个租户添加数据量字段
+        分页获取租户，并为当前页的租户添加数据量字段，归档租户不列出。
+        keyword 按名称包含过滤，status 按活动状态过滤；
+        数据量通过统计服务并发获取并缓存，非活动租户不统计（为 None）
         """
-        tenants = await self.collection.tenants.get()
-        tenants_dict: dict[str, TenantInfo] = {}
+        assert page >= 1 and size >= 1
+        tenants = await self._list_tenants()
+        items = [
+            (key, tenant_status)
+            for key, tenant_status in sorted(tenants.items())
+            if not is_archive_tenant(key)
+            and (not keyword or keyword in key)
+            and (not status or tenant_status == status.upper())
+        ]
+        page_items = items[(page - 1) * size : page * size]
 
-        for key, tenant in tenants.items():
-            tenant_coll = self.collection.with_tenant(key)
-            data_count = await tenant_coll.length()
-            print(tenant)
+        active = [
+            key
+            for key, tenant_status in page_items
+            if tenant_status
+            in (TenantActivityStatus.ACTIVE.value, TenantActivityStatus.HOT.value)
+        ]
+        counts = await tenant_stats.count_many(active)
+
+        tenants_dict: dict[str, TenantInfo] = {}
+        for key, tenant_status in page_items:
             tenants_dict[key] = {
                 "name": key,
-                "data_count": data_count,
-                "activityStatus": tenant.activityStatus,
+                "data_count": counts.get(key),
+                "activityStatus": tenant_status,
             }
 
-        return tenants_dict
+        return {"total": len(items), "data": tenants_dict}
+
+
+class WeaviateSummaryTenantMgt(SummaryTenantMgt):
+    def __init__(self):
+        self.client = get_weaviate_client()
+        self.collection = self.client.collections.get(COLLECTION_NAME)
+
+    async def _create(self, tenant_name: str):
+        await self.collection.tenants.create(tenants=[Tenant(name=tenant_name)])
+
+    async def _remove(self, tenant_name: str):
+        await self.collection.tenants.remove(tenant_name)
+
+    async def _list_tenants(self) -> dict[str, str]:
+        tenants = await self.collection.tenants.get()
+        return {key: tenant.activityStatus.value for key, tenant in tenants.items()}
+
+
+class NumpySummaryTenantMgt(SummaryTenantMgt):
+    def __init__(self):
+        self.store = get_numpy_store()
 
+    async def _create(self, tenant_name: str):
+        self.store.create_tenant(tenant_name)
 
-class SummaryTenantRepo:
+    async def _remove(self, tenant_name: str):
+        await asyncio.to_thread(self.store.remove_tenant, tenant_name)
+
+    async def _list_tenants(self) -> dict[str, str]:
+        # 进程内存储没有冷热状态，租户始终可用
+        return {key: TenantActivityStatus.ACTIVE.value for key in self.store.tenants}
+
+
+class SummaryTenantRepo(ABC):
     """
-    摘要管理类，基于租户管理摘要的添加、获取、更新、删除等操作
+    摘要管理类，基于租户管理摘要的添加、获取、更新、删除等操作。
+    向量化、搜索缓存、数据量统计失效在此处理，存储后端实现以 _ 开头的抽象方法，
+    查询结果统一为 weaviate 的 Object/QueryReturn 结构
     """
 
     def __init__(self, tenant_name: str):
-        self.client = get_weaviate_client()
-        self.collection = self.client.collections.use(
-            COLLECTION_NAME, data_model_properties=SummaryDataModel
-        )
-        self.collection_update = self.client.collections.use(
-            COLLECTION_NAME, data_model_properties=SummaryDataModelUpdate
-        )
-        self.tenant_coll = self.collection.with_tenant(tenant_name)
-        self.tenant_coll_update = self.collection_update.with_tenant(tenant_name)
-        self.return_properties: PROPERTIES = [
-            "summary",
-            "type",
-            "turn",
-            QueryNested(name="merged_summary", properties=["summary", "turn"]),
-        ]
+        self.tenant_name = tenant_name
+
+    def stale(self) -> bool:
+        """
+        仓库持有的连接是否已失效，注册表据此重建
+        """
+        return False
+
+    @abstractmethod
+    async def length(self) -> int: ...
 
+    @abstractmethod
+    async def _insert(self, properties: SummaryDataModel, vector: Vector) -> UUID: ...
+
+    @abstractmethod
+    async def _insert_many(
+        self,
+        properties: list[SummaryDataModel],
+        vectors: Vector,
+        uuids: list[str] | None = None,
+        timestamps: list[Timestamps] | None = None,
+    ) -> list[UUID | Exception]:
+        """
+        批量写入，返回每条的 id 或失败原因，顺序与 properties 一致；
+        uuids 为指定的对象 id（恢复快照时保留原 id），为空时自动生成，
+        已存在的 id 不覆盖，该条返回 DuplicateObjectError；
+        timestamps 为每条的 (创建, 更新) 时间毫秒，不支持指定时间的后端忽略
+        """
+
+    @abstractmethod
+    def _iterate(
+        self, include_vector: bool, properties: list[str], cache_size: int
+    ) -> AsyncIterator[Object[Any, Any]]:
+        """
+        按 uuid 顺序遍历租户的全部对象，只返回 properties 中的属性
+        """
+
+    @abstractmethod
+    async def _update(
+        self, uuid: str, properties: SummaryDataModelUpdate, vector: Vector
+    ): ...
+
+    @abstractmethod
+    async def _replace(self, uuid: str, properties: SummaryDataModel, vector: Vector):
+        """
+        整体替换对象的属性与向量
+        """
+
+    @abstractmethod
+    async def _delete(self, uuid: str) -> bool: ...
+
+    @abstractmethod
+    async def _delete_many(self, uuids: list[str] | list[UUID]) -> Any: ...
+
+    @abstractmethod
+    async def _fetch_by_id(self, uuid: str) -> Any: ...
+
+    @abstractmethod
+    async def _fetch_recent(
+        self, limit: int, offset: int | None = None
+    ) -> QueryReturn[Any, Any]:
+        """
+        按更新时间倒序
+        """
+
+    @abstractmethod
+    async def _fetch_after(
+        self, cursor: str | None, limit: int
+    ) -> QueryReturn[Any, Any]:
+        """
+        按 uuid 顺序，从 cursor 之后开始
+        """
+
+    @abstractmethod
+    async def _fetch_keyset(
+        self, after: KeysetPosition | None, ascending: bool, limit: int
+    ) -> QueryReturn[Any, Any]:
+        """
+        按 (更新时间, uuid) 排序，取位于 after 之后（不含）的 limit 条
+        """
+
+    @abstractmethod
+    async def _bm25(self, query: str, top_k: int) -> QueryReturn[Any, Any]: ...
+
+    @abstractmethod
+    async def _near_vector(
+        self, vector: Vector, distance: float, top_k: int
+    ) -> QueryReturn[Any, Any]: ...
+
+    @abstractmethod
+    async def _hybrid(
+        self, query: str, vector: Vector, distance: float, top_k: int
+    ) -> QueryReturn[Any, Any]: ...
+
+    @_ensure_active
     async def add_summary(
         self,
         summary: str,
@@ -121,18 +489,59 @@ class SummaryTenantRepo:
         添加摘要，向量化，返回插入的id
         """
         summary_embed = await aembed_query(summary)
-        return await self.tenant_coll.data.insert(
-            properties={
+        res = await self._insert(
+            {
                 "summary": summary,
                 "turn": turn,
                 "type": summary_type,
                 "merged_summary": merged_summary,
             },
-            vector={
-                "vector": summary_embed,
-            },
+            summary_embed,
         )
+        tenant_stats.invalidate(self.tenant_name)
+        search_cache.bump(self.tenant_name)
+        return res
+
+    @_ensure_active
+    async def add_summaries(
+        self,
+        summaries: list[SummaryDataModel],
+        vectors: Vector | None = None,
+        uuids: list[str] | None = None,
+        timestamps: list[Timestamps] | None = None,
+    ) -> list[UUID | Exception]:
+        """
+        批量添加摘要，vectors 为预先计算好的向量（与 summaries 一一对应），
+        为空时一次批量向量化；返回每条的 id 或失败原因
+        """
+        if not summaries:
+            return []
+        if vectors is None:
+            vectors = await aembed_documents([item["summary"] for item in summaries])
+        res = await self._insert_many(summaries, vectors, uuids, timestamps)
+        tenant_stats.invalidate(self.tenant_name)
+        search_cache.bump(self.tenant_name)
+        return res
 
+    async def iterate(
+        self,
+        include_vector: bool = False,
+        properties: list[str] | None = None,
+        cache_size: int | None = None,
+    ) -> AsyncIterator[Object[Any, Any]]:
+        """
+        游标遍历租户的全部对象，每次拉取 cache_size 条，内存占用与租户大小无关；
+        properties 为返回的属性（投影），为空时返回全部属性
+        """
+        async with tenant_lifecycle.use(self.tenant_name):
+            async for obj in self._iterate(
+                include_vector,
+                properties or SUMMARY_PROPERTIES,
+                cache_size or ITERATOR_CACHE_SIZE,
+            ):
+                yield obj
+
+    @_ensure_active
     async def update_summary(
         self,
         uuid: str,
@@ -142,182 +551,474 @@ class SummaryTenantRepo:
     ):
         # 更新摘要
         summary_embed = await aembed_query(summary)
-        return await self.tenant_coll_update.data.update(
-            uuid=uuid,
-            properties={
+        res = await self._update(
+            uuid,
+            {
                 "summary": summary,
                 "turn": turn,
                 "type": summary_type,
             },
-            vector={
-                "vector": summary_embed,
-            },
+            summary_embed,
         )
+        search_cache.bump(self.tenant_name)
+        return res
+
+    @_ensure_active
+    async def replace_summary(
+        self, uuid: str, summary: SummaryDataModel, vector: Vector | None = None
+    ):
+        """
+        整体替换摘要（含 merged_summary），vector 为空时重新向量化
+        """
+        if vector is None:
+            vector = await aembed_query(summary["summary"])
+        await self._replace(uuid, summary, vector)
+        search_cache.bump(self.tenant_name)
 
+    @_ensure_active
     async def delete_summary(self, id: str):
-        return await self.tenant_coll.data.delete_by_id(id)
+        res = await self._delete(id)
+        tenant_stats.invalidate(self.tenant_name)
+        search_cache.bump(self.tenant_name)
+        return res
 
+    @_ensure_active
     async def delete_summary_by_uuids(self, uuids: list[str] | list[UUID]):
         """
         根据uuids删除摘要
         """
-        return await self.tenant_coll.data.delete_many(
-            where=Filter.by_id().contains_any(uuids)
-        )
+        res = await self._delete_many(uuids)
+        tenant_stats.invalidate(self.tenant_name)
+        search_cache.bump(self.tenant_name)
+        return res
 
+    @_ensure_active
     async def get_summary_by_id(self, id: str):
         """
         根据id获取摘要对象
         """
-        return await self.tenant_coll.query.fetch_object_by_id(id)
+        return await self._fetch_by_id(id)
 
+    @_ensure_active
     async def get_summaries(self, limit: int = 10):
         """
         获取所有摘要，limit为返回数量
         """
-        return await self.tenant_coll.query.fetch_objects(
-            sort=Sort.by_update_time(ascending=False),
-            limit=limit,
-            return_metadata=MetadataQuery.full(),
-            return_properties=self.return_properties,
-        )
+        return await self._fetch_recent(limit)
 
+    @_ensure_active
     async def get_summaries_offset(self, size: int = 10, page: int = 1):
         """
         获取所有摘要，offset分页形式，size为每页数量，page为页码
         """
         assert page >= 1 and size >= 1
-        total = await self.tenant_coll.length()
-        res = await self.tenant_coll.query.fetch_objects(
-            sort=Sort.by_update_time(ascending=False),
-            limit=size,
-            offset=(page - 1) * size,
-            return_metadata=MetadataQuery.full(),
-            return_properties=self.return_properties,
-        )
+        total = await tenant_stats.count(self.tenant_name)
+        res = await self._fetch_recent(size, (page - 1) * size)
 
-        res_data = []
-        for obj in res.objects:
-            res_data.append(
-                {
-                    "uuid": str(obj.uuid),
-                    "summary": str(obj.properties["summary"]),
-                    "turn": obj.properties.get("turn", None),
-                    "type": obj.properties.get("type", None),
-                    "merged_summary": obj.properties.get("merged_summary", None),
-                    "created_at": (
-                        obj.metadata.creation_time.astimezone().strftime(
-                            "%Y-%m-%d %H:%M:%S"
-                        )
-                        if obj.metadata.creation_time
-                        else None
-                    ),
-                    "updated_at": (
-                        obj.metadata.last_update_time.astimezone().strftime(
-                            "%Y-%m-%d %H:%M:%S"
-                        )
-                        if obj.metadata.last_update_time
-                        else None
-                    ),
-                }
-            )
+        res_data = [_to_summary_item(obj) for obj in res.objects]
 
         return {"total": total, "data": res_data}
 
+    @_ensure_active
     async def get_summaries_by_cursor(
         self, cursor: str | None = None, limit: int = 100
     ):
         """
         基于游标的分页查询，cursor为游标，limit为返回数量
         """
-        total = await self.tenant_coll.length()
-        res = await self.tenant_coll.query.fetch_objects(
-            limit=limit,
-            after=cursor,
-            return_metadata=MetadataQuery.full(),
-            return_properties=self.return_properties,
-        )
+        total = await tenant_stats.count(self.tenant_name)
+        res = await self._fetch_after(cursor, limit)
 
-        res_data = []
-        for obj in res.objects:
-            res_data.append(
-                {
-                    "uuid": str(obj.uuid),
-                    "summary": str(obj.properties["summary"]),
-                    "turn": obj.properties.get("turn", None),
-                    "type": obj.properties.get("type", None),
-                    "merged_summary": obj.properties.get("merged_summary", None),
-                    "created_at": (
-                        obj.metadata.creation_time.astimezone().strftime(
-                            "%Y-%m-%d %H:%M:%S"
-                        )
-                        if obj.metadata.creation_time
-                        else None
-                    ),
-                    "updated_at": (
-                        obj.metadata.last_update_time.astimezone().strftime(
-                            "%Y-%m-%d %H:%M:%S"
-                        )
-                        if obj.metadata.last_update_time
-                        else None
-                    ),
-                }
-            )
+        res_data = [_to_summary_item(obj) for obj in res.objects]
 
         return {"total": total, "data": res_data}
 
+    @_ensure_active
+    async def get_summaries_keyset(
+        self, size: int = 10, token: str | None = None, ascending: bool = False
+    ):
+        """
+        基于 (last_update_time, uuid) 的 keyset 分页，按更新时间排序，每页开销相同。
+        token 为上一页返回的 next_token（不透明，包含排序方向与本页最后一条的位置），
+        为空时从第一页开始；Weaviate 集合需要启用 index_timestamps
+        """
+        assert size >= 1
+        after: KeysetPosition | None = None
+        if token:
+            after, ascending = _decode_keyset_token(token)
+
+        total = await tenant_stats.count(self.tenant_name)
+        res = await self._fetch_keyset(after, ascending, size)
+
+        next_token = None
+        if len(res.objects) == size:
+            last = res.objects[-1]
+            next_token = _encode_keyset_token(
+                (_to_ms(last.metadata.last_update_time), str(last.uuid)), ascending
+            )
+
+        return {
+            "total": total,
+            "data": [_to_summary_item(obj) for obj in res.objects],
+            "next_token": next_token,
+        }
+
+    @_ensure_active
     async def summary_search(
         self,
         query: str,
         mode: SummarySearchModeEnum = SummarySearchModeEnum.similarity,
         distance: float = 0.5,
         top_k: int = 10,
+        vector: Vector | None = None,
     ):
         """
-        向量搜索，返回相似度最高的k个摘要，支持相似度搜索和混合搜索
+        向量搜索，返回相似度最高的k个摘要，支持相似度搜索和混合搜索；
+        vector 为预先计算好的查询向量，传入则不再向量化
         """
         res = None
         if mode == SummarySearchModeEnum.keyword:
             res = await self.keyword_search(query, top_k)
         elif mode == SummarySearchModeEnum.similarity:
-            res = await self.similarity_search(query, distance, top_k)
+            res = await self.similarity_search(query, distance, top_k, vector)
         elif mode == SummarySearchModeEnum.hybrid:
-            res = await self.hybrid_search(query, distance, top_k)
-
-        res_data: list[SummarySearchResult] = []
-        for obj in res.objects if res else []:
-            res_data.append(
-                {
-                    "uuid": str(obj.uuid),
-                    "summary": obj.properties["summary"],
-                    "turn": obj.properties.get("turn", None),
-                    "type": obj.properties.get("type", None),
-                    "merged_summary": obj.properties.get("merged_summary", None),
-                    "created_at": (
-                        obj.metadata.creation_time.astimezone().strftime(
-                            "%Y-%m-%d %H:%M:%S"
-                        )
-                        if obj.metadata.creation_time
-                        else None
-                    ),
-                    "updated_at": (
-                        obj.metadata.last_update_time.astimezone().strftime(
-                            "%Y-%m-%d %H:%M:%S"
-                        )
-                        if obj.metadata.last_update_time
-                        else None
-                    ),
-                    "score": obj.metadata.score,
-                    "distance": obj.metadata.distance,
-                }
-            )
+            res = await self.hybrid_search(query, distance, top_k, vector)
+
+        res_data = [_to_search_result(obj) for obj in res.objects] if res else []
 
         return ApiResponse(total=len(res_data), data=res_data)
 
+    @_ensure_active
+    async def multi_search(
+        self,
+        querys: list[str],
+        mode: SummarySearchModeEnum = SummarySearchModeEnum.similarity,
+        distance: float = 0.5,
+        top_k: int = 10,
+        rrf_k: int = 60,
+        limit: int | None = None,
+    ) -> SummaryMultiSearchResult:
+        """
+        多查询融合搜索：所有查询一次批量向量化，并发执行搜索，
+        使用 RRF（score = sum(1 / (rrf_k + rank))）融合排序并按 uuid 去重，
+        limit 为融合后返回数量
+        """
+        querys = list(dict.fromkeys(querys))
+        vectors: list[Vector | None] = [None] * len(querys)
+        if mode != SummarySearchModeEnum.keyword:
+            # 已缓存结果的查询不需要向量化
+            missing = [
+                i
+                for i, query in enumerate(querys)
+                if not search_cache.contains(
+                    _search_key(self.tenant_name, mode, query, distance, top_k)
+                )
+            ]
+            if missing:
+                embeds = await aembed_documents([querys[i] for i in missing])
+                for i, embed in zip(missing, embeds):
+                    vectors[i] = embed
+
+        results = await asyncio.gather(
+            *(
+                self.summary_search(query, mode, distance, top_k, vector)
+                for query, vector in zip(querys, vectors)
+            )
+        )
+
+        fused: dict[str, SummaryFusedResult] = {}
+        for query, res in zip(querys, results):
+            for rank, item in enumerate(res["data"], start=1):
+                score = 1 / (rrf_k + rank)
+                if item["uuid"] in fused:
+                    fused[item["uuid"]]["rrf_score"] += score
+                    fused[item["uuid"]]["queries"].append(query)
+                else:
+                    fused[item["uuid"]] = {
+                        **item,
+                        "rrf_score": score,
+                        "queries": [query],
+                    }
+
+        data = sorted(fused.values(), key=lambda x: x["rrf_score"], reverse=True)
+        if limit is not None:
+            data = data[:limit]
+
+        return {
+            "total": len(data),
+            "data": data,
+            "per_query": [
+                {"query": query, "summaries": res["data"]}
+                for query, res in zip(querys, results)
+            ],
+        }
+
+    async def _cached_search(
+        self,
+        mode: SummarySearchModeEnum,
+        query: str,
+        distance: float | None,
+        top_k: int,
+        fetch: Callable[[], Awaitable[QueryReturn[Any, Any]]],
+    ) -> QueryReturn[Any, Any]:
+        """
+        搜索结果缓存，查询开始前记录租户版本，期间发生写入的结果不会被复用
+        """
+        if not search_cache.enabled:
+            return await fetch()
+        key = _search_key(self.tenant_name, mode, query, distance, top_k)
+        res = search_cache.get(key)
+        if res is not None:
+            return res
+        version = search_cache.version(self.tenant_name)
+        res = await fetch()
+        search_cache.put(key, version, res, _estimate_size(res))
+        return res
+
+    @_ensure_active
     async def keyword_search(self, query: str, top_k: int = 10):
         """
         关键字搜索，返回包含关键字的摘要
         """
+        return await self._cached_search(
+            SummarySearchModeEnum.keyword,
+            query,
+            None,
+            top_k,
+            lambda: self._bm25(query, top_k),
+        )
+
+    @_ensure_active
+    async def similarity_search(
+        self,
+        query: str,
+        distance: float = 0.5,
+        top_k: int = 10,
+        vector: Vector | None = None,
+    ):
+        """
+        相似度搜索，返回相似度最高的k个摘要
+        """
+
+        async def fetch():
+            query_embed = vector if vector is not None else await aembed_query(query)
+            return await self._near_vector(query_embed, distance, top_k)
+
+        return await self._cached_search(
+            SummarySearchModeEnum.similarity, query, distance, top_k, fetch
+        )
+
+    @_ensure_active
+    async def hybrid_search(
+        self,
+        query: str,
+        distance: float = 0.5,
+        top_k: int = 10,
+        vector: Vector | None = None,
+    ):
+        """
+        混合搜索，返回相似度最高的k个摘要
+        """
+
+        async def fetch():
+            query_embed = vector if vector is not None else await aembed_query(query)
+            return await self._hybrid(query, query_embed, distance, top_k)
+
+        return await self._cached_search(
+            SummarySearchModeEnum.hybrid, query, distance, top_k, fetch
+        )
+
+
+class WeaviateSummaryTenantRepo(SummaryTenantRepo):
+    """
+    Weaviate 多租户集合实现
+    """
+
+    def __init__(self, tenant_name: str):
+        super().__init__(tenant_name)
+        self.client = get_weaviate_client()
+        self.collection = self.client.collections.use(
+            COLLECTION_NAME, data_model_properties=SummaryDataModel
+        )
+        self.collection_update = self.client.collections.use(
+            COLLECTION_NAME, data_model_properties=SummaryDataModelUpdate
+        )
+        self.tenant_coll = self.collection.with_tenant(tenant_name)
+        self.tenant_coll_update = self.collection_update.with_tenant(tenant_name)
+        self.return_properties = _return_properties(SUMMARY_PROPERTIES)
+        self._timestamps_indexed: bool | None = None
+
+    def stale(self) -> bool:
+        # 客户端重新初始化后，旧句柄失效
+        return self.client is not get_weaviate_client()
+
+    async def length(self) -> int:
+        return await self.tenant_coll.length()
+
+    @timed("weaviate", "insert")
+    async def _insert(self, properties: SummaryDataModel, vector: Vector) -> UUID:
+        return await self.tenant_coll.data.insert(
+            properties=properties,
+            vector={"vector": _vector(vector)},
+        )
+
+    @timed("weaviate", "insert")
+    async def _insert_many(
+        self,
+        properties: list[SummaryDataModel],
+        vectors: Vector,
+        uuids: list[str] | None = None,
+        timestamps: list[Timestamps] | None = None,
+    ) -> list[UUID | Exception]:
+        # 创建与更新时间由 Weaviate 写入时生成，无法指定，忽略 timestamps
+        results: list[UUID | Exception] = [
+            RuntimeError("not inserted") for _ in properties
+        ]
+        pending = list(range(len(properties)))
+        if uuids:
+            # insert_many 会覆盖已存在的 uuid，先查出已存在的，与 NumPy 后端一样报告为重复
+            existing = await self.tenant_coll.query.fetch_objects(
+                filters=Filter.by_id().contains_any(uuids),
+                limit=len(uuids),
+                return_properties=[],
+            )
+            exists = {str(obj.uuid) for obj in existing.objects}
+            for i in pending:
+                if uuids[i] in exists:
+                    results[i] = DuplicateObjectError(uuids[i])
+            pending = [i for i in pending if uuids[i] not in exists]
+        if not pending:
+            return results
+
+        res = await self.tenant_coll.data.insert_many(
+            [
+                DataObject(
+                    properties=properties[i],
+                    uuid=uuids[i] if uuids else None,
+                    vector={"vector": _vector(vectors[i])},
+                )
+                for i in pending
+            ]
+        )
+        for j, i in enumerate(pending):
+            error = res.errors.get(j)
+            uuid = res.uuids.get(j)
+            if error is not None or uuid is None:
+                message = error.message if error is not None else "not inserted"
+                results[i] = RuntimeError(message)
+            else:
+                results[i] = uuid
+        return results
+
+    async def _iterate(
+        self, include_vector: bool, properties: list[str], cache_size: int
+    ) -> AsyncIterator[Object[Any, Any]]:
+        async for obj in self.tenant_coll.iterator(
+            include_vector=include_vector,
+            return_metadata=MetadataQuery(creation_time=True, last_update_time=True),
+            return_properties=_return_properties(properties),
+            cache_size=cache_size,
+        ):
+            yield obj
+
+    @timed("weaviate", "update")
+    async def _update(
+        self, uuid: str, properties: SummaryDataModelUpdate, vector: Vector
+    ):
+        return await self.tenant_coll_update.data.update(
+            uuid=uuid,
+            properties=properties,
+            vector={"vector": _vector(vector)},
+        )
+
+    @timed("weaviate", "update")
+    async def _replace(self, uuid: str, properties: SummaryDataModel, vector: Vector):
+        await self.tenant_coll.data.replace(
+            uuid=uuid,
+            properties=properties,
+            vector={"vector": _vector(vector)},
+        )
+
+    @timed("weaviate", "delete")
+    async def _delete(self, uuid: str) -> bool:
+        return await self.tenant_coll.data.delete_by_id(uuid)
+
+    @timed("weaviate", "delete")
+    async def _delete_many(self, uuids: list[str] | list[UUID]) -> Any:
+        return await self.tenant_coll.data.delete_many(
+            where=Filter.by_id().contains_any(uuids)
+        )
+
+    async def _fetch_by_id(self, uuid: str) -> Any:
+        return await self.tenant_coll.query.fetch_object_by_id(uuid)
+
+    async def _fetch_recent(
+        self, limit: int, offset: int | None = None
+    ) -> QueryReturn[Any, Any]:
+        return await self.tenant_coll.query.fetch_objects(
+            sort=Sort.by_update_time(ascending=False),
+            limit=limit,
+            offset=offset,
+            return_metadata=MetadataQuery.full(),
+            return_properties=self.return_properties,
+        )
+
+    async def _fetch_after(
+        self, cursor: str | None, limit: int
+    ) -> QueryReturn[Any, Any]:
+        return await self.tenant_coll.query.fetch_objects(
+            limit=limit,
+            after=cursor,
+            return_metadata=MetadataQuery.full(),
+            return_properties=self.return_properties,
+        )
+
+    async def _check_timestamps_indexed(self):
+        """
+        keyset 分页按更新时间过滤，需要集合创建时启用 index_timestamps（之后不可修改）
+        """
+        if self._timestamps_indexed is None:
+            config = await self.collection.config.get()
+            self._timestamps_indexed = config.inverted_index_config.index_timestamps
+        if not self._timestamps_indexed:
+            raise ValueError(
+                f"集合 {COLLECTION_NAME} 未启用 index_timestamps，不支持 keyset 分页，"
+                "请使用 offset 或 cursor 分页，或重建集合后再使用"
+            )
+
+    async def _fetch_keyset(
+        self, after: KeysetPosition | None, ascending: bool, limit: int
+    ) -> QueryReturn[Any, Any]:
+        await self._check_timestamps_indexed()
+        # id 过滤不支持范围比较，按更新时间（含 after 所在的毫秒）过滤，
+        # 同一毫秒内已返回过的对象在客户端按 uuid 跳过
+        filters = None
+        if after is not None:
+            last_time = datetime.fromtimestamp(after[0] / 1000, tz=timezone.utc)
+            filters = (
+                Filter.by_update_time().greater_or_equal(last_time)
+                if ascending
+                else Filter.by_update_time().less_or_equal(last_time)
+            )
+        fetch = limit + 1
+        while True:
+            res = await self.tenant_coll.query.fetch_objects(
+                filters=filters,
+                sort=Sort.by_update_time(ascending=ascending),
+                limit=fetch,
+                return_metadata=MetadataQuery.full(),
+                return_properties=self.return_properties,
+            )
+            page = _keyset_page(
+                res.objects, after, ascending, limit, len(res.objects) < fetch
+            )
+            if page is not None:
+                return QueryReturn(objects=page)
+            # 同一毫秒的对象较多，扩大范围重新读取
+            fetch *= 2
+
+    @timed("weaviate", "search_keyword")
+    async def _bm25(self, query: str, top_k: int) -> QueryReturn[Any, Any]:
         return await self.tenant_coll.query.bm25(
             query=query,
             query_properties=["summary"],
@@ -326,15 +1027,12 @@ class SummaryTenantRepo:
             return_properties=self.return_properties,
         )
 
-    async def similarity_search(
-        self, query: str, distance: float = 0.5, top_k: int = 10
-    ):
-        """
-        相似度搜索，返回相似度最高的k个摘要
-        """
-        query_embed = await aembed_query(query)
+    @timed("weaviate", "search_similarity")
+    async def _near_vector(
+        self, vector: Vector, distance: float, top_k: int
+    ) -> QueryReturn[Any, Any]:
         return await self.tenant_coll.query.near_vector(
-            near_vector=query_embed,
+            near_vector=_vector(vector),
             limit=top_k,
             distance=distance,
             target_vector="vector",
@@ -342,18 +1040,263 @@ class SummaryTenantRepo:
             return_properties=self.return_properties,
         )
 
-    async def hybrid_search(self, query: str, distance: float = 0.5, top_k: int = 10):
-        """
-        混合搜索，返回相似度最高的k个摘要
-        """
-        query_embed = await aembed_query(query)
+    @timed("weaviate", "search_hybrid")
+    async def _hybrid(
+        self, query: str, vector: Vector, distance: float, top_k: int
+    ) -> QueryReturn[Any, Any]:
         return await self.tenant_coll.query.hybrid(
             query=query,
             query_properties=["summary"],
-            vector=query_embed,
+            vector=_vector(vector),
             target_vector="vector",
             max_vector_distance=distance,
             limit=top_k,
             return_metadata=MetadataQuery.full(),
             return_properties=self.return_properties,
         )
+
+
+class NumpySummaryTenantRepo(SummaryTenantRepo):
+    """
+    进程内 NumPy 实现，见 numpy_store；租户不存在时抛出 ValueError
+    """
+
+    def __init__(self, tenant_name: str):
+        super().__init__(tenant_name)
+        self.store = get_numpy_store()
+
+    def stale(self) -> bool:
+        return self.store is not get_numpy_store()
+
+    @property
+    def index(self) -> TenantIndex:
+        return self.store.tenant(self.tenant_name)
+
+    async def length(self) -> int:
+        return len(self.index)
+
+    @timed("numpy", "insert")
+    async def _insert(self, properties: SummaryDataModel, vector: Vector) -> UUID:
+        return self.index.insert(dict(properties), vector)
+
+    @timed("numpy", "insert")
+    async def _insert_many(
+        self,
+        properties: list[SummaryDataModel],
+        vectors: Vector,
+        uuids: list[str] | None = None,
+        timestamps: list[Timestamps] | None = None,
+    ) -> list[UUID | Exception]:
+        index = self.index
+        results: list[UUID | Exception] = []
+        for i, (item, vector) in enumerate(zip(properties, vectors)):
+            created_ms, updated_ms = timestamps[i] if timestamps else (None, None)
+            try:
+                results.append(
+                    index.insert(
+                        dict(item),
+                        vector,
+                        uuids[i] if uuids else None,
+                        created_ms,
+                        updated_ms,
+                    )
+                )
+            except ValueError as e:
+                # 向量维度不一致或 id 已存在
+                results.append(e)
+        return results
+
+    async def _iterate(
+        self, include_vector: bool, properties: list[str], cache_size: int
+    ) -> AsyncIterator[Object[Any, Any]]:
+        index = self.index
+        for uuid in sorted(index.ids):
+            obj = index.get(uuid, include_vector, properties)
+            # 遍历期间被删除的对象跳过
+            if obj is not None:
+                yield obj
+
+    @timed("numpy", "update")
+    async def _update(
+        self, uuid: str, properties: SummaryDataModelUpdate, vector: Vector
+    ):
+        self.index.update(uuid, dict(properties), vector)
+
+    @timed("numpy", "update")
+    async def _replace(self, uuid: str, properties: SummaryDataModel, vector: Vector):
+        # properties 包含全部属性，合并更新即整体替换
+        self.index.update(uuid, dict(properties), vector)
+
+    @timed("numpy", "delete")
+    async def _delete(self, uuid: str) -> bool:
+        return self.index.delete([uuid]) > 0
+
+    @timed("numpy", "delete")
+    async def _delete_many(self, uuids: list[str] | list[UUID]) -> Any:
+        return delete_many_return(self.index.delete([str(uuid) for uuid in uuids]))
+
+    async def _fetch_by_id(self, uuid: str) -> Any:
+        return self.index.get(uuid)
+
+    async def _fetch_recent(
+        self, limit: int, offset: int | None = None
+    ) -> QueryReturn[Any, Any]:
+        return self.index.fetch_recent(limit, offset or 0)
+
+    async def _fetch_after(
+        self, cursor: str | None, limit: int
+    ) -> QueryReturn[Any, Any]:
+        return self.index.fetch_after(cursor, limit)
+
+    async def _fetch_keyset(
+        self, after: KeysetPosition | None, ascending: bool, limit: int
+    ) -> QueryReturn[Any, Any]:
+        return self.index.fetch_keyset(after, ascending, limit)
+
+    @timed("numpy", "search_keyword")
+    async def _bm25(self, query: str, top_k: int) -> QueryReturn[Any, Any]:
+        return self.index.bm25(query, top_k)
+
+    @timed("numpy", "search_similarity")
+    async def _near_vector(
+        self, vector: Vector, distance: float, top_k: int
+    ) -> QueryReturn[Any, Any]:
+        return await self.index.anear_vector(vector, distance, top_k)
+
+    @timed("numpy", "search_hybrid")
+    async def _hybrid(
+        self, query: str, vector: Vector, distance: float, top_k: int
+    ) -> QueryReturn[Any, Any]:
+        return await self.index.ahybrid(query, vector, distance, top_k)
+
+
+class SummaryRepoRegistryStats(TypedDict):
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    evictions: int
+
+
+class SummaryRepoRegistry:
+    """
+    租户摘要仓库注册表，按租户名缓存 SummaryTenantRepo，LRU 淘汰，
+    避免每次请求重复创建集合与租户句柄
+    """
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self.repos: OrderedDict[str, SummaryTenantRepo] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, tenant_name: str) -> SummaryTenantRepo:
+        repo = self.repos.get(tenant_name)
+        # 客户端重新初始化后，旧句柄失效，需要重建
+        if repo is not None and not repo.stale():
+            self.repos.move_to_end(tenant_name)
+            self.hits += 1
+            return repo
+
+        self.misses += 1
+        repo = create_summary_repo(tenant_name)
+        if self.max_size <= 0:
+            return repo
+        self.repos[tenant_name] = repo
+        self.repos.move_to_end(tenant_name)
+        while len(self.repos) > self.max_size:
+            self.repos.popitem(last=False)
+            self.evictions += 1
+        return repo
+
+    def discard(self, tenant_name: str):
+        self.repos.pop(tenant_name, None)
+
+    def clear(self):
+        self.repos.clear()
+
+    def stats(self) -> SummaryRepoRegistryStats:
+        return {
+            "size": len(self.repos),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+summary_repo_registry = SummaryRepoRegistry(
+    max_size=int(os.getenv("SUMMARY_REPO_CACHE_SIZE", 1024))
+)
+
+
+async def _tenant_length(tenant_name: str) -> int:
+    return await get_summary_repo(tenant_name).length()
+
+
+search_cache = SearchResultCache(
+    max_bytes=int(os.getenv("SUMMARY_SEARCH_CACHE_BYTES", 64 * 1024 * 1024)),
+    ttl=float(os.getenv("SUMMARY_SEARCH_CACHE_TTL", 300)),
+)
+
+tenant_stats = TenantStatsService(
+    _tenant_length,
+    ttl=float(os.getenv("SUMMARY_COUNT_TTL", 300)),
+    concurrency=int(os.getenv("SUMMARY_COUNT_CONCURRENCY", 16)),
+    max_size=int(os.getenv("SUMMARY_COUNT_CACHE_SIZE", 10000)),
+)
+
+
+async def _load_tenant_statuses() -> dict[str, str]:
+    collection = get_weaviate_client().collections.use(COLLECTION_NAME)
+    tenants = await collection.tenants.get()
+    return {name: tenant.activityStatus.value for name, tenant in tenants.items()}
+
+
+async def _update_tenant_statuses(tenant_names: list[str], status: str):
+    collection = get_weaviate_client().collections.use(COLLECTION_NAME)
+    activity_status = TenantUpdateActivityStatus[status]
+    await collection.tenants.update(
+        [
+            TenantUpdate(name=name, activity_status=activity_status)
+            for name in tenant_names
+        ]
+    )
+
+
+tenant_lifecycle = TenantLifecycleManager(
+    _load_tenant_statuses,
+    _update_tenant_statuses,
+    enabled=STORE_BACKEND == "weaviate"
+    and os.getenv("SUMMARY_TENANT_LIFECYCLE", "false").lower() in ("1", "true", "yes"),
+    idle_seconds=float(os.getenv("SUMMARY_TENANT_IDLE_SECONDS", 1800)),
+    max_hot=int(os.getenv("SUMMARY_TENANT_MAX_HOT", 0)),
+    cold_status=os.getenv("SUMMARY_TENANT_COLD_STATUS", "COLD"),
+    sweep_interval=float(os.getenv("SUMMARY_TENANT_SWEEP_INTERVAL", 60)),
+)
+
+
+def create_summary_repo(tenant_name: str) -> SummaryTenantRepo:
+    """
+    按 SUMMARY_STORE_BACKEND 创建租户摘要仓库
+    """
+    if STORE_BACKEND == "numpy":
+        return NumpySummaryTenantRepo(tenant_name)
+    return WeaviateSummaryTenantRepo(tenant_name)
+
+
+def get_summary_tenant_mgt() -> SummaryTenantMgt:
+    """
+    按 SUMMARY_STORE_BACKEND 创建租户管理
+    """
+    if STORE_BACKEND == "numpy":
+        return NumpySummaryTenantMgt()
+    return WeaviateSummaryTenantMgt()
+
+
+def get_summary_repo(tenant_name: str) -> SummaryTenantRepo:
+    """
+    获取租户摘要仓库（注册表缓存）
+    """
+    return summary_repo_registry.get(tenant_name)
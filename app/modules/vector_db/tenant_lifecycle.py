@@ -0,0 +1,217 @@
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+
+HOT = "HOT"
+COLD = "COLD"
+OFFLOADED = "OFFLOADED"
+
+# weaviate 新旧两套状态名统一为 HOT/COLD/OFFLOADED
+_STATUS_ALIASES = {
+    "ACTIVE": HOT,
+    "HOT": HOT,
+    "INACTIVE": COLD,
+    "COLD": COLD,
+    "OFFLOADED": OFFLOADED,
+    "FROZEN": OFFLOADED,
+}
+
+LoadFn = Callable[[], Awaitable[dict[str, str]]]
+UpdateFn = Callable[[list[str], str], Awaitable[None]]
+
+
+def normalize_status(status: str) -> str:
+    return _STATUS_ALIASES.get(status.upper(), status.upper())
+
+
+class TenantLifecycleManager:
+    """
+    租户冷热管理：记录租户最近访问时间，空闲超过 idle_seconds 的租户转为 cold_status
+    （COLD 或 OFFLOADED），HOT 租户数量超过 max_hot 时按 LRU 转冷；
+    访问非 HOT 租户时自动激活，调用方无感知；
+    正在被访问（use 期间）的租户不会转冷
+    """
+
+    def __init__(
+        self,
+        load_fn: LoadFn,
+        update_fn: UpdateFn,
+        enabled: bool = False,
+        idle_seconds: float = 1800,
+        max_hot: int = 0,
+        cold_status: str = COLD,
+        sweep_interval: float = 60,
+    ):
+        self.load_fn = load_fn
+        self.update_fn = update_fn
+        self.enabled = enabled
+        self.idle_seconds = idle_seconds
+        self.max_hot = max_hot
+        self.cold_status = normalize_status(cold_status)
+        self.sweep_interval = sweep_interval
+        self.states: dict[str, str] = {}
+        # 仅记录 HOT 租户，按访问顺序排列（最久未访问的在前）
+        self.last_access: OrderedDict[str, float] = OrderedDict()
+        self._activating: dict[str, asyncio.Future[None]] = {}
+        # 进行中的访问数，大于 0 的租户不参与转冷
+        self.in_use: dict[str, int] = {}
+        # 串行化状态变更，激活请求不会与进行中的转冷请求乱序
+        self._update_lock = asyncio.Lock()
+        self._task: asyncio.Task[None] | None = None
+        self.activations = 0
+        self.deactivations = 0
+
+    async def startup(self):
+        if not self.enabled:
+            return
+        statuses = await self.load_fn()
+        now = time.monotonic()
+        for name, status in statuses.items():
+            self.states[name] = normalize_status(status)
+            if self.states[name] == HOT:
+                self.last_access[name] = now
+        self._task = asyncio.create_task(self._sweep_loop())
+
+    async def shutdown(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def touch(self, tenant_name: str):
+        self.states[tenant_name] = HOT
+        self.last_access[tenant_name] = time.monotonic()
+        self.last_access.move_to_end(tenant_name)
+
+    def forget(self, tenant_name: str):
+        """
+        租户被删除时调用
+        """
+        self.states.pop(tenant_name, None)
+        self.last_access.pop(tenant_name, None)
+
+    @asynccontextmanager
+    async def use(self, tenant_name: str) -> AsyncIterator[None]:
+        """
+        访问租户期间持有引用：进入时确保租户处于 HOT，退出前不会被转冷，退出时记录访问时间
+        """
+        if not self.enabled:
+            yield
+            return
+        self.in_use[tenant_name] = self.in_use.get(tenant_name, 0) + 1
+        try:
+            await self.ensure_active(tenant_name)
+            yield
+        finally:
+            count = self.in_use[tenant_name] - 1
+            if count:
+                self.in_use[tenant_name] = count
+            else:
+                del self.in_use[tenant_name]
+                if self.states.get(tenant_name) == HOT:
+                    self.touch(tenant_name)
+
+    async def ensure_active(self, tenant_name: str):
+        """
+        访问租户前调用：HOT 或未知（新建）租户只记录访问时间，其他状态先激活
+        """
+        if not self.enabled:
+            return
+        state = self.states.get(tenant_name)
+        if state is None or state == HOT:
+            self.touch(tenant_name)
+            return
+        await self._activate(tenant_name)
+
+    async def _activate(self, tenant_name: str):
+        # 同一租户的并发激活共享一次请求
+        future = self._activating.get(tenant_name)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._activating[tenant_name] = future
+        try:
+            async with self._update_lock:
+                await self.update_fn([tenant_name], HOT)
+            self.activations += 1
+            self.touch(tenant_name)
+            future.set_result(None)
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            self._activating.pop(tenant_name, None)
+
+        if self.max_hot and len(self.last_access) > self.max_hot:
+            overflow = len(self.last_access) - self.max_hot
+            names = [name for name in self.last_access if name not in self.in_use]
+            if names[:overflow]:
+                await self._deactivate(names[:overflow])
+
+    async def sweep(self):
+        """
+        将空闲超时的租户转冷
+        """
+        deadline = time.monotonic() - self.idle_seconds
+        idle = [
+            name
+            for name, ts in self.last_access.items()
+            if ts < deadline and name not in self.in_use
+        ]
+        if self.max_hot and len(self.last_access) - len(idle) > self.max_hot:
+            overflow = len(self.last_access) - len(idle) - self.max_hot
+            idle += [
+                name
+                for name in self.last_access
+                if name not in idle and name not in self.in_use
+            ][:overflow]
+        if idle:
+            await self._deactivate(idle)
+
+    async def _deactivate(self, tenant_names: list[str]):
+        # 先标记为冷状态，转冷期间到达的访问会排在其后重新激活
+        for name in tenant_names:
+            self.last_access.pop(name, None)
+            self.states[name] = self.cold_status
+        try:
+            async with self._update_lock:
+                await self.update_fn(tenant_names, self.cold_status)
+        except Exception as e:
+            logging.exception(e)
+            # 转冷失败则保持 HOT，下次清理时重试
+            for name in tenant_names:
+                if self.states.get(name) == self.cold_status:
+                    self.touch(name)
+            return
+        self.deactivations += len(tenant_names)
+        print(f"tenants -> {self.cold_status}: {tenant_names}")
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                logging.exception(e)
+
+    def stats(self):
+        counts: dict[str, int] = {HOT: 0, COLD: 0, OFFLOADED: 0}
+        for state in self.states.values():
+            counts[state] = counts.get(state, 0) + 1
+        return {
+            "enabled": self.enabled,
+            "states": counts,
+            "max_hot": self.max_hot,
+            "in_use": len(self.in_use),
+            "idle_seconds": self.idle_seconds,
+            "activations": self.activations,
+            "deactivations": self.deactivations,
+        }
@@ -0,0 +1,76 @@
+import time
+import asyncio
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+
+CountFn = Callable[[str], Awaitable[int]]
+
+
+class TenantStatsService:
+    """
+    租户数据量统计，按租户缓存数据量（ttl 秒过期，最多 max_size 个租户，LRU 淘汰），
+    写入/删除时由仓库主动失效；批量统计时以 concurrency 为上限并发查询，避免逐个串行 await。
+    每次查询带一个版本号，查询期间租户被失效时结果不写入缓存，避免旧值覆盖失效
+    """
+
+    def __init__(
+        self,
+        count_fn: CountFn,
+        ttl: float = 300,
+        concurrency: int = 16,
+        max_size: int = 10000,
+    ):
+        self.count_fn = count_fn
+        self.ttl = ttl
+        self.concurrency = max(1, concurrency)
+        self.max_size = max(1, max_size)
+        self.counts: OrderedDict[str, tuple[int, float]] = OrderedDict()
+        # 进行中的查询：租户 -> 版本号，只有最新且未被失效的查询可以写入缓存
+        self.pending: dict[str, int] = {}
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+
+    async def count(self, tenant_name: str) -> int:
+        cached = self.counts.get(tenant_name)
+        if cached is not None and cached[1] > time.monotonic():
+            self.hits += 1
+            self.counts.move_to_end(tenant_name)
+            return cached[0]
+        self.misses += 1
+        self.version += 1
+        version = self.pending[tenant_name] = self.version
+        try:
+            value = await self.count_fn(tenant_name)
+        finally:
+            current = self.pending.get(tenant_name) == version
+            if current:
+                del self.pending[tenant_name]
+        if current:
+            self.counts[tenant_name] = (value, time.monotonic() + self.ttl)
+            self.counts.move_to_end(tenant_name)
+            if len(self.counts) > self.max_size:
+                self.counts.popitem(last=False)
+        return value
+
+    async def count_many(self, tenant_names: list[str]) -> dict[str, int]:
+        sem = asyncio.Semaphore(self.concurrency)
+
+        async def one(name: str) -> int:
+            async with sem:
+                return await self.count(name)
+
+        values = await asyncio.gather(*(one(name) for name in tenant_names))
+        return dict(zip(tenant_names, values))
+
+    def invalidate(self, tenant_name: str):
+        self.counts.pop(tenant_name, None)
+        self.pending.pop(tenant_name, None)
+
+    def stats(self):
+        return {
+            "size": len(self.counts),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -5,6 +5,12 @@ from .models_enum import GptModelEnum, DeepSeekModelEnum
 from .summary import SummarySearchModeEnum
 
 
+ROLLUP_PROMPT = (
+    "以下是同一段剧情按轮次排列的多条摘要（JSONL，turn 为空的一条是此前的章节摘要），"
+    "请将它们归并为一份简洁、完整的章节摘要，保留关键人物、事件与伏笔：\n{summaries}"
+)
+
+
 class ChatParamsCommon(BaseModel):
     """通用的chat model参数模型，用于支持多个平台模型入参"""
 
@@ -42,6 +48,15 @@ class ChatParamsCommon(BaseModel):
     temperature: float = Field(default=0.9, description="模型温度，取值 0.0 ~ 1.0")
     max_tokens: int = Field(default=65536, description="最大令牌数", examples=[65536])
     streaming: bool = Field(default=True, description="是否启用流式处理")
+    context_budget: int | None = Field(
+        default=None,
+        ge=1,
+        description="上下文 token 预算（含系统提示词与预留部分），超出时裁剪较早的消息，为空时不裁剪",
+        examples=[None, 32000],
+    )
+    keep_recent_turns: int = Field(
+        default=4, ge=0, description="裁剪上下文时始终保留的最近轮数"
+    )
     # stop: List[str] = []
     # presence_penalty: int = 0
     # frequency_penalty: int = 0
@@ -98,6 +113,12 @@ class ChatParamsWriter(ChatParamsCommon):
     #     examples=["请根据以下剧情，生成一个摘要"],
     # )
 
+    memory_reserve_tokens: int = Field(
+        default=2000,
+        ge=0,
+        description="裁剪上下文时为检索到的记忆预留的 token 数（启用记忆检索时生效）",
+    )
+
     query_tool_prompt: str | None = Field(
         default=None,
         description="检索工具提示词，用于描述提供给LLM的检索工具",
@@ -152,6 +173,18 @@ class ChatParamsSummary(ChatParamsCommon):
         examples=[5],
     )
 
+    incremental: bool = Field(
+        default=False,
+        description="增量摘要：只摘要轮次大于该租户水位线（上次已摘要的最大轮次）的消息",
+        examples=[False],
+    )
+
+    rolling_context: bool = Field(
+        default=True,
+        description="增量摘要时是否附带滚动上下文（近期摘要的拼接），帮助模型衔接前文",
+        examples=[True],
+    )
+
     summary_merge_system_prompt: str | None = Field(
         default="",
         description="合并用系统提示词，用于指导模型合并摘要",
@@ -165,3 +198,56 @@ class ChatParamsSummary(ChatParamsCommon):
         description="合并提示词，用于指导模型合并摘要",
         examples=["请根据{summarys}历史摘要与{new_summary}新摘要，合并成新的摘要"],
     )
+
+    rollup_chapter_turns: int = Field(
+        default=0,
+        ge=0,
+        description="自动章节归并的每章轮数，摘要后按需在后台归并，0 表示不自动归并",
+        examples=[0, 50],
+    )
+
+    rollup_keep_turns: int = Field(
+        default=20,
+        ge=0,
+        description="自动章节归并时保留为细粒度摘要的近期轮数",
+        examples=[20],
+    )
+
+    rollup_prompt: str = Field(
+        default=ROLLUP_PROMPT,
+        description="章节归并提示词，{summaries} 为按轮次排列的摘要（JSONL）",
+    )
+
+
+class ChatParamsRollup(ChatParamsCommon):
+    """章节归并接口的参数模型，继承自ChatParamsCommon"""
+
+    sys_prompt: str = Field(
+        default="你是一个专业的剧情档案管理员。",
+        description="章节归并用系统提示词",
+    )
+
+    messages: List[RcBaseMessage] = Field(
+        default_factory=list, description="不使用，归并内容由摘要生成"
+    )
+
+    tenant_name: str = Field(..., description="租户名称", examples=["sessionId"])
+
+    rollup_prompt: str = Field(
+        default=ROLLUP_PROMPT,
+        description="章节归并提示词，{summaries} 为按轮次排列的摘要（JSONL）",
+    )
+
+    chapter_turns: int = Field(default=50, ge=1, description="每章的轮数")
+
+    keep_turns: int = Field(
+        default=20, ge=0, description="保留为细粒度摘要的近期轮数（不参与归并）"
+    )
+
+    min_items: int = Field(
+        default=3, ge=1, description="章节内摘要少于该数量时暂不归并"
+    )
+
+    archive: bool = Field(
+        default=True, description="是否把已归并的摘要移入归档租户（<租户名>-archive）"
+    )
@@ -0,0 +1,9 @@
+from enum import Enum
+
+
+class VectorFormatEnum(str, Enum):
+    """向量响应格式：json 浮点数组 / base64 打包的 float32 / binary 原始小端 float32"""
+
+    json = "json"
+    base64 = "base64"
+    binary = "binary"
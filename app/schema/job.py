@@ -0,0 +1,31 @@
+from enum import Enum
+from typing import Any, TypedDict
+
+
+class JobStatusEnum(str, Enum):
+    queued = "queued"
+    running = "running"
+    retrying = "retrying"
+    succeeded = "succeeded"
+    failed = "failed"
+
+
+class JobEvent(TypedDict):
+    status: JobStatusEnum
+    stage: str
+    attempt: int
+    time: float
+    error: str | None
+
+
+class JobInfo(TypedDict):
+    job_id: str
+    tenant_name: str
+    status: JobStatusEnum
+    stage: str
+    attempts: int
+    created_at: float
+    started_at: float | None
+    finished_at: float | None
+    result: Any | None
+    error: str | None
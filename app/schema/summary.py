@@ -1,5 +1,6 @@
 from typing import TypedDict
 from enum import Enum
+from pydantic import BaseModel, Field
 
 
 class SummarySearchModeEnum(str, Enum):
@@ -12,6 +13,8 @@ class SummaryTypeEnum(str, Enum):
     character = "character"
     summary = "summary"
     other = "other"
+    # 章节：按轮次范围归并的上层摘要
+    chapter = "chapter"
 
 
 class MergedSummary(TypedDict):
@@ -26,6 +29,18 @@ class SummaryDataModel(TypedDict):
     merged_summary: list[MergedSummary] | None
 
 
+class SummaryCreate(BaseModel):
+    """
+    批量写入的单条摘要
+    """
+
+    summary: str = Field(..., description="摘要内容")
+    turn: int | None = Field(None, description="对话轮次")
+    type: SummaryTypeEnum | None = Field(
+        SummaryTypeEnum.summary, description="摘要类型"
+    )
+
+
 class SummaryDataModelUpdate(TypedDict):
     summary: str
     turn: int | None
@@ -44,6 +59,22 @@ class SummarySearchResult(TypedDict):
     updated_at: str | None
 
 
+class SummaryFusedResult(SummarySearchResult):
+    rrf_score: float
+    queries: list[str]
+
+
+class SummaryQueryResult(TypedDict):
+    query: str
+    summaries: list[SummarySearchResult]
+
+
+class SummaryMultiSearchResult(TypedDict):
+    total: int
+    data: list[SummaryFusedResult]
+    per_query: list[SummaryQueryResult]
+
+
 class SummaryMemory(TypedDict):
     summary: str
     turn: int | None
@@ -51,5 +82,5 @@ class SummaryMemory(TypedDict):
 
 class TenantInfo(TypedDict):
     name: str
-    data_count: int
+    data_count: int | None
     activityStatus: str
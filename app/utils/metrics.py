@@ -0,0 +1,255 @@
+"""
+请求耗时与计数指标
+进程内的直方图与计数器，按 Prometheus 文本格式导出（GET /metrics）；
+每次记录只有一次字典查找、一次二分查找与几次加法，不加锁（单事件循环），可在生产环境常开，
+METRICS_ENABLED=0 时不记录
+"""
+
+import os
+import time
+import bisect
+import functools
+from collections.abc import Callable
+from types import CoroutineType
+from typing import Any
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+
+# 秒，覆盖从毫秒级的向量检索到分钟级的长文本生成
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+)
+RATE_BUCKETS = (1.0, 5.0, 10.0, 20.0, 30.0, 50.0, 75.0, 100.0, 150.0, 200.0, 500.0)
+
+Labels = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Labels, values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, doc: str, labels: Labels = ()):
+        self.name = name
+        self.doc = doc
+        self.labels = labels
+        self.values: dict[Labels, float] = {}
+
+    def inc(self, *labels: str, value: float = 1):
+        if METRICS_ENABLED:
+            self.values[labels] = self.values.get(labels, 0) + value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} counter"]
+        for labels, value in self.values.items():
+            lines.append(
+                f"{self.name}{_format_labels(self.labels, labels)} {_format_value(value)}"
+            )
+        return lines
+
+
+class Histogram:
+    """
+    每个标签组合保存各桶的计数（非累积，导出时累加）与总和
+    """
+
+    def __init__(
+        self,
+        name: str,
+        doc: str,
+        labels: Labels = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.doc = doc
+        self.labels = labels
+        self.buckets = buckets
+        # [桶 0..n-1, +Inf 桶, 总和]
+        self.series: dict[Labels, list[float]] = {}
+
+    def observe(self, value: float, *labels: str):
+        if not METRICS_ENABLED:
+            return
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0.0] * (len(self.buckets) + 2)
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} histogram"]
+        for labels, series in self.series.items():
+            total = 0.0
+            for bound, count in zip((*self.buckets, float("inf")), series):
+                total += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labels, labels, le)} "
+                    f"{_format_value(total)}"
+                )
+            suffix = _format_labels(self.labels, labels)
+            lines.append(f"{self.name}_sum{suffix} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{suffix} {_format_value(total)}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: list[Counter | Histogram] = []
+
+    def counter(self, name: str, doc: str, labels: Labels = ()) -> Counter:
+        metric = Counter(name, doc, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        doc: str,
+        labels: Labels = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        metric = Histogram(name, doc, labels, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+STAGE_SECONDS = metrics.histogram(
+    "rpg_stage_duration_seconds",
+    "Duration of request stages (memory query, embedding, vector db, summary merge)",
+    ("stage", "op"),
+)
+STAGE_ERRORS = metrics.counter(
+    "rpg_stage_errors_total", "Request stages that raised an exception", ("stage", "op")
+)
+LLM_TTFT_SECONDS = metrics.histogram(
+    "rpg_llm_time_to_first_token_seconds",
+    "Time from request start to the first generated token (including tool calls)",
+    ("endpoint",),
+)
+LLM_GENERATION_SECONDS = metrics.histogram(
+    "rpg_llm_generation_seconds", "Total generation time per request", ("endpoint",)
+)
+LLM_OUTPUT_TOKENS = metrics.counter(
+    "rpg_llm_output_tokens_total", "Generated output tokens", ("endpoint",)
+)
+LLM_TOKENS_PER_SECOND = metrics.histogram(
+    "rpg_llm_tokens_per_second",
+    "Output tokens per second after the first token",
+    ("endpoint",),
+    RATE_BUCKETS,
+)
+TOOL_CALLS = metrics.counter(
+    "rpg_tool_calls_total", "Agent tool calls", ("endpoint", "tool")
+)
+
+
+class stage:
+    """
+    记录一个阶段的耗时，同步与异步代码中都用 with：
+
+        with stage("weaviate", "search"):
+            res = await ...
+    """
+
+    __slots__ = ("labels", "start")
+
+    def __init__(self, name: str, op: str = ""):
+        self.labels = (name, op)
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        STAGE_SECONDS.observe(time.perf_counter() - self.start, *self.labels)
+        if exc_type is not None and not issubclass(exc_type, GeneratorExit):
+            STAGE_ERRORS.inc(*self.labels)
+        return False
+
+
+def timed[**P, R](
+    name: str, op: str = ""
+) -> Callable[
+    [Callable[P, CoroutineType[Any, Any, R]]], Callable[P, CoroutineType[Any, Any, R]]
+]:
+    """
+    异步函数装饰器，记录每次调用的耗时
+    """
+
+    def decorator(
+        func: Callable[P, CoroutineType[Any, Any, R]],
+    ) -> Callable[P, CoroutineType[Any, Any, R]]:
+        @functools.wraps(func)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            with stage(name, op):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class GenerationTimer:
+    """
+    一次模型生成的计时：首个 token 耗时、总耗时与输出速率（tokens/s）；
+    流式时每个 token 调用 token()，结束时调用 finish()
+    """
+
+    __slots__ = ("endpoint", "first", "start")
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.start = time.perf_counter()
+        self.first: float | None = None
+
+    def token(self):
+        if self.first is None:
+            self.first = time.perf_counter()
+
+    def finish(self, output_tokens: int = 0):
+        end = time.perf_counter()
+        # 非流式或没有输出时，首个 token 即整个响应，速率按总耗时计算
+        first = self.first if self.first is not None else end
+        LLM_TTFT_SECONDS.observe(first - self.start, self.endpoint)
+        LLM_GENERATION_SECONDS.observe(end - self.start, self.endpoint)
+        if output_tokens > 0:
+            LLM_OUTPUT_TOKENS.inc(self.endpoint, value=output_tokens)
+            elapsed = end - (self.first if self.first is not None else self.start)
+            if elapsed > 0:
+                LLM_TOKENS_PER_SECOND.observe(output_tokens / elapsed, self.endpoint)
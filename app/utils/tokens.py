@@ -0,0 +1,78 @@
+import os
+import asyncio
+import re
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Any
+
+# 每条消息的格式开销（角色与分隔符），与 OpenAI 的计数方式一致
+MESSAGE_OVERHEAD = 4
+
+_CJK_RE = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]")
+
+_encoding: Any | None = None
+_encoding_failed = False
+
+# 按内容哈希缓存的 token 数（历史消息每轮都会重复计数）
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 10000))
+_cache: OrderedDict[bytes, int] = OrderedDict()
+
+
+def _get_encoding():
+    """
+    加载 tiktoken 编码（TOKEN_ENCODING，默认 o200k_base，设为 estimate 时只做估算）；
+    首次加载需要下载词表，服务启动时由 init_token_encoding 在线程中完成，
+    离线或加载失败时返回 None，之后改用估算
+    """
+    global _encoding, _encoding_failed
+    if os.getenv("TOKEN_ENCODING") == "estimate":
+        _encoding_failed = True
+    if _encoding is None and not _encoding_failed:
+        try:
+            import tiktoken
+
+            _encoding = tiktoken.get_encoding(os.getenv("TOKEN_ENCODING", "o200k_base"))
+        except (ImportError, OSError, ValueError) as e:
+            # 未安装、下载失败或编码名无效
+            _encoding_failed = True
+            logging.warning(f"tiktoken unavailable, using estimated counts: {e!r}")
+    return _encoding
+
+
+async def init_token_encoding():
+    """
+    在线程中预先加载编码，避免第一次计数时在事件循环中下载词表
+    """
+    await asyncio.to_thread(_get_encoding)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    估算 token 数：中日韩字符按 1 个计，其余字符按 4 个计 1 个
+    """
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+    count = _cache.get(key)
+    if count is not None:
+        _cache.move_to_end(key)
+        return count
+    encoding = _get_encoding()
+    if encoding is None:
+        count = estimate_tokens(text)
+    else:
+        count = len(encoding.encode(text, disallowed_special=()))
+    _cache[key] = count
+    if len(_cache) > TOKEN_CACHE_SIZE:
+        _cache.popitem(last=False)
+    return count
+
+
+def count_message_tokens(contents: list[str]) -> int:
+    return sum(count_tokens(content) + MESSAGE_OVERHEAD for content in contents)
@@ -0,0 +1,76 @@
+"""
+嵌入请求合并（coalescer）的吞吐基准（不随应用加载）
+"""
+
+import sys
+import time
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Any
+from app.ai_models.embeddings.coalescer import (
+    BatchEmbedFn,
+    EmbeddingCoalescer,
+    coalesce_config,
+)
+
+
+async def bench_throughput():
+    """
+    吞吐对比：直接逐条请求 vs 合并请求。
+    默认使用模拟服务（4 个推理 worker，每次请求固定开销 + 每条文本计算耗时），
+    --live 时请求真实服务
+    """
+    live = "--live" in sys.argv
+    overhead, per_text = 0.01, 0.0002
+    workers = asyncio.Semaphore(4)
+
+    async def fake_batch(texts: list[str]) -> Any:
+        async with workers:
+            await asyncio.sleep(overhead + per_text * len(texts))
+        return [[0.0] * 4 for _ in texts]
+
+    async def fake_single(text: str) -> Any:
+        return (await fake_batch([text]))[0]
+
+    embed_batch: BatchEmbedFn = fake_batch
+    embed_single: Callable[[str], Awaitable[Any]] = fake_single
+    if live:
+        from app.ai_models.embeddings import init_embedding_backend
+
+        model = await init_embedding_backend()
+        embed_batch = model.embed_documents
+        embed_single = model.embed_query
+
+    window, max_batch = coalesce_config()
+    rounds = 512
+    print(f"window={window * 1000:.1f}ms max_batch={max_batch} live={live}")
+    for concurrency in (1, 16, 128):
+
+        async def run(
+            call: Callable[[int], Awaitable[Any]], concurrency: int = concurrency
+        ) -> float:
+            sem = asyncio.Semaphore(concurrency)
+
+            async def one(i: int):
+                async with sem:
+                    await call(i)
+
+            start = time.perf_counter()
+            await asyncio.gather(*(one(i) for i in range(rounds)))
+            return rounds / (time.perf_counter() - start)
+
+        coalescer = EmbeddingCoalescer(embed_batch, window, max_batch)
+        direct = await run(lambda i: embed_single(f"text {i}"))
+        merged = await run(
+            lambda i, coalescer=coalescer: coalescer.embed(f"text {i}", f"text {i}")
+        )
+        print(
+            f"concurrency={concurrency:>3} direct={direct:8.1f} req/s "
+            f"coalesced={merged:8.1f} req/s x{merged / direct:.2f} "
+            f"avg_batch={coalescer.stats()['avg_batch_size']:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    # python -m benchmarks.coalescer [--live]
+    asyncio.run(bench_throughput())
@@ -0,0 +1,28 @@
+"""
+指标记录开销基准（不随应用加载）
+"""
+
+import time
+from app.utils.metrics import STAGE_SECONDS, metrics, stage
+
+
+def bench_record(rounds: int = 1_000_000):
+    """
+    单次记录的开销
+    """
+    start = time.perf_counter()
+    for _ in range(rounds):
+        with stage("benchmark", "noop"):
+            pass
+    per_stage = (time.perf_counter() - start) / rounds * 1e9
+    start = time.perf_counter()
+    for _ in range(rounds):
+        STAGE_SECONDS.observe(0.01, "benchmark", "observe")
+    per_observe = (time.perf_counter() - start) / rounds * 1e9
+    print(f"stage: {per_stage:.0f}ns/次, observe: {per_observe:.0f}ns/次")
+    print(metrics.render()[:600])
+
+
+if __name__ == "__main__":
+    # python -m benchmarks.metrics
+    bench_record()
@@ -0,0 +1,54 @@
+"""
+进程内摘要存储（NumPy）的性能基准（不随应用加载）
+"""
+
+import time
+import asyncio
+import numpy as np
+from app.modules.vector_db.numpy_store import TenantIndex
+
+
+def bench_search():
+    """
+    暴力检索耗时：不同数据量下 near_vector / bm25 / hybrid 的单次查询耗时，
+    以及线程中计算相似度（anear_vector）的耗时
+    """
+    dim, top_k, rounds = 1024, 10, 20
+    rng = np.random.default_rng(0)
+    words = ["酒馆", "城镇", "主角", "战斗", "魔法", "旅行", "商人", "怪物"]
+    for n in (1000, 10000, 50000):
+        index = TenantIndex(dim)
+        vectors = rng.standard_normal((n, dim)).astype(np.float32)
+        for i in range(n):
+            text = "".join(rng.choice(words, 6))
+            index.insert({"summary": text, "turn": i}, vectors[i])
+        query = rng.standard_normal(dim).astype(np.float32)
+        for name, fn in (
+            (
+                "near_vector",
+                lambda index=index, query=query: index.near_vector(query, 1.0, top_k),
+            ),
+            ("bm25", lambda index=index: index.bm25("酒馆里的主角", top_k)),
+            (
+                "hybrid",
+                lambda index=index, query=query: index.hybrid(
+                    "酒馆里的主角", query, 1.0, top_k
+                ),
+            ),
+            (
+                "anear_vector",
+                lambda index=index, query=query: asyncio.run(
+                    index.anear_vector(query, 1.0, top_k)
+                ),
+            ),
+        ):
+            start = time.perf_counter()
+            for _ in range(rounds):
+                fn()
+            cost = (time.perf_counter() - start) / rounds
+            print(f"n={n:>6} {name:<12}: {cost * 1e3:8.2f} ms")
+
+
+if __name__ == "__main__":
+    # python -m benchmarks.numpy_store
+    bench_search()
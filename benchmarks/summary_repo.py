@@ -0,0 +1,84 @@
+"""
+摘要仓库的性能基准（不随应用加载）
+"""
+
+import sys
+import time
+import asyncio
+from app.modules.vector_db.summary_repo import (
+    SummaryRepoRegistry,
+    WeaviateSummaryTenantRepo,
+    get_summary_repo,
+)
+
+
+async def bench_registry():
+    """
+    单次请求的仓库创建开销：直接创建 vs 注册表获取（不需要连接 Weaviate）
+    """
+    import weaviate
+    from weaviate.connect import ConnectionParams
+    from app.vector_db import weaviate_client
+
+    weaviate_client.client = weaviate.WeaviateAsyncClient(
+        connection_params=ConnectionParams.from_url("http://127.0.0.1:4900", 50051),
+        skip_init_checks=True,
+    )
+    rounds, tenants = 20000, 100
+
+    start = time.perf_counter()
+    for i in range(rounds):
+        WeaviateSummaryTenantRepo(f"tenant-{i % tenants}")
+    direct = (time.perf_counter() - start) / rounds
+
+    registry = SummaryRepoRegistry(max_size=tenants)
+    start = time.perf_counter()
+    for i in range(rounds):
+        registry.get(f"tenant-{i % tenants}")
+    cached = (time.perf_counter() - start) / rounds
+
+    print(f"direct:   {direct * 1e6:8.2f} us/request")
+    print(f"registry: {cached * 1e6:8.2f} us/request  x{direct / cached:.1f}")
+    print(registry.stats())
+
+
+async def bench_pagination(tenant_name: str, size: int = 10):
+    """
+    offset 分页 vs keyset 分页在第 1/100/1000 页的单页耗时（需要连接 Weaviate，
+    租户数据量至少 size * 1000 条）
+    """
+    from app.vector_db import weaviate_client
+
+    await weaviate_client.init_weaviate_client()
+    try:
+        repo = get_summary_repo(tenant_name)
+        pages = (1, 100, 1000)
+        for page in pages:
+            start = time.perf_counter()
+            await repo.get_summaries_offset(size=size, page=page)
+            print(
+                f"offset page {page:>4}: {(time.perf_counter() - start) * 1e3:8.2f} ms"
+            )
+
+        token = None
+        for page in range(1, pages[-1] + 1):
+            start = time.perf_counter()
+            res = await repo.get_summaries_keyset(size=size, token=token)
+            cost = time.perf_counter() - start
+            if page in pages:
+                print(f"keyset page {page:>4}: {cost * 1e3:8.2f} ms")
+            token = res["next_token"]
+            if token is None:
+                print(f"keyset ended at page {page}")
+                break
+    finally:
+        await weaviate_client.close_weaviate_client()
+
+
+if __name__ == "__main__":
+    # python -m benchmarks.summary_repo            仓库创建开销
+    # python -m benchmarks.summary_repo paging <租户>  分页开销对比
+    if len(sys.argv) > 2 and sys.argv[1] == "paging":
+        asyncio.run(bench_pagination(sys.argv[2]))
+    else:
+        asyncio.run(bench_registry())
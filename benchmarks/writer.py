@@ -0,0 +1,38 @@
+"""
+写作 agent 构建与缓存的耗时基准（不随应用加载）
+"""
+
+import time
+from app.schema.chat import ChatParamsWriter
+from app.modules.chat.writer import WriterAgentCache, build_writer_agent
+
+
+def bench_agent_build(rounds: int = 50):
+    """
+    agent 构建耗时：每次编译 vs 缓存命中
+    """
+    params = ChatParamsWriter(
+        api_key="sk-benchmark",
+        messages=[],
+        tenant_name="benchmark",
+        enable_retriever=True,
+        enable_deep_think_tool=True,
+    )
+    start = time.perf_counter()
+    for _ in range(rounds):
+        build_writer_agent(params)
+    build_ms = (time.perf_counter() - start) / rounds * 1000
+
+    cache = WriterAgentCache()
+    cache.get(params)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        cache.get(params)
+    cached_ms = (time.perf_counter() - start) / rounds * 1000
+    print(f"create_agent: {build_ms:.2f}ms/次, 缓存命中: {cached_ms:.4f}ms/次")
+    print(cache.stats())
+
+
+if __name__ == "__main__":
+    # python -m benchmarks.writer
+    bench_agent_build()
@@ -0,0 +1,53 @@
+import asyncio
+from uuid import UUID, uuid4
+import pytest
+from fastapi import HTTPException
+from app.schema.summary import SummaryCreate
+from app.modules.vector_db import ingest, router_summary
+
+
+class _FullQueue:
+    """
+    接受前 capacity 条，之后提交超时
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.ids: list[UUID] = []
+
+    async def submit(self, tenant_name: str, summary: str, **kwargs):
+        if len(self.ids) >= self.capacity:
+            raise TimeoutError
+        self.ids.append(uuid4())
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(self.ids[-1])
+        return future
+
+
+def _summaries(count: int) -> list[SummaryCreate]:
+    return [SummaryCreate(summary=f"摘要 {i}", turn=i, type=None) for i in range(count)]
+
+
+@pytest.mark.asyncio
+async def test_partial_submit_returns_accepted_prefix(monkeypatch):
+    queue = _FullQueue(2)
+    monkeypatch.setattr(ingest, "get_ingest_queue", lambda: queue)
+
+    res = await router_summary.add_summaries("t1", _summaries(5), wait=True)
+    assert res["rejected"] == 3
+    assert res["failed"] == 0
+    assert [item.get("id") for item in res["data"][:2]] == [str(i) for i in queue.ids]
+    assert all("error" in item for item in res["data"][2:])
+
+    queue = _FullQueue(2)
+    monkeypatch.setattr(ingest, "get_ingest_queue", lambda: queue)
+    res = await router_summary.add_summaries("t1", _summaries(5), wait=False)
+    assert (res["accepted"], res["rejected"]) == (2, 3)
+
+
+@pytest.mark.asyncio
+async def test_nothing_accepted_is_503(monkeypatch):
+    monkeypatch.setattr(ingest, "get_ingest_queue", lambda: _FullQueue(0))
+    with pytest.raises(HTTPException) as exc:
+        await router_summary.add_summaries("t1", _summaries(3), wait=True)
+    assert exc.value.status_code == 503
@@ -0,0 +1,50 @@
+import pytest
+from app.schema.chat import RcBaseMessage, RoleEnum
+from app.modules.chat.context import pack_messages
+
+
+@pytest.fixture(autouse=True)
+def _estimate_tokens(monkeypatch):
+    monkeypatch.setenv("TOKEN_ENCODING", "estimate")
+
+
+def _turns(count: int, large: dict[int, int] | None = None) -> list[RcBaseMessage]:
+    large = large or {}
+    return [
+        RcBaseMessage(role=RoleEnum.user, content="x" * large.get(turn, 4), turn=turn)
+        for turn in range(1, count + 1)
+    ]
+
+
+def _kept_turns(packed: list[RcBaseMessage]) -> list[int]:
+    return [m.turn for m in packed if m.turn is not None]
+
+
+def test_stops_at_first_turn_that_does_not_fit():
+    # 第 12 轮放不下时，更早的（已被摘要覆盖的）轮次也不再放入
+    packed, report = pack_messages(
+        _turns(20, {12: 600}), 150, keep_recent_turns=4, covered_turn=9
+    )
+    assert _kept_turns(packed) == list(range(13, 21))
+    assert packed[0].turn is None
+    assert "第 1-12 轮" in packed[0].content
+    assert report["dropped_turns"] == list(range(1, 13))
+    assert report["covered_dropped"] == 9
+    assert report["packed_tokens"] <= 150
+    assert not report["over_budget"]
+
+
+def test_note_counts_against_budget():
+    packed, report = pack_messages(_turns(20), 60, keep_recent_turns=4)
+    kept = _kept_turns(packed)
+    # 保留的对话连续且包含最近的轮次
+    assert kept == list(range(kept[0], 21))
+    assert report["packed_tokens"] <= 60
+    assert not report["over_budget"]
+
+
+def test_no_note_when_everything_fits():
+    messages = _turns(10)
+    packed, report = pack_messages(messages, 10_000)
+    assert packed == messages
+    assert report["dropped_messages"] == 0
@@ -0,0 +1,53 @@
+import threading
+import numpy as np
+import pytest
+from app.ai_models.embeddings.cache import DiskVectorStore, EmbeddingCache
+
+
+def test_disk_store_survives_reopen(tmp_path):
+    store = DiskVectorStore(str(tmp_path), dim=4)
+    batch = np.arange(12, dtype=np.float32).reshape(3, 4)
+    store.put_many([(f"k{i}", batch[i]) for i in range(3)])
+    store.put("k0", np.ones(4, dtype=np.float32))
+
+    reopened = DiskVectorStore(str(tmp_path), dim=4)
+    assert len(reopened) == 3
+    vector = reopened.get("k1")
+    assert vector is not None
+    np.testing.assert_array_equal(vector, batch[1])
+
+
+def test_disk_store_get_while_put_grows_file(tmp_path):
+    store = DiskVectorStore(str(tmp_path), dim=8)
+    store.put("k0", np.zeros(8, dtype=np.float32))
+    errors: list[BaseException] = []
+
+    def reader():
+        try:
+            for _ in range(2000):
+                vector = store.get("k0")
+                assert vector is not None and vector.shape == (8,)
+        except (AssertionError, IndexError, OSError, ValueError) as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    for i in range(1, 500):
+        store.put(f"k{i}", np.full(8, i, dtype=np.float32))
+    thread.join()
+    assert errors == []
+    assert len(store) == 500
+
+
+@pytest.mark.asyncio
+async def test_cache_reads_back_from_disk_layer(tmp_path):
+    cache = EmbeddingCache(max_size=1, disk_path=str(tmp_path), dim=4)
+    batch = np.arange(8, dtype=np.float32).reshape(2, 4)
+    await cache.put_many([("a", batch[0]), ("b", batch[1])])
+
+    # 内存层只保留 b，a 从磁盘层读取并回填
+    vector = await cache.get("a")
+    assert vector is not None and not vector.flags.writeable
+    np.testing.assert_array_equal(vector, batch[0])
+    stats = cache.stats()
+    assert stats["disk_hits"] == 1 and stats["disk_size"] == 2
@@ -0,0 +1,53 @@
+import pytest
+from app.schema.chat import ChatParamsSummary
+from app.schema.job import JobStatusEnum
+from app.modules.chat.jobs import SummaryJobQueue
+from app.modules.chat.summary import ProgressFn
+
+
+def _params() -> ChatParamsSummary:
+    return ChatParamsSummary(summary_prompt="摘要", tenant_name="t1", messages=[])
+
+
+async def _wait(queue: SummaryJobQueue, job_id: str):
+    async for _ in queue.events(job_id):
+        pass
+    job = queue.get(job_id)
+    assert job is not None
+    return job
+
+
+@pytest.mark.asyncio
+async def test_retries_transient_error_before_saving():
+    calls = 0
+
+    async def run(params: ChatParamsSummary, progress: ProgressFn):
+        nonlocal calls
+        calls += 1
+        progress("summarizing")
+        if calls == 1:
+            raise TimeoutError("model timeout")
+        return "ok"
+
+    queue = SummaryJobQueue(run, backoff=0.001)
+    job = await _wait(queue, queue.submit(_params()).job_id)
+    await queue.close()
+    assert job.status == JobStatusEnum.succeeded
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_no_retry_after_saving_started():
+    calls = 0
+
+    async def run(params: ChatParamsSummary, progress: ProgressFn):
+        nonlocal calls
+        calls += 1
+        progress("saving")
+        raise TimeoutError("delete timeout")
+
+    queue = SummaryJobQueue(run, backoff=0.001)
+    job = await _wait(queue, queue.submit(_params()).job_id)
+    await queue.close()
+    assert job.status == JobStatusEnum.failed
+    assert calls == 1
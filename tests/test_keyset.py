@@ -0,0 +1,82 @@
+import random
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, cast
+from uuid import uuid4
+import pytest
+from weaviate.collections.classes.internal import MetadataReturn, Object, QueryReturn
+from app.modules.vector_db.summary_repo import WeaviateSummaryTenantRepo
+
+
+def _object(ms: int) -> Object:
+    return Object(
+        uuid=uuid4(),
+        metadata=MetadataReturn(
+            last_update_time=datetime.fromtimestamp(ms / 1000, tz=timezone.utc)
+        ),
+        properties={},
+        references=None,
+        vector={},
+        collection="Summary",
+    )
+
+
+def _ms(obj: Object) -> int:
+    return round(cast(datetime, obj.metadata.last_update_time).timestamp() * 1000)
+
+
+class _Query:
+    """
+    只按更新时间排序与过滤，同一毫秒内的顺序随机（不依赖服务端按 id 排序）
+    """
+
+    def __init__(self, objects: list[Object]):
+        self.objects = objects
+        self.rng = random.Random(0)
+
+    async def fetch_objects(self, filters, sort, limit, **kwargs) -> QueryReturn:
+        ascending = sort.sorts[0].ascending
+        objects = self.objects
+        if filters is not None:
+            at_least = filters.operator.value == "GreaterThanEqual"
+            objects = [
+                o
+                for o in objects
+                if (
+                    o.metadata.last_update_time >= filters.value
+                    if at_least
+                    else o.metadata.last_update_time <= filters.value
+                )
+            ]
+        objects = sorted(objects, key=lambda o: self.rng.random())
+        objects.sort(key=_ms, reverse=not ascending)
+        return QueryReturn(objects=objects[:limit])
+
+
+def _repo(objects: list[Object]) -> WeaviateSummaryTenantRepo:
+    repo: Any = object.__new__(WeaviateSummaryTenantRepo)
+    repo.tenant_coll = SimpleNamespace(query=_Query(objects))
+    repo.return_properties = None
+    repo._timestamps_indexed = True
+    return repo
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("ascending", [True, False])
+async def test_pages_through_objects_sharing_a_millisecond(ascending: bool):
+    # 大量对象落在同一毫秒，且跨越多个页边界
+    objects = [_object(1000) for _ in range(3)]
+    objects += [_object(2000) for _ in range(11)]
+    objects += [_object(3000 + i) for i in range(5)]
+    repo = _repo(objects)
+
+    seen: list[str] = []
+    after = None
+    while True:
+        res = await repo._fetch_keyset(after, ascending, 4)
+        seen.extend(str(o.uuid) for o in res.objects)
+        if len(res.objects) < 4:
+            break
+        last = res.objects[-1]
+        after = (_ms(last), str(last.uuid))
+    assert len(seen) == len(set(seen)) == len(objects)
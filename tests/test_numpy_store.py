@@ -0,0 +1,115 @@
+import os
+import time
+import asyncio
+import numpy as np
+import pytest
+from app.modules.vector_db import numpy_store
+from app.modules.vector_db.numpy_store import (
+    NumpySummaryStore,
+    TenantIndex,
+    TenantSnapshot,
+)
+
+DIM = 8
+
+
+def _vector(seed: int) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal(DIM).astype(np.float32)
+
+
+def _fill(index: TenantIndex, start: int, count: int) -> list[str]:
+    return [
+        str(index.insert({"summary": f"摘要 {i}", "turn": i}, _vector(i)))
+        for i in range(start, start + count)
+    ]
+
+
+def _assert_same(loaded: TenantIndex, expected: TenantIndex):
+    assert loaded.ids == expected.ids
+    assert loaded.properties == expected.properties
+    assert loaded.created_ms == expected.created_ms
+    assert loaded.updated_ms == expected.updated_ms
+    np.testing.assert_array_equal(
+        loaded.vectors[: len(loaded)], expected.vectors[: len(expected)]
+    )
+
+
+@pytest.mark.asyncio
+async def test_flush_while_mutating_then_reload(tmp_path, monkeypatch):
+    store = NumpySummaryStore(path=str(tmp_path), flush_interval=0)
+    store.create_tenant("t1")
+    index = store.tenant("t1")
+    ids = _fill(index, 0, 50)
+
+    write = TenantIndex.write_snapshot
+    started = asyncio.Event()
+    loop = asyncio.get_running_loop()
+
+    def slow_write(path: str, snapshot: TenantSnapshot):
+        loop.call_soon_threadsafe(started.set)
+        time.sleep(0.1)
+        write(path, snapshot)
+
+    monkeypatch.setattr(TenantIndex, "write_snapshot", staticmethod(slow_write))
+    flush = asyncio.create_task(store.aflush())
+    await started.wait()
+    # 落盘期间继续写入：扩容、删除（移动末行）与更新
+    _fill(index, 50, 200)
+    index.delete(ids[:10])
+    index.update(ids[20], {"summary": "更新后的摘要"}, _vector(999))
+    await flush
+
+    # 期间的写入没有落盘，dirty 保持
+    assert index.dirty
+    loaded = TenantIndex.load(str(tmp_path / "t1"))
+    assert len(loaded) == 50
+    assert loaded.ids == ids
+
+    monkeypatch.setattr(TenantIndex, "write_snapshot", staticmethod(write))
+    await store.aflush()
+    assert not index.dirty
+    _assert_same(TenantIndex.load(str(tmp_path / "t1")), index)
+
+
+def test_load_rejects_truncated_vectors(tmp_path):
+    store = NumpySummaryStore(path=str(tmp_path), flush_interval=0)
+    store.create_tenant("t1")
+    _fill(store.tenant("t1"), 0, 10)
+    store.flush()
+
+    vectors_path = tmp_path / "t1" / "vectors.f32"
+    with open(vectors_path, "r+b") as f:
+        f.truncate(os.path.getsize(vectors_path) // 2)
+
+    with pytest.raises(RuntimeError, match="t1"):
+        NumpySummaryStore(path=str(tmp_path)).load()
+
+
+@pytest.mark.asyncio
+async def test_threaded_similarity_matches_inline(monkeypatch):
+    monkeypatch.setattr(numpy_store, "SEARCH_THREAD_MIN_ROWS", 1)
+    index = TenantIndex()
+    _fill(index, 0, 100)
+    query = _vector(7)
+    threaded = await index.anear_vector(query, None, 10)
+    inline = index.near_vector(query, None, 10)
+    assert [o.uuid for o in threaded.objects] == [o.uuid for o in inline.objects]
+
+
+def test_keyset_pages_through_equal_timestamps():
+    index = TenantIndex()
+    ids = _fill(index, 0, 25)
+    # 同一毫秒内的多条记录按 uuid 区分先后
+    index.updated_ms[:] = [1000] * 10 + [2000] * 15
+    for ascending in (True, False):
+        seen: list[str] = []
+        after = None
+        while True:
+            res = index.fetch_keyset(after, ascending, 4)
+            seen.extend(str(o.uuid) for o in res.objects)
+            if len(res.objects) < 4:
+                break
+            last = res.objects[-1]
+            after = (index.updated_ms[index.rows[str(last.uuid)]], str(last.uuid))
+        assert sorted(seen) == sorted(ids)
+        assert len(seen) == len(ids)
@@ -0,0 +1,136 @@
+import copy
+import numpy as np
+import pytest
+from app.schema.summary import MergedSummary
+from app.modules.vector_db import numpy_store, summary_repo
+from app.modules.vector_db.numpy_store import NumpySummaryStore
+from app.modules.vector_db.rollup import rollup_tenant
+from app.modules.vector_db.summary_repo import archive_tenant_name
+
+DIM = 8
+
+
+async def _embed_documents(texts: list[str]) -> np.ndarray:
+    return np.ones((len(texts), DIM), dtype=np.float32)
+
+
+async def _embed_query(text: str) -> np.ndarray:
+    return np.ones(DIM, dtype=np.float32)
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = NumpySummaryStore(flush_interval=0)
+    monkeypatch.setattr(summary_repo, "STORE_BACKEND", "numpy")
+    monkeypatch.setattr(numpy_store, "store", store)
+    monkeypatch.setattr(summary_repo, "aembed_documents", _embed_documents)
+    monkeypatch.setattr(summary_repo, "aembed_query", _embed_query)
+    store.create_tenant("t1")
+    rng = np.random.default_rng(0)
+    for turn in range(60):
+        store.tenant("t1").insert(
+            {"summary": f"第 {turn} 轮", "turn": turn, "type": "summary"},
+            rng.standard_normal(DIM).astype(np.float32),
+        )
+    return store
+
+
+class _ChapterFn:
+    def __init__(self):
+        self.calls: list[list[MergedSummary]] = []
+
+    async def __call__(self, items: list[MergedSummary]) -> str:
+        self.calls.append(items)
+        return f"章节 {len(self.calls)}"
+
+
+def _state(store: NumpySummaryStore, tenant_name: str):
+    index = store.tenant(tenant_name)
+    return sorted(index.ids), copy.deepcopy(sorted(index.properties, key=str))
+
+
+@pytest.mark.asyncio
+async def test_second_run_without_archive_changes_nothing(store: NumpySummaryStore):
+    chapter_fn = _ChapterFn()
+    first = await rollup_tenant(
+        "t1", chapter_fn, chapter_turns=10, keep_turns=20, archive=False
+    )
+    assert first["chapters"] == 4
+    before = _state(store, "t1")
+
+    second = await rollup_tenant(
+        "t1", chapter_fn, chapter_turns=10, keep_turns=20, archive=False
+    )
+    assert second["chapters"] == 0
+    assert len(chapter_fn.calls) == 4
+    assert _state(store, "t1") == before
+    for props in store.tenant("t1").properties:
+        if props["type"] == "chapter":
+            assert len(props["merged_summary"]) == 10
+
+
+@pytest.mark.asyncio
+async def test_new_summaries_extend_existing_chapter(store: NumpySummaryStore):
+    chapter_fn = _ChapterFn()
+    await rollup_tenant(
+        "t1", chapter_fn, chapter_turns=10, keep_turns=20, min_items=11, archive=False
+    )
+    assert chapter_fn.calls == []
+    await rollup_tenant(
+        "t1", chapter_fn, chapter_turns=10, keep_turns=20, archive=False
+    )
+    # 移除一个章节后重新执行：只重新生成这一个章节，并复用确定的 uuid
+    index = store.tenant("t1")
+    chapters = [
+        uuid for uuid, p in zip(index.ids, index.properties) if p["type"] == "chapter"
+    ]
+    assert len(chapters) == 4
+    index.delete(chapters[:1])
+    await rollup_tenant(
+        "t1", chapter_fn, chapter_turns=10, keep_turns=20, archive=False
+    )
+    assert len(chapter_fn.calls) == 5
+    assert {
+        uuid for uuid, p in zip(index.ids, index.properties) if p["type"] == "chapter"
+    } == set(chapters)
+
+
+@pytest.mark.asyncio
+async def test_archive_rerun_is_idempotent(store: NumpySummaryStore):
+    chapter_fn = _ChapterFn()
+    first = await rollup_tenant("t1", chapter_fn, chapter_turns=10, keep_turns=20)
+    assert (first["chapters"], first["archived"]) == (4, 40)
+    before = _state(store, "t1")
+    archived = _state(store, archive_tenant_name("t1"))
+
+    second = await rollup_tenant("t1", chapter_fn, chapter_turns=10, keep_turns=20)
+    assert (second["chapters"], second["archived"]) == (0, 0)
+    assert len(chapter_fn.calls) == 4
+    assert _state(store, "t1") == before
+    assert _state(store, archive_tenant_name("t1")) == archived
+
+
+@pytest.mark.asyncio
+async def test_archive_after_interrupted_run_reuses_chapters(store: NumpySummaryStore):
+    # 章节已写入、原摘要尚未归档（如上次执行在归档前中断）
+    chapter_fn = _ChapterFn()
+    await rollup_tenant(
+        "t1", chapter_fn, chapter_turns=10, keep_turns=20, archive=False
+    )
+    res = await rollup_tenant("t1", chapter_fn, chapter_turns=10, keep_turns=20)
+    assert (res["chapters"], res["archived"]) == (0, 40)
+    assert len(chapter_fn.calls) == 4
+    assert len(store.tenant("t1")) == 4 + 20
+
+
+@pytest.mark.asyncio
+async def test_tenant_name_leaves_room_for_archive_suffix(store: NumpySummaryStore):
+    mgt = summary_repo.get_summary_tenant_mgt()
+    longest = "t" * (summary_repo.TENANT_NAME_MAX_LENGTH - 8)
+    await mgt.create_tenant(longest)
+    await mgt.create_tenant(archive_tenant_name(longest), archive=True)
+    assert archive_tenant_name(longest) in store.tenants
+
+    with pytest.raises(ValueError):
+        await mgt.create_tenant(longest + "t")
+    assert longest + "t" not in store.tenants
@@ -0,0 +1,62 @@
+import io
+import numpy as np
+import pytest
+from app.modules.vector_db import numpy_store, summary_repo
+from app.modules.vector_db.numpy_store import NumpySummaryStore
+from app.modules.vector_db.snapshot import export_tenant, import_tenant
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = NumpySummaryStore(flush_interval=0)
+    monkeypatch.setattr(summary_repo, "STORE_BACKEND", "numpy")
+    monkeypatch.setattr(numpy_store, "store", store)
+    return store
+
+
+@pytest.mark.asyncio
+async def test_round_trip_keeps_ids_vectors_and_timestamps(store: NumpySummaryStore):
+    store.create_tenant("t1")
+    source = store.tenant("t1")
+    rng = np.random.default_rng(0)
+    for i in range(600):
+        source.insert(
+            {"summary": f"摘要 {i}", "turn": i, "type": "summary"},
+            rng.standard_normal(8).astype(np.float32),
+            created_ms=1_000_000 + i,
+            updated_ms=2_000_000 + i,
+        )
+
+    buffer = io.BytesIO()
+    manifest = await export_tenant("t1", buffer)
+    assert manifest["count"] == 600
+
+    buffer.seek(0)
+    result = await import_tenant(buffer, "t2", batch_size=128)
+    assert (result["imported"], result["failed"]) == (600, 0)
+
+    target = store.tenant("t2")
+    rows = [target.rows[uuid] for uuid in source.ids]
+    assert [target.created_ms[r] for r in rows] == source.created_ms
+    assert [target.updated_ms[r] for r in rows] == source.updated_ms
+    np.testing.assert_allclose(
+        target.vectors[rows], source.vectors[: len(source)], atol=1e-6
+    )
+
+
+@pytest.mark.asyncio
+async def test_import_does_not_overwrite_existing_ids(store: NumpySummaryStore):
+    store.create_tenant("t1")
+    source = store.tenant("t1")
+    for i in range(5):
+        source.insert({"summary": f"摘要 {i}", "turn": i}, np.ones(8, np.float32))
+
+    buffer = io.BytesIO()
+    await export_tenant("t1", buffer)
+    source.update(source.ids[0], {"summary": "导出后修改"}, None)
+
+    buffer.seek(0)
+    result = await import_tenant(buffer, "t1")
+    assert (result["imported"], result["failed"]) == (0, 5)
+    assert all("already exists" in error for error in result["errors"])
+    assert source.properties[0]["summary"] == "导出后修改"
@@ -0,0 +1,67 @@
+import asyncio
+import pytest
+from app.modules.chat import sse
+from app.modules.chat.sse import FlushPolicy, sse_frames
+
+
+@pytest.mark.asyncio
+async def test_upstream_waits_for_slow_consumer(monkeypatch):
+    monkeypatch.setattr(sse, "MAX_PENDING_FRAMES", 4)
+    produced = 0
+
+    async def source():
+        nonlocal produced
+        for i in range(100):
+            produced += 1
+            yield {"usageMetadata": {"step": i}}
+
+    stream = sse_frames(source(), FlushPolicy(50, 1024))
+    received = [await anext(stream)]
+    for _ in range(5):
+        await asyncio.sleep(0)
+    # 发送方未取走时，上游最多领先 MAX_PENDING_FRAMES 帧
+    assert produced <= len(received) + 4 + 1
+    received.extend([data async for data in stream])
+    assert len(received) == 100
+
+
+@pytest.mark.asyncio
+async def test_upstream_error_after_buffered_text():
+    async def source():
+        yield {"content": "你好"}
+        raise RuntimeError("model error")
+
+    received: list[str] = []
+    with pytest.raises(RuntimeError, match="model error"):
+        async for data in sse_frames(source(), FlushPolicy(50, 1024)):
+            received.append(data)
+    assert received == ['{"content": "你好"}']
+
+
+@pytest.mark.asyncio
+async def test_thinking_and_first_token_are_not_delayed():
+    release = asyncio.Event()
+
+    async def source():
+        yield {"content": "", "thinking": "先想一想"}
+        yield {"content": "你", "thinking": ""}
+        yield {"content": "好", "thinking": ""}
+        await release.wait()
+        yield {"content": "。", "thinking": ""}
+
+    received: list[str] = []
+
+    async def consume():
+        # 间隔远大于等待时间：被合并的内容只会在上游结束时发出
+        async for data in sse_frames(source(), FlushPolicy(1000, 1024)):
+            received.append(data)
+
+    task = asyncio.create_task(consume())
+    await asyncio.sleep(0.05)
+    assert received == [
+        '{"content": "", "thinking": "先想一想"}',
+        '{"content": "你"}',
+    ]
+    release.set()
+    await task
+    assert received[2:] == ['{"content": "好。"}']
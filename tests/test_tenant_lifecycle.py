@@ -0,0 +1,56 @@
+import asyncio
+import pytest
+from app.modules.vector_db.tenant_lifecycle import COLD, HOT, TenantLifecycleManager
+
+
+def _manager(
+    statuses: dict[str, str], max_hot: int
+) -> tuple[TenantLifecycleManager, list]:
+    updates: list[tuple[list[str], str]] = []
+
+    async def load_fn() -> dict[str, str]:
+        return statuses
+
+    async def update_fn(names: list[str], status: str):
+        updates.append((list(names), status))
+
+    manager = TenantLifecycleManager(
+        load_fn, update_fn, enabled=True, max_hot=max_hot, sweep_interval=3600
+    )
+    return manager, updates
+
+
+@pytest.mark.asyncio
+async def test_tenant_in_use_is_not_demoted_by_lru_overflow():
+    manager, updates = _manager({"a": COLD, "b": COLD, "c": COLD}, max_hot=1)
+    await manager.startup()
+    try:
+        release = asyncio.Event()
+
+        async def long_request():
+            async with manager.use("a"):
+                await release.wait()
+
+        task = asyncio.create_task(long_request())
+        await asyncio.sleep(0)
+        assert manager.states["a"] == HOT
+
+        # 激活 b 使 HOT 数超限，最久未访问的 a 正在使用，不转冷
+        async with manager.use("b"):
+            pass
+        assert manager.states["a"] == HOT
+        assert (["a"], COLD) not in updates
+
+        await manager.sweep()
+        assert manager.states["a"] == HOT
+
+        release.set()
+        await task
+        # 使用结束后 a 恢复参与 LRU，激活 c 时转冷
+        async with manager.use("c"):
+            pass
+        assert manager.states["a"] == COLD
+        assert manager.states["c"] == HOT
+        assert manager.in_use == {}
+    finally:
+        await manager.shutdown()
@@ -0,0 +1,42 @@
+import asyncio
+import pytest
+from app.modules.vector_db.tenant_stats import TenantStatsService
+
+
+@pytest.mark.asyncio
+async def test_invalidate_during_count_discards_stale_value():
+    counts = {"t1": 1}
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def count_fn(name: str) -> int:
+        value = counts[name]
+        started.set()
+        await release.wait()
+        return value
+
+    stats = TenantStatsService(count_fn)
+    pending = asyncio.create_task(stats.count("t1"))
+    await started.wait()
+    # 查询进行中写入了数据并失效
+    counts["t1"] = 2
+    stats.invalidate("t1")
+    release.set()
+    assert await pending == 1
+    assert "t1" not in stats.counts
+    assert await stats.count("t1") == 2
+
+
+@pytest.mark.asyncio
+async def test_cache_is_bounded():
+    async def count_fn(name: str) -> int:
+        return len(name)
+
+    stats = TenantStatsService(count_fn, max_size=3)
+    for name in ["a", "bb", "ccc", "dddd"]:
+        await stats.count(name)
+    # 最久未使用的被淘汰
+    assert list(stats.counts) == ["bb", "ccc", "dddd"]
+    await stats.count("bb")
+    await stats.count("e")
+    assert list(stats.counts) == ["dddd", "bb", "e"]